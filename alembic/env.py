@@ -10,14 +10,16 @@ from alembic import context
 # Moved imports to top to satisfy ruff E402
 from app.models import Base
 from app.config import settings
+from app.data_migrations import PROGRESS_TABLE
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
 # Interpret the config file for Python logging.
-# This line sets up loggers basically.
-if config.config_file_name is not None:
+# This line sets up loggers basically. Callers that run migrations in their own
+# process (the tests) set configure_logger False to keep their logging as is.
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -26,8 +28,20 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
-# Override sqlalchemy.url in config with env var
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+# Override sqlalchemy.url in config with env var, unless the caller names a
+# database: app.tenancy.upgrade_tenant does, as can `alembic -x database_url=...`
+database_url = (
+    config.attributes.get("database_url")
+    or context.get_x_argument(as_dictionary=True).get("database_url")
+    or settings.DATABASE_URL
+)
+config.set_main_option("sqlalchemy.url", database_url)
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # Bookkeeping for resumable data migrations is not part of the app schema.
+    return not (type_ == "table" and name == PROGRESS_TABLE)
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -47,6 +61,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -54,7 +69,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
 
     with context.begin_transaction():
         context.run_migrations()
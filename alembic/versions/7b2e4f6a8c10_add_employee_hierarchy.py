@@ -0,0 +1,57 @@
+"""add_employee_hierarchy
+
+Revision ID: 7b2e4f6a8c10
+Revises: 3c8d1e7a9b42
+Create Date: 2026-10-19 15:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4f6a8c10'
+down_revision: Union[str, None] = '3c8d1e7a9b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # batch mode so SQLite can add the foreign key (it rebuilds the table)
+    with op.batch_alter_table('employees') as batch_op:
+        batch_op.add_column(sa.Column('manager_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_employees_manager_id', 'employees', ['manager_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_employees_manager_id'), ['manager_id'], unique=False)
+
+    op.create_table(
+        'employee_closure',
+        sa.Column('ancestor_id', sa.Integer(), nullable=False),
+        sa.Column('descendant_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['employees.id']),
+        sa.ForeignKeyConstraint(['descendant_id'], ['employees.id']),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    )
+    op.create_index('ix_employee_closure_descendant', 'employee_closure', ['descendant_id', 'depth'], unique=False)
+
+    # Org rollups join goals and assignments to the closure table by employee
+    op.create_index(op.f('ix_goals_employee_id'), 'goals', ['employee_id'], unique=False)
+    op.create_index(
+        op.f('ix_project_assignments_employee_id'), 'project_assignments', ['employee_id'], unique=False
+    )
+
+    # Nobody has a manager yet, so every employee is the root of a one-person tree
+    op.execute("INSERT INTO employee_closure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM employees")
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_project_assignments_employee_id'), table_name='project_assignments')
+    op.drop_index(op.f('ix_goals_employee_id'), table_name='goals')
+    op.drop_index('ix_employee_closure_descendant', table_name='employee_closure')
+    op.drop_table('employee_closure')
+    with op.batch_alter_table('employees') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_employees_manager_id'))
+        batch_op.drop_constraint('fk_employees_manager_id', type_='foreignkey')
+        batch_op.drop_column('manager_id')
@@ -0,0 +1,76 @@
+"""add_goal_status_history
+
+Revision ID: 9d4a6c2e1f35
+Revises: 7b2e4f6a8c10
+Create Date: 2026-10-19 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4a6c2e1f35'
+down_revision: Union[str, None] = '7b2e4f6a8c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # batch mode: SQLite can't ADD COLUMN with a non-constant default
+    with op.batch_alter_table('goals') as batch_op:
+        batch_op.add_column(sa.Column(
+            'created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True
+        ))
+
+    op.create_table(
+        'goal_status_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('goal_id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=True),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('from_status', sa.String(), nullable=True),
+        sa.Column('to_status', sa.String(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('age_seconds', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_goal_status_changes_goal_id'), 'goal_status_changes', ['goal_id'], unique=False)
+    op.create_table(
+        'goal_status_daily',
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('scope_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('entered', sa.Integer(), nullable=False),
+        sa.Column('exited', sa.Integer(), nullable=False),
+        sa.Column('age_seconds', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('scope', 'scope_id', 'day', 'status'),
+    )
+
+    # Earlier history is lost; start each goal's log at its current status, as of today
+    op.execute(
+        "INSERT INTO goal_status_changes "
+        "(goal_id, employee_id, project_id, from_status, to_status, changed_at, age_seconds) "
+        "SELECT id, employee_id, project_id, NULL, status, created_at, 0 FROM goals"
+    )
+    op.execute(
+        "INSERT INTO goal_status_daily (scope, scope_id, day, status, entered, exited, age_seconds) "
+        "SELECT 'all', 0, CURRENT_DATE, status, count(*), 0, 0 FROM goals GROUP BY status"
+    )
+    for scope in ("employee", "project"):
+        op.execute(
+            "INSERT INTO goal_status_daily (scope, scope_id, day, status, entered, exited, age_seconds) "
+            f"SELECT '{scope}', {scope}_id, CURRENT_DATE, status, count(*), 0, 0 FROM goals "
+            f"WHERE {scope}_id IS NOT NULL GROUP BY {scope}_id, status"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('goal_status_daily')
+    op.drop_index(op.f('ix_goal_status_changes_goal_id'), table_name='goal_status_changes')
+    op.drop_table('goal_status_changes')
+    with op.batch_alter_table('goals') as batch_op:
+        batch_op.drop_column('created_at')
@@ -0,0 +1,48 @@
+"""add_team_counters
+
+Revision ID: a5c7e9b1d3f2
+Revises: 9d4a6c2e1f35
+Create Date: 2026-10-19 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5c7e9b1d3f2'
+down_revision: Union[str, None] = '9d4a6c2e1f35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'team_counters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('employees', sa.Integer(), nullable=False),
+        sa.Column('active_projects', sa.Integer(), nullable=False),
+        sa.Column('pending_goals', sa.Integer(), nullable=False),
+        sa.Column('blocked_goals', sa.Integer(), nullable=False),
+        sa.Column('over_allocated', sa.Integer(), nullable=False),
+        sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Same counts as app.services.counters.actual_counts
+    op.execute(
+        "INSERT INTO team_counters "
+        "(id, employees, active_projects, pending_goals, blocked_goals, over_allocated, reconciled_at) SELECT 1, "
+        "(SELECT count(*) FROM employees), "
+        "(SELECT count(*) FROM projects WHERE status = 'Active'), "
+        "(SELECT count(*) FROM goals WHERE status = 'Pending'), "
+        "(SELECT count(*) FROM goals WHERE status = 'Blocked'), "
+        "(SELECT count(*) FROM (SELECT a.employee_id FROM project_assignments a "
+        "JOIN employees e ON e.id = a.employee_id GROUP BY a.employee_id HAVING sum(a.capacity) > 100) AS over), "
+        "CURRENT_TIMESTAMP"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('team_counters')
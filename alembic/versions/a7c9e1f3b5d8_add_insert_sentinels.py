@@ -0,0 +1,31 @@
+"""add_insert_sentinels
+
+Revision ID: a7c9e1f3b5d8
+Revises: f6b8d0c2e4a7
+Create Date: 2026-10-20 00:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9e1f3b5d8'
+down_revision: Union[str, None] = 'f6b8d0c2e4a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lets the ORM insert many goals or assignments in one INSERT .. RETURNING (see app/models.py)
+    op.add_column('goals', sa.Column('_sentinel', sa.Integer(), nullable=True))
+    op.add_column('project_assignments', sa.Column('_sentinel', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('project_assignments') as batch_op:
+        batch_op.drop_column('_sentinel')
+    with op.batch_alter_table('goals') as batch_op:
+        batch_op.drop_column('_sentinel')
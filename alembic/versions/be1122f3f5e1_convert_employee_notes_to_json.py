@@ -11,6 +11,8 @@ import json
 from alembic import op
 import sqlalchemy as sa
 
+from app.data_migrations import batched_update
+
 
 # revision identifiers, used by Alembic.
 revision: str = 'be1122f3f5e1'
@@ -19,30 +21,35 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+def _has_column(table: str, column: str) -> bool:
+    return any(col["name"] == column for col in sa.inspect(op.get_bind()).get_columns(table))
+
+
 def upgrade() -> None:
-    # 1. Add temporary column
-    with op.batch_alter_table('employees') as batch_op:
-        batch_op.add_column(sa.Column('notes_temp', sa.JSON(), nullable=True))
+    # 1. Add temporary column (already present when resuming an interrupted run)
+    if not _has_column('employees', 'notes_temp'):
+        with op.batch_alter_table('employees') as batch_op:
+            batch_op.add_column(sa.Column('notes_temp', sa.JSON(), nullable=True))
     
     # 2. Migrate data
-    bind = op.get_bind()
-    result = bind.execute(sa.text("SELECT id, notes FROM employees"))
-    
-    for row in result:
-        emp_id = row[0]
+    def to_json(row):
         notes_text = row[1]
-        
+
         notes_list = []
         if notes_text:
             notes_list.append(notes_text)
-        
+
         # Serialize to JSON string for SQLite
-        json_val = json.dumps(notes_list)
-        
-        bind.execute(
-            sa.text("UPDATE employees SET notes_temp = :val WHERE id = :id"),
-            {"val": json_val, "id": emp_id}
-        )
+        return {"notes_temp": json.dumps(notes_list)}
+
+    batched_update(
+        op.get_context(),
+        "employees",
+        read_columns=["notes"],
+        write_columns=["notes_temp"],
+        transform=to_json,
+        name="be1122f3f5e1_upgrade",
+    )
 
     # 3. Drop old column and Rename new one
     with op.batch_alter_table('employees') as batch_op:
@@ -51,18 +58,15 @@ def upgrade() -> None:
 
 
 def downgrade() -> None:
-    # 1. Add temporary column
-    with op.batch_alter_table('employees') as batch_op:
-        batch_op.add_column(sa.Column('notes_old', sa.Text(), nullable=True))
+    # 1. Add temporary column (already present when resuming an interrupted run)
+    if not _has_column('employees', 'notes_old'):
+        with op.batch_alter_table('employees') as batch_op:
+            batch_op.add_column(sa.Column('notes_old', sa.Text(), nullable=True))
     
     # 2. Migrate data back
-    bind = op.get_bind()
-    result = bind.execute(sa.text("SELECT id, notes FROM employees"))
-    
-    for row in result:
-        emp_id = row[0]
+    def to_text(row):
         notes_json = row[1]
-        
+
         note_text = ""
         if notes_json:
              try:
@@ -79,10 +83,16 @@ def downgrade() -> None:
              except Exception:
                  note_text = str(notes_json)
 
-        bind.execute(
-            sa.text("UPDATE employees SET notes_old = :val WHERE id = :id"),
-            {"val": note_text, "id": emp_id}
-        )
+        return {"notes_old": note_text}
+
+    batched_update(
+        op.get_context(),
+        "employees",
+        read_columns=["notes"],
+        write_columns=["notes_old"],
+        transform=to_text,
+        name="be1122f3f5e1_downgrade",
+    )
 
     # 3. Drop old column and Rename new one
     with op.batch_alter_table('employees') as batch_op:
@@ -0,0 +1,38 @@
+"""add_audit_log
+
+Revision ID: c3e5a7f9b2d4
+Revises: a5c7e9b1d3f2
+Create Date: 2026-10-19 20:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7f9b2d4'
+down_revision: Union[str, None] = 'a5c7e9b1d3f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('changes', sa.JSON(), nullable=False),
+        sa.Column('user', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_audit_log_entity', 'audit_log', ['entity', 'entity_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_log_entity', table_name='audit_log')
+    op.drop_table('audit_log')
@@ -0,0 +1,112 @@
+"""add_skills_index
+
+Revision ID: d4f6b8a0c2e5
+Revises: c3e5a7f9b2d4
+Create Date: 2026-10-19 21:40:00.000000
+
+"""
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6b8a0c2e5'
+down_revision: Union[str, None] = 'c3e5a7f9b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The skill resolution of app/services/skills.py as of this revision, frozen so
+# that later changes to the service or the models don't change what it does.
+ALIASES = {
+    "k8s": "Kubernetes",
+    "js": "JavaScript",
+    "ts": "TypeScript",
+    "py": "Python",
+    "golang": "Go",
+    "postgres": "PostgreSQL",
+    "psql": "PostgreSQL",
+    "reactjs": "React",
+    "react.js": "React",
+    "node": "Node.js",
+    "nodejs": "Node.js",
+    "ml": "Machine Learning",
+    "amazon web services": "AWS",
+}
+BATCH_SIZE = 10_000
+
+employees = sa.table('employees', sa.column('id', sa.Integer()), sa.column('skills', sa.JSON()))
+skills = sa.table(
+    'skills', sa.column('id', sa.Integer()), sa.column('key', sa.String()), sa.column('name', sa.String())
+)
+employee_skills = sa.table(
+    'employee_skills', sa.column('skill_id', sa.Integer()), sa.column('employee_id', sa.Integer())
+)
+
+
+def _fold(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+def _canonical_name(name: str) -> str:
+    return ALIASES.get(_fold(name), " ".join(name.split()))
+
+
+def _backfill(bind: sa.Connection) -> None:
+    """Resolve every employee's JSON list into canonical skills and links, a chunk of employees at a time."""
+    ids: Dict[str, int] = {}
+    last = 0
+    while True:
+        chunk: Sequence[Tuple[int, Optional[List[str]]]] = bind.execute(
+            sa.select(employees.c.id, employees.c.skills)
+            .where(employees.c.id > last)
+            .order_by(employees.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not chunk:
+            return
+        new: Dict[str, str] = {}
+        for _, names in chunk:
+            for name in names or []:
+                key = _fold(_canonical_name(name))
+                if key not in ids:
+                    new.setdefault(key, _canonical_name(name))
+        if new:
+            bind.execute(sa.insert(skills), [{"key": key, "name": name} for key, name in new.items()])
+            ids.update(bind.execute(sa.select(skills.c.key, skills.c.id).where(skills.c.key.in_(new))).all())
+        links: Set[Tuple[int, int]] = {
+            (employee_id, ids[_fold(_canonical_name(name))]) for employee_id, names in chunk for name in names or []
+        }
+        if links:
+            bind.execute(sa.insert(employee_skills), [{"employee_id": e, "skill_id": s} for e, s in sorted(links)])
+        last = chunk[-1][0]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'skills',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key'),
+    )
+    op.create_table(
+        'employee_skills',
+        sa.Column('skill_id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id']),
+        sa.ForeignKeyConstraint(['skill_id'], ['skills.id']),
+        sa.PrimaryKeyConstraint('skill_id', 'employee_id'),
+    )
+    op.create_index(op.f('ix_employee_skills_employee_id'), 'employee_skills', ['employee_id'], unique=False)
+
+    _backfill(op.get_bind())
+
+
+def downgrade() -> None:
+    # Employee.skills still holds every list, so nothing is lost
+    op.drop_index(op.f('ix_employee_skills_employee_id'), table_name='employee_skills')
+    op.drop_table('employee_skills')
+    op.drop_table('skills')
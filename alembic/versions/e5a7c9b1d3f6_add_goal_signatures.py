@@ -0,0 +1,123 @@
+"""add_goal_signatures
+
+Revision ID: e5a7c9b1d3f6
+Revises: d4f6b8a0c2e5
+Create Date: 2026-10-19 22:30:00.000000
+
+"""
+import hashlib
+import random
+import re
+import struct
+from typing import List, Sequence, Set, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9b1d3f6'
+down_revision: Union[str, None] = 'd4f6b8a0c2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The signing of app/services/goal_duplicates.py as of this revision, frozen so
+# that later changes to the service or the models don't change what it writes.
+PERMUTATIONS = 64
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+BATCH_SIZE = 5_000
+
+_PRIME = (1 << 61) - 1
+_FORMAT = f"<{PERMUTATIONS}I"
+_random = random.Random(20261019)
+_COEFFICIENTS = [(_random.randrange(1, _PRIME), _random.randrange(_PRIME)) for _ in range(PERMUTATIONS)]
+_WORD = re.compile(r"\w+")
+
+goals = sa.table(
+    'goals', sa.column('id', sa.Integer()), sa.column('title', sa.String()), sa.column('description', sa.Text())
+)
+goal_signatures = sa.table(
+    'goal_signatures', sa.column('goal_id', sa.Integer()), sa.column('signature', sa.LargeBinary())
+)
+goal_buckets = sa.table(
+    'goal_buckets', sa.column('band', sa.Integer()), sa.column('bucket', sa.BigInteger()),
+    sa.column('goal_id', sa.Integer()),
+)
+
+
+def _shingles(text: str) -> Set[str]:
+    words = _WORD.findall(text.casefold())
+    if len(words) < 2:
+        return set(words)
+    return {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+
+def _hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+
+
+def _signature(title: str, description: str) -> bytes:
+    hashes = [_hash(shingle) for shingle in _shingles(f"{title}\n{description or ''}")] or [0]
+    return struct.pack(_FORMAT, *(
+        min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF for a, b in _COEFFICIENTS
+    ))
+
+
+def _band_buckets(value: bytes) -> List[int]:
+    width = ROWS * 4
+    return [
+        int.from_bytes(hashlib.blake2b(value[band * width:(band + 1) * width], digest_size=8).digest(), "little",
+                       signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def _backfill(bind: sa.Connection) -> None:
+    """Sign every goal written so far, a chunk of goals at a time."""
+    last = 0
+    while True:
+        chunk: Sequence[Tuple[int, str, str]] = bind.execute(
+            sa.select(goals.c.id, goals.c.title, goals.c.description)
+            .where(goals.c.id > last)
+            .order_by(goals.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not chunk:
+            return
+        signature_rows, bucket_rows = [], []
+        for goal_id, title, description in chunk:
+            value = _signature(title, description)
+            signature_rows.append({"goal_id": goal_id, "signature": value})
+            bucket_rows += [
+                {"band": band, "bucket": bucket, "goal_id": goal_id}
+                for band, bucket in enumerate(_band_buckets(value))
+            ]
+        bind.execute(sa.insert(goal_signatures), signature_rows)
+        bind.execute(sa.insert(goal_buckets), bucket_rows)
+        last = chunk[-1][0]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'goal_signatures',
+        sa.Column('goal_id', sa.Integer(), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('goal_id'),
+    )
+    op.create_table(
+        'goal_buckets',
+        sa.Column('band', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.Column('goal_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('band', 'bucket', 'goal_id'),
+    )
+    op.create_index(op.f('ix_goal_buckets_goal_id'), 'goal_buckets', ['goal_id'], unique=False)
+
+    _backfill(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_goal_buckets_goal_id'), table_name='goal_buckets')
+    op.drop_table('goal_buckets')
+    op.drop_table('goal_signatures')
@@ -0,0 +1,34 @@
+"""add_goal_suggestions
+
+Revision ID: f6b8d0c2e4a7
+Revises: e5a7c9b1d3f6
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b8d0c2e4a7'
+down_revision: Union[str, None] = 'e5a7c9b1d3f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by the off-hours warm-up (app/services/suggestions.py), not here: it calls the LLM
+    op.create_table(
+        'goal_suggestions',
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('suggestion', sa.JSON(), nullable=False),
+        sa.Column('generated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('employee_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('goal_suggestions')
@@ -0,0 +1,4 @@
+import time
+
+# Reference point for the startup profile's "imports" phase (see app/startup.py).
+IMPORT_STARTED_AT = time.perf_counter()
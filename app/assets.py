@@ -0,0 +1,121 @@
+"""Fingerprinted, precompressed static assets.
+
+``scripts/build_assets.py`` vendors htmx and compiles Tailwind CSS from our
+templates, then calls ``write_bundle`` to store each file under
+``app/static/dist`` with a content hash in its name, next to ``.gz`` and
+``.br`` variants and a ``manifest.json`` mapping logical names to those files.
+
+Templates link assets through ``asset_url("htmx.js")``. Until the bundle has
+been built (plain local checkouts), it falls back to the public CDNs.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import stat
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).parent / "static"
+BUNDLE_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+
+# Used when the bundle hasn't been built. Tailwind has no stylesheet fallback:
+# layout.html and login.html load the in-browser compiler instead.
+CDN_FALLBACKS = {"htmx.js": "https://unpkg.com/htmx.org@1.9.10"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def write_bundle(files: Mapping[str, bytes], static_dir: Path = STATIC_DIR) -> Dict[str, str]:
+    """Write ``files`` (logical name -> content) as hashed, precompressed assets and return the manifest."""
+    out_dir = static_dir / BUNDLE_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for stale in out_dir.iterdir():
+        stale.unlink()
+
+    manifest = {}
+    for name, content in files.items():
+        stem, _, ext = name.rpartition(".")
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        filename = f"{stem}.{digest}.{ext}"
+        (out_dir / filename).write_bytes(content)
+        (out_dir / f"{filename}.gz").write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            (out_dir / f"{filename}.br").write_bytes(brotli.compress(content))
+        manifest[name] = f"{BUNDLE_DIR}/{filename}"
+
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+@lru_cache
+def load_manifest(static_dir: Path = STATIC_DIR) -> Dict[str, str]:
+    path = static_dir / BUNDLE_DIR / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def asset_url(name: str) -> Optional[str]:
+    """URL of the built asset ``name``, its CDN fallback, or None if neither exists."""
+    built = load_manifest().get(name)
+    if built is not None:
+        return f"/static/{built}"
+    return CDN_FALLBACKS.get(name)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves ``.br``/``.gz`` siblings and caches bundle files forever.
+
+    Bundle filenames change whenever their content does, so browsers never
+    need to revalidate them.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if not path.startswith(f"{BUNDLE_DIR}/"):
+            return await super().get_response(path, scope)
+
+        response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = IMMUTABLE
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Optional[Response]:
+        if scope["method"] not in ("GET", "HEAD"):
+            return None
+        accepted = Headers(scope=scope).get("accept-encoding", "")
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            response = self.file_response(full_path, stat_result, scope)
+            response.headers["Content-Type"] = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            response.headers["Content-Encoding"] = encoding
+            return response
+        return None
+
+
+def check_bundle(environment: str) -> None:
+    if environment == "production" and not load_manifest():
+        logger.warning("Static bundle not built; pages load htmx and Tailwind from CDNs. Run scripts/build_assets.py")
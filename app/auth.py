@@ -1,11 +1,12 @@
+import secrets
+
 from fastapi import APIRouter, HTTPException, status, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from pathlib import Path
 from app.config import settings
+from app.middleware import sign_session
+from app.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
 
 @router.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
@@ -13,9 +14,12 @@ async def login_page(request: Request):
 
 @router.post("/login")
 async def login(request: Request, username: str = Form(...), password: str = Form(...)):
-    if username == settings.ADMIN_USERNAME and password == settings.ADMIN_PASSWORD:
+    users = {settings.ADMIN_USERNAME: settings.ADMIN_PASSWORD, **settings.TENANT_USERS}
+    expected = users.get(username)
+    if expected is not None and secrets.compare_digest(password.encode(), expected.encode()):
         response = RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
-        response.set_cookie(key="session_user", value=username, httponly=True, secure=False) # Secure=False for dev
+        session = sign_session(username)
+        response.set_cookie(key="session_user", value=session, httponly=True, secure=False) # Secure=False for dev
         return response
     
     return templates.TemplateResponse(request=request, name="login.html", context={"error": "Invalid credentials"})
@@ -27,7 +31,8 @@ async def logout(request: Request):
     return response
 
 async def get_current_user(request: Request):
-    user = request.cookies.get("session_user")
+    # Resolved once per request by app.middleware.AuthMiddleware
+    user = request.scope.get("user")
     if not user:
         raise HTTPException(
             status_code=status.HTTP_301_MOVED_PERMANENTLY,
@@ -36,3 +41,10 @@ async def get_current_user(request: Request):
         )
     return user
 
+async def get_admin_user(request: Request):
+    # App-wide pages such as /feedback/admin read data shared by every tenant
+    user = await get_current_user(request)
+    if user != settings.ADMIN_USERNAME:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the admin can view this page")
+    return user
+
@@ -1,5 +1,11 @@
+import re
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
+
+# Logins that name a tenant database file (app/tenancy.py)
+TENANT_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
 class Settings(BaseSettings):
     SECRET_KEY: str = "dev_secret_key_change_in_prod"
@@ -8,7 +14,92 @@ class Settings(BaseSettings):
     ADMIN_PASSWORD: str = "password"
     OPENAI_API_KEY: Optional[str] = None
     ENVIRONMENT: str = "development"
+    # Extra origins (e.g. "https://leaderai.example.com") allowed to POST when
+    # the app sits behind a proxy that rewrites the Host header.
+    CSRF_TRUSTED_ORIGINS: List[str] = []
+    # "full" runs create_all and the seed check on every boot; "fast" trusts an
+    # Alembic-managed schema at head and a seed marker file instead.
+    STARTUP_MODE: str = "full"
+    SEED_MARKER_PATH: str = ".leaderai_seeded"
+    # Directory for compiled Jinja bytecode; None uses the system temp dir.
+    TEMPLATE_CACHE_DIR: Optional[str] = None
+    # Level of the app's own log records (app.*), such as the startup profile.
+    LOG_LEVEL: str = "INFO"
+    # Answer repeat page views with 304s from in-process change counters
+    # (app/versioning.py). A worker never sees the other workers' writes and would
+    # answer 304 with stale pages, so this is off by default and can only be turned
+    # on with a single worker (WEB_CONCURRENCY, as read by uvicorn and gunicorn).
+    ETAGS_ENABLED: bool = False
+    WEB_CONCURRENCY: int = 1
+    # Rendered list rows keyed by the same counters (app/fragments.py); same
+    # single-worker restriction, so also off by default.
+    FRAGMENT_CACHE_ENABLED: bool = False
+    FRAGMENT_CACHE_SIZE: int = 10000
+    # Keep the /capacity report until an assignment, employee or project changes
+    # (app/services/capacity.py); same single-worker restriction.
+    CAPACITY_CACHE_ENABLED: bool = False
+    # Feedback is buffered in memory and inserted in batches of up to this many
+    # rows, at most this many seconds after the first one arrived.
+    FEEDBACK_BATCH_SIZE: int = 100
+    FEEDBACK_FLUSH_INTERVAL: float = 2.0
+    # Same for audit entries (app/services/audit.py), written after each commit.
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL: float = 2.0
+    # Report DB/template/LLM time per request in a Server-Timing header, and
+    # optionally in a small panel at the bottom of every page.
+    SERVER_TIMING_ENABLED: bool = True
+    DEBUG_TOOLBAR: bool = False
+    # What to do when a request runs more SQL statements than its route's
+    # query_budget: "warn" logs it, "raise" fails the request, "off" skips counting.
+    QUERY_BUDGET_MODE: str = "warn"
+    # Employees allocated below this percentage are listed as under-allocated on /capacity.
+    CAPACITY_UNDER_ALLOCATED: int = 50
+    # Seconds between recounts of the dashboard counters (app/services/counters.py)
+    COUNTERS_RECONCILE_INTERVAL: float = 3600.0
+    # Prepare AI goal suggestions for employees whose details changed (app/services/suggestions.py):
+    # a pass every SUGGESTIONS_WARMUP_INTERVAL seconds while the local hour is in [START, END),
+    # with at most SUGGESTIONS_WARMUP_CONCURRENCY LLM calls in flight. Off unless enabled: it spends LLM calls.
+    SUGGESTIONS_WARMUP_ENABLED: bool = False
+    SUGGESTIONS_WARMUP_INTERVAL: float = 900.0
+    SUGGESTIONS_WARMUP_CONCURRENCY: int = 4
+    SUGGESTIONS_OFF_HOURS_START: int = 22
+    SUGGESTIONS_OFF_HOURS_END: int = 6
+    # One SQLite file per logged-in user under TENANT_DATABASE_DIR (app/tenancy.py);
+    # DATABASE_URL then only holds app-wide data such as feedback.
+    MULTI_TENANT: bool = False
+    TENANT_DATABASE_DIR: str = "tenants"
+    # Logins besides ADMIN_USERNAME, e.g. TENANT_USERS='{"alice": "secret"}'. Each one
+    # names a database file, so only letters, digits, "_" and "-" are allowed.
+    TENANT_USERS: Dict[str, str] = {}
+    # Open tenant engines kept around, and how long an unused one stays open.
+    TENANT_ENGINE_CACHE_SIZE: int = 64
+    TENANT_ENGINE_IDLE_SECONDS: float = 300.0
+    # When set, /metrics requires "Authorization: Bearer <token>".
+    METRICS_TOKEN: Optional[str] = None
     
     model_config = SettingsConfigDict(env_file=".env")
 
+    @model_validator(mode="after")
+    def _version_caches_need_one_worker(self) -> "Settings":
+        enabled = [
+            name for name in ("ETAGS_ENABLED", "FRAGMENT_CACHE_ENABLED", "CAPACITY_CACHE_ENABLED")
+            if getattr(self, name)
+        ]
+        if enabled and self.WEB_CONCURRENCY > 1:
+            raise ValueError(
+                f"{', '.join(enabled)} only work with one worker process; set WEB_CONCURRENCY=1 or turn them off"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def _logins_name_tenant_files(self) -> "Settings":
+        logins = [*self.TENANT_USERS, *([self.ADMIN_USERNAME] if self.MULTI_TENANT else [])]
+        invalid = [login for login in logins if not TENANT_NAME.match(login)]
+        if invalid:
+            raise ValueError(
+                f"Logins {', '.join(map(repr, invalid))} can't name a tenant database; "
+                "use up to 64 letters, digits, '_' or '-'"
+            )
+        return self
+
 settings = Settings()
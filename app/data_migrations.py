@@ -0,0 +1,218 @@
+"""Helpers for data migrations inside Alembic revisions.
+
+Row-by-row ``UPDATE ... WHERE id = :id`` loops cost one round trip per row and
+hold the write lock for the whole migration. ``batched_update`` instead reads
+the table in keyset-ordered chunks, writes each chunk with a single
+``executemany`` and commits per chunk, recording the last processed key so an
+interrupted migration picks up where it stopped.
+
+Usage from a revision::
+
+    from app.data_migrations import batched_update
+
+    def upgrade() -> None:
+        batched_update(
+            op.get_context(),
+            "employees",
+            read_columns=["notes"],
+            write_columns=["notes_temp"],
+            transform=lambda row: {"notes_temp": ...},
+            name="be1122f3f5e1_notes_upgrade",
+        )
+"""
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import sqlalchemy as sa
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy.engine import Connection, Row
+
+logger = logging.getLogger("alembic.runtime.data_migration")
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Bookkeeping table for resumable migrations. It lives outside the ORM metadata
+# (see ``include_name`` in alembic/env.py) and only ever holds rows for
+# migrations that were interrupted.
+PROGRESS_TABLE = "data_migration_progress"
+
+
+@dataclass
+class MigrationStats:
+    name: str
+    rows: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else float(self.rows)
+
+
+def iter_chunks(
+    bind: Connection,
+    table: str,
+    columns: Sequence[str],
+    *,
+    key: str = "id",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    start_after: Any = None,
+) -> Iterator[List[Row]]:
+    """Yield rows of ``table`` in ``key`` order, ``batch_size`` rows at a time.
+
+    Each chunk is fetched with ``WHERE key > :last ORDER BY key LIMIT :n`` so
+    every read is an index range scan, no matter how deep into the table we are.
+    The first column of every row is the key.
+    """
+    select_list = ", ".join([key, *columns])
+    first = sa.text(f"SELECT {select_list} FROM {table} ORDER BY {key} LIMIT :limit")
+    following = sa.text(f"SELECT {select_list} FROM {table} WHERE {key} > :last ORDER BY {key} LIMIT :limit")
+
+    last = start_after
+    while True:
+        if last is None:
+            rows = bind.execute(first, {"limit": batch_size}).fetchall()
+        else:
+            rows = bind.execute(following, {"last": last, "limit": batch_size}).fetchall()
+        if not rows:
+            return
+        yield list(rows)
+        if len(rows) < batch_size:
+            return
+        last = rows[-1][0]
+
+
+def batched_update(
+    context: MigrationContext,
+    table: str,
+    *,
+    read_columns: Sequence[str],
+    write_columns: Sequence[str],
+    transform: Callable[[Row], Dict[str, Any]],
+    key: str = "id",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    name: Optional[str] = None,
+) -> MigrationStats:
+    """Rewrite ``write_columns`` of every row in ``table`` from ``transform(row)``.
+
+    ``transform`` receives the row (key first, then ``read_columns``) and
+    returns a mapping with a value for each of ``write_columns``.
+
+    Runs inside an Alembic autocommit block: anything the revision did before
+    (e.g. adding the target column) is committed first, then every chunk is its
+    own short transaction. When ``name`` is given, progress is committed
+    together with each chunk, so re-running the migration after a crash resumes
+    after the last committed key instead of starting over.
+    """
+    with context.autocommit_block():
+        assert context.connection is not None
+        return _batched_update(
+            context.connection,
+            table,
+            read_columns=read_columns,
+            write_columns=write_columns,
+            transform=transform,
+            key=key,
+            batch_size=batch_size,
+            name=name,
+        )
+
+
+def _batched_update(
+    bind: Connection,
+    table: str,
+    *,
+    read_columns: Sequence[str],
+    write_columns: Sequence[str],
+    transform: Callable[[Row], Dict[str, Any]],
+    key: str,
+    batch_size: int,
+    name: Optional[str],
+) -> MigrationStats:
+    stats = MigrationStats(name=name or f"{table}.{','.join(write_columns)}")
+    assignments = ", ".join(f"{col} = :{col}" for col in write_columns)
+    update = sa.text(f"UPDATE {table} SET {assignments} WHERE {key} = :_key")
+
+    if name:
+        _ensure_progress_table(bind)
+    start_after = _load_progress(bind, name) if name else None
+    if start_after is not None:
+        logger.info("%s: resuming after %s=%s", stats.name, key, start_after)
+
+    started = time.perf_counter()
+    for chunk in iter_chunks(bind, table, read_columns, key=key, batch_size=batch_size, start_after=start_after):
+        params = []
+        for row in chunk:
+            values = transform(row)
+            values["_key"] = row[0]
+            params.append(values)
+
+        stats.rows += len(chunk)
+        stats.chunks += 1
+        with _chunk_transaction(bind):
+            bind.execute(update, params)
+            if name:
+                _save_progress(bind, name, chunk[-1][0], stats.rows)
+
+        stats.seconds = time.perf_counter() - started
+        logger.info(
+            "%s: %d rows in %d chunks (%.0f rows/s)", stats.name, stats.rows, stats.chunks, stats.rows_per_second
+        )
+
+    stats.seconds = time.perf_counter() - started
+    if name:
+        _clear_progress(bind, name)
+    return stats
+
+
+@contextmanager
+def _chunk_transaction(bind: Connection) -> Iterator[None]:
+    # The connection is in AUTOCOMMIT mode here, where SQLAlchemy's own begin()
+    # is a no-op; without an explicit transaction every row of the
+    # executemany would be committed (and fsynced) on its own.
+    bind.exec_driver_sql("BEGIN")
+    try:
+        yield
+    except BaseException:
+        bind.exec_driver_sql("ROLLBACK")
+        raise
+    bind.exec_driver_sql("COMMIT")
+
+
+def _ensure_progress_table(bind: Connection) -> None:
+    bind.execute(
+        sa.text(
+            f"CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} ("
+            "name VARCHAR PRIMARY KEY, last_key VARCHAR NOT NULL, rows_done INTEGER NOT NULL)"
+        )
+    )
+
+
+def _load_progress(bind: Connection, name: str) -> Any:
+    row = bind.execute(
+        sa.text(f"SELECT last_key FROM {PROGRESS_TABLE} WHERE name = :name"), {"name": name}
+    ).first()
+    if row is None:
+        return None
+    # Keys are stored as text; integer primary keys must compare numerically.
+    return int(row[0]) if row[0].lstrip("-").isdigit() else row[0]
+
+
+def _save_progress(bind: Connection, name: str, last_key: Any, rows_done: int) -> None:
+    params = {"name": name, "last_key": str(last_key), "rows_done": rows_done}
+    updated = bind.execute(
+        sa.text(f"UPDATE {PROGRESS_TABLE} SET last_key = :last_key, rows_done = :rows_done WHERE name = :name"),
+        params,
+    )
+    if not updated.rowcount:
+        bind.execute(
+            sa.text(f"INSERT INTO {PROGRESS_TABLE} (name, last_key, rows_done) VALUES (:name, :last_key, :rows_done)"),
+            params,
+        )
+
+
+def _clear_progress(bind: Connection, name: str) -> None:
+    bind.execute(sa.text(f"DELETE FROM {PROGRESS_TABLE} WHERE name = :name"), {"name": name})
@@ -1,6 +1,10 @@
+from typing import AsyncIterator, ClassVar
+
+from sqlalchemy import Table
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.config import settings
+from app.tenancy import EngineCache, current_tenant, tenant_files
 
 engine = create_async_engine(
     settings.DATABASE_URL,
@@ -16,13 +20,34 @@ SessionLocal = async_sessionmaker(
 )
 
 class Base(DeclarativeBase):
-    pass
+    # Every model maps a plain table; services build Core statements on Model.__table__
+    __table__: ClassVar[Table]
+
+# Per-tenant engines when MULTI_TENANT is on (app/tenancy.py)
+tenant_engines = EngineCache(
+    Base.metadata,
+    max_engines=settings.TENANT_ENGINE_CACHE_SIZE,
+    idle_seconds=settings.TENANT_ENGINE_IDLE_SECONDS,
+)
 
 async def get_db():
-    async with SessionLocal() as session:
+    tenant = current_tenant.get()
+    session_factory = SessionLocal if tenant is None else await tenant_engines.sessionmaker(tenant)
+    async with session_factory() as session:
         try:
             yield session
         finally:
             await session.close()
 
+async def get_shared_db():
+    # App-wide tables (feedback) stay in DATABASE_URL whatever the tenant
+    async with SessionLocal() as session:
+        yield session
 
+async def every_database() -> AsyncIterator[async_sessionmaker]:
+    """The main database, then with MULTI_TENANT every tenant file, open or not (for background passes)."""
+    yield SessionLocal
+    if settings.MULTI_TENANT:
+        for path in tenant_files():
+            async with tenant_engines.borrowed(path.stem) as sessionmaker:
+                yield sessionmaker
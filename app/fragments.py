@@ -0,0 +1,86 @@
+"""Cache of rendered HTML fragments (employee cards, project rows, goal items).
+
+Each fragment is stored under its tenant, template and entity, together with the
+change-counter versions (see ``app.versioning``) it was rendered at. A lookup
+whose versions still match returns the stored HTML; otherwise the fragment is
+re-rendered and replaces the old entry, so list pages only re-render the rows
+that actually changed.
+
+The versions are per process, so ``FRAGMENT_CACHE_ENABLED`` is off by default
+and refused with more than one worker.
+"""
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from jinja2 import pass_context
+from jinja2.runtime import Context
+from markupsafe import Markup
+
+from app.config import settings
+from app.tenancy import current_tenant
+from app.versioning import Dependency, tracker
+
+# (tenant, template, entity): row ids repeat across tenant databases
+CacheKey = Tuple[Optional[str], str, Dependency]
+Stamp = Tuple[str, ...]
+
+
+class FragmentCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[Stamp, Markup]]" = OrderedDict()
+
+    def get(self, key: CacheKey, stamp: Stamp) -> Optional[Markup]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != stamp:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: CacheKey, stamp: Stamp, html: Markup) -> None:
+        self._entries[key] = (stamp, html)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+fragment_cache = FragmentCache(settings.FRAGMENT_CACHE_SIZE)
+
+
+@pass_context
+def cached_fragment(
+    page: Context, template_name: str, entity: Dependency, *depends: Dependency, **context: Any
+) -> Markup:
+    """Render ``template_name`` for ``entity``, reusing the last rendering while nothing it shows changed.
+
+    ``entity`` is the ``(table, id)`` the fragment is about; ``depends`` lists
+    any further tables or rows whose data it displays (e.g. project names on an
+    employee card). Used from templates as
+    ``{{ cached_fragment("employees/_card.html", ("employees", employee.id), "projects", employee=employee) }}``.
+
+    The page must pass ``versions_as_of=tracker.sequence``, read *before* its
+    queries ran: if anything was committed since then, the rows it loaded may
+    be older than the current versions, so the rendering is not stored.
+    """
+    template = page.environment.get_template(template_name)
+    if not settings.FRAGMENT_CACHE_ENABLED:
+        return Markup(template.render(context))
+
+    key = (current_tenant.get(), template_name, entity)
+    stamp = tuple(tracker.version(dep) for dep in (entity, *depends))
+    html = fragment_cache.get(key, stamp)
+    if html is None:
+        html = Markup(template.render(context))
+        if page.get("versions_as_of") == tracker.sequence:
+            fragment_cache.put(key, stamp, html)
+    return html
@@ -1,132 +1,164 @@
-from fastapi import FastAPI, Request, Depends, status, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI, Request, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import HTMLResponse
 from pathlib import Path
-import aiofiles
+import logging
 from sqlalchemy import select
 from contextlib import asynccontextmanager
 
 from app.auth import router as auth_router, get_current_user
-from app.routers import employees, projects, goals
+from app.routers import api, employees, projects, goals, feedback, health, capacity, audit, skills
+from app.routers.feedback import feedback_writer
 from app.config import settings
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal, engine, Base, every_database, get_db, tenant_engines
 from app.models import Employee
+from app.query_budget import query_budget
+from app.services import counters, suggestions
+from app.services.audit import audit_writer
+from app.assets import PrecompressedStaticFiles, check_bundle
+from app.templating import templates, precompile_templates
+from app.middleware import AuthMiddleware, CSRFMiddleware, MetricsMiddleware, ServerTimingMiddleware
+from app.metrics import instrument_ai_tasks, instrument_pool
+from app.startup import (
+    StartupProfile, configure_logging, schema_is_current, seed_marker_exists, write_seed_marker,
+)
+
+logger = logging.getLogger(__name__)
+
+counter_reconciler = counters.Reconciler(every_database, settings.COUNTERS_RECONCILE_INTERVAL)
+suggestion_warmer = suggestions.Warmer(
+    every_database,
+    settings.SUGGESTIONS_WARMUP_INTERVAL,
+    settings.SUGGESTIONS_WARMUP_CONCURRENCY,
+    (settings.SUGGESTIONS_OFF_HOURS_START, settings.SUGGESTIONS_OFF_HOURS_END),
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    # Create tables if they don't exist
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-    if settings.ENVIRONMENT != "production":
-        async with SessionLocal() as session:
-            # Check if seeded data exists (check for one of them)
-            result = await session.execute(select(Employee).filter_by(email="p1@example.com"))
-            existing_user = result.scalar_one_or_none()
-            
-            if not existing_user:
-                employees_to_seed = [
-                    Employee(
-                        name="Alice Strategy",
-                        role="Senior Architect",
-                        email="p1@example.com",
-                        skills=["System Design", "Leadership", "Cloud Architecture"],
-                        notes="High performer, very ambitious.",
-                        potential="P1",
-                        development_plan="Prepare for CTO role."
-                    ),
-                    Employee(
-                        name="Bob Learner",
-                        role="Junior Dev",
-                        email="p2@example.com",
-                        skills=["Python", "Basic SQL"],
-                        notes="Eager to learn but lacks experience.",
-                        potential="P2",
-                        development_plan="Complete advanced Python course."
-                    ),
-                    Employee(
-                        name="Charlie Steady",
-                        role="Senior Dev",
-                        email="p3@example.com",
-                        skills=["Java", "Spring Boot", "Legacy Systems"],
-                        notes="Reliable, does the job well, no desire for promotion.",
-                        potential="P3",
-                        development_plan="Maintain current performance."
-                    ),
-                    Employee(
-                        name="David Drift",
-                        role="Support Engineer",
-                        email="p4@example.com",
-                        skills=["Basic Troubleshooting"],
-                        notes="Struggling with tasks, low motivation.",
-                        potential="P4",
-                        development_plan="Performance improvement plan."
-                    )
-                ]
-                session.add_all(employees_to_seed)
-                await session.commit()
-                print("Seeded P1-P4 employees.")
-    
+    configure_logging(settings.LOG_LEVEL)
+    profile = StartupProfile()
+    fast = settings.STARTUP_MODE == "fast"
+
+    with profile.phase("schema"):
+        async with engine.begin() as conn:
+            if not (fast and await schema_is_current(conn)):
+                if fast:
+                    logger.warning("Database is not at the Alembic head; falling back to create_all")
+                # Create tables if they don't exist
+                await conn.run_sync(Base.metadata.create_all)
+
+    with profile.phase("seed"):
+        if settings.ENVIRONMENT != "production" and not (fast and seed_marker_exists(settings.SEED_MARKER_PATH)):
+            await seed_employees()
+            if fast:
+                write_seed_marker(settings.SEED_MARKER_PATH)
+
+    with profile.phase("templates"):
+        precompile_templates()
+        check_bundle(settings.ENVIRONMENT)
+
+    app.state.startup_profile = profile
+    logger.info(profile.report())
+
+    feedback_writer.start()
+    audit_writer.start()
+    if settings.MULTI_TENANT:
+        tenant_engines.start()
+    counter_reconciler.start()
+    if settings.SUGGESTIONS_WARMUP_ENABLED:
+        suggestion_warmer.start()
+
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    await counter_reconciler.close()
+    await suggestion_warmer.close()
+    await feedback_writer.close()
+    # Before the tenant engines go: queued entries may be bound for tenant databases
+    await audit_writer.close()
+    await tenant_engines.close()
+
+async def seed_employees():
+    async with SessionLocal() as session:
+        # Check if seeded data exists (check for one of them)
+        result = await session.execute(select(Employee).filter_by(email="p1@example.com"))
+        existing_user = result.scalar_one_or_none()
+        
+        if not existing_user:
+            employees_to_seed = [
+                Employee(
+                    name="Alice Strategy",
+                    role="Senior Architect",
+                    email="p1@example.com",
+                    skills=["System Design", "Leadership", "Cloud Architecture"],
+                    notes="High performer, very ambitious.",
+                    potential="P1",
+                    development_plan="Prepare for CTO role."
+                ),
+                Employee(
+                    name="Bob Learner",
+                    role="Junior Dev",
+                    email="p2@example.com",
+                    skills=["Python", "Basic SQL"],
+                    notes="Eager to learn but lacks experience.",
+                    potential="P2",
+                    development_plan="Complete advanced Python course."
+                ),
+                Employee(
+                    name="Charlie Steady",
+                    role="Senior Dev",
+                    email="p3@example.com",
+                    skills=["Java", "Spring Boot", "Legacy Systems"],
+                    notes="Reliable, does the job well, no desire for promotion.",
+                    potential="P3",
+                    development_plan="Maintain current performance."
+                ),
+                Employee(
+                    name="David Drift",
+                    role="Support Engineer",
+                    email="p4@example.com",
+                    skills=["Basic Troubleshooting"],
+                    notes="Struggling with tasks, low motivation.",
+                    potential="P4",
+                    development_plan="Performance improvement plan."
+                )
+            ]
+            session.add_all(employees_to_seed)
+            await session.commit()
+            print("Seeded P1-P4 employees.")
 
 app = FastAPI(title="LeaderAI", lifespan=lifespan)
 
 # Mount static files
 static_path = Path(__file__).parent / "static"
-app.mount("/static", StaticFiles(directory=static_path), name="static")
-
-# Templates
-templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
+app.mount("/static", PrecompressedStaticFiles(directory=static_path), name="static")
 
 # Include Routers
 app.include_router(auth_router)
 app.include_router(employees.router)
 app.include_router(projects.router)
 app.include_router(goals.router)
+app.include_router(capacity.router)
+app.include_router(audit.router)
+app.include_router(skills.router)
+app.include_router(feedback.router)
+app.include_router(health.router)
+app.include_router(api.router)
 
-@app.middleware("http")
-async def auth_middleware(request: Request, call_next):
-    # Allow public paths
-    public_paths = ["/login", "/static", "/docs", "/openapi.json"]
-    if any(request.url.path.startswith(path) for path in public_paths):
-        return await call_next(request)
-    
-    # Check for session cookie
-    user = request.cookies.get("session_user")
-    if not user:
-        return RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
-    
-    response = await call_next(request)
-    return response
-
-@app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request, user: str = Depends(get_current_user)):
-    return templates.TemplateResponse(
-        request=request, name="index.html", context={"title": "LeaderAI", "user": user}
-    )
+# Middleware (the last one added runs first)
+app.add_middleware(AuthMiddleware)
+app.add_middleware(CSRFMiddleware)
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+instrument_pool(engine)
+instrument_ai_tasks(goals.tasks)
 
-@app.get("/feedback", response_class=HTMLResponse)
-async def feedback_form(request: Request, user: str = Depends(get_current_user)):
-    return templates.TemplateResponse(request=request, name="feedback.html", context={"user": user})
-
-@app.post("/feedback", response_class=HTMLResponse)
-async def submit_feedback(
-    request: Request, 
-    feedback: str = Form(...),
-    user: str = Depends(get_current_user)
-):
-    # Simple file append logging for MVP
-    async with aiofiles.open("feedback.log", mode="a") as f:
-        await f.write(f"User: {user} | Feedback: {feedback}\n")
-    
+@app.get("/", response_class=HTMLResponse, dependencies=[query_budget(1)])
+async def read_root(request: Request, db: AsyncSession = Depends(get_db), user: str = Depends(get_current_user)):
     return templates.TemplateResponse(
         request=request,
-        name="feedback.html",
-        context={
-            "user": user,
-            "message": "Thank you for your feedback!",
-        },
+        name="index.html",
+        context={"title": "LeaderAI", "user": user, "counters": await counters.read(db)},
     )
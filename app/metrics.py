@@ -0,0 +1,303 @@
+"""Process metrics in the Prometheus text exposition format, served at ``/metrics``.
+
+A deliberately small implementation (counters, gauges and histograms with
+labels) so the app doesn't need ``prometheus_client``. Values are per process:
+with several workers, scrape each one or aggregate in Prometheus.
+
+Collected:
+
+- HTTP requests by route template, method and status, with latency histograms
+  and an in-flight gauge (``MetricsMiddleware`` in ``app.middleware``),
+- connection pool waits, hold times and usage of the main engine and the
+  tenant engines (``database`` label ``main`` or ``tenant``, tenants summed),
+- AI goal-generation tasks by status and the age of the oldest pending one,
+- LLM call latency by provider and operation.
+"""
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import Pool, QueuePool
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, float, Tuple[str, ...]]]:
+        """Yield ``(suffix, label values, value, extra label names)`` tuples."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, values, value, extra in self.samples():
+            names = (*self.label_names, *extra)
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = defaultdict(float)
+        if not self.label_names:
+            # Expose unlabelled series as 0 from the start rather than omitting them
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._values[tuple(labels[name] for name in self.label_names)] += amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(labels[name] for name in self.label_names), 0.0)
+
+    def samples(self):
+        for values, value in self._values.items():
+            yield "_total", values, value, ()
+
+
+class Gauge(Metric):
+    """A gauge that is either set directly or computed by ``callback`` at scrape time."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = defaultdict(float)
+        if not self.label_names:
+            self._values[()] = 0.0
+        self.callback = callback
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._values[tuple(labels[name] for name in self.label_names)] += amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[tuple(labels[name] for name in self.label_names)] = value
+
+    def samples(self):
+        values = self.callback() if self.callback is not None else self._values
+        for label_values, value in values.items():
+            yield "", label_values, value, ()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: (count per bucket, sum, count)
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.label_names)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> float:
+        series = self._values.get(tuple(labels[name] for name in self.label_names))
+        return series[-1] if series else 0.0
+
+    def samples(self):
+        for values, series in self._values.items():
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield "_bucket", (*values, "+Inf" if math.isinf(bound) else repr(bound)), cumulative, ("le",)
+            yield "_sum", values, series[-2], ()
+            yield "_count", values, series[-1], ()
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "leaderai_http_requests", "HTTP requests handled.", ["method", "route", "status"]
+))
+http_request_duration = registry.register(Histogram(
+    "leaderai_http_request_duration_seconds", "Time to handle an HTTP request.", ["method", "route"]
+))
+http_requests_in_flight = registry.register(Gauge(
+    "leaderai_http_requests_in_flight", "HTTP requests currently being handled."
+))
+db_pool_checkouts = registry.register(Counter(
+    "leaderai_db_pool_checkouts", "Connections checked out of the pool.", ["database"]
+))
+db_pool_wait_duration = registry.register(Histogram(
+    "leaderai_db_pool_wait_duration_seconds",
+    "Time from asking the pool for a connection to getting one; grows when the pool is exhausted.",
+    ["database"],
+))
+db_connection_hold_duration = registry.register(Histogram(
+    "leaderai_db_connection_hold_duration_seconds",
+    "How long connections were held before returning to the pool.",
+    ["database"],
+))
+llm_request_duration = registry.register(Histogram(
+    "leaderai_llm_request_duration_seconds", "LLM API call latency.", ["provider", "operation"], buckets=LLM_BUCKETS
+))
+
+
+# Engines whose pools feed leaderai_db_pool_connections, with their "database" label
+_pooled_engines: Dict[Engine, str] = {}
+
+
+def _pool_usage() -> Dict[LabelValues, float]:
+    stats: Dict[LabelValues, float] = {}
+    for sync_engine, database in list(_pooled_engines.items()):
+        pool = sync_engine.pool
+        # Static and null pools (e.g. in-memory SQLite) have nothing to report
+        if not isinstance(pool, QueuePool):
+            continue
+        usage = {
+            "checked_out": pool.checkedout(),
+            "size": pool.size(),
+            # Queue pools allow max_overflow connections beyond size before callers wait
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": getattr(pool, "_max_overflow", 0),
+        }
+        for state, value in usage.items():
+            stats[(database, state)] = stats.get((database, state), 0.0) + float(value)
+    return stats
+
+
+registry.register(Gauge(
+    "leaderai_db_pool_connections", "Connection pool usage by state.", ["database", "state"], callback=_pool_usage
+))
+
+
+def _time_waits(pool: Pool, database: str) -> None:
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            db_pool_wait_duration.observe(time.perf_counter() - started, database=database)
+
+    pool.connect = timed_connect  # type: ignore[method-assign]
+
+
+def instrument_pool(engine: AsyncEngine, database: str = "main") -> None:
+    """Time pool waits and connection hold times, and expose the pool's current usage."""
+    sync_engine = engine.sync_engine
+    pool = sync_engine.pool
+    _pooled_engines[sync_engine] = database
+    _time_waits(pool, database)
+
+    # Pool events carry over when dispose() replaces the pool; the wrapped connect() does not
+    @event.listens_for(sync_engine, "engine_disposed")
+    def _disposed(disposed: Engine) -> None:
+        _time_waits(disposed.pool, database)
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.inc(database=database)
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            db_connection_hold_duration.observe(time.perf_counter() - started, database=database)
+
+
+def forget_pool(engine: AsyncEngine) -> None:
+    """Stop reporting the usage of ``engine``'s pool (a closed tenant engine)."""
+    _pooled_engines.pop(engine.sync_engine, None)
+
+
+def instrument_ai_tasks(tasks: Dict[str, dict]) -> None:
+    """Expose the in-memory AI task store (``app.routers.goals.tasks``)."""
+
+    def by_status() -> Dict[LabelValues, float]:
+        counts: Dict[LabelValues, float] = {("pending",): 0.0, ("completed",): 0.0}
+        for task in list(tasks.values()):
+            counts[(task["status"],)] = counts.get((task["status"],), 0.0) + 1
+        return counts
+
+    def oldest_pending() -> Dict[LabelValues, float]:
+        now = time.time()
+        ages = [now - task.get("created_at", now) for task in list(tasks.values()) if task["status"] == "pending"]
+        return {(): max(ages, default=0.0)}
+
+    registry.register(Gauge(
+        "leaderai_ai_tasks", "AI goal-generation tasks by status.", ["status"], callback=by_status
+    ))
+    registry.register(Gauge(
+        "leaderai_ai_task_oldest_pending_age_seconds", "Age of the oldest pending AI task.", callback=oldest_pending
+    ))
@@ -1,8 +1,8 @@
 from typing import List, Optional, Any
-from sqlalchemy import String, Text, JSON, ForeignKey, DateTime
+from sqlalchemy import BigInteger, String, Text, JSON, ForeignKey, DateTime, Date, Index, LargeBinary, insert_sentinel
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
-from datetime import datetime
+from datetime import date, datetime
 from app.database import Base
 
 class Employee(Base):
@@ -18,16 +18,51 @@ class Employee(Base):
     potential: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
+    # Direct manager; the full reporting chain lives in employee_closure (app/services/hierarchy.py)
+    manager_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("employees.id", name="fk_employees_manager_id"), nullable=True, index=True
+    )
 
     assignments: Mapped[List["ProjectAssignment"]] = relationship(back_populates="employee")
     goals: Mapped[List["Goal"]] = relationship(back_populates="employee")
+    manager: Mapped[Optional["Employee"]] = relationship(remote_side=[id], back_populates="reports")
+    # Deleting a manager moves their reports up a level (app/services/hierarchy.py), not to NULL
+    reports: Mapped[List["Employee"]] = relationship(back_populates="manager", passive_deletes="all")
+
+class EmployeeClosure(Base):
+    """One row per (manager, report) pair at any distance, plus a depth-0 row per employee."""
+    __tablename__ = "employee_closure"
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("employees.id"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("employees.id"), primary_key=True)
+    depth: Mapped[int] = mapped_column()
+
+    # The primary key serves "everyone under X"; this serves "everyone above X"
+    __table_args__ = (Index("ix_employee_closure_descendant", "descendant_id", "depth"),)
+
+class Skill(Base):
+    """One canonical skill; ``key`` is its case-folded, alias-resolved name (app/services/skills.py)."""
+    __tablename__ = "skills"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String)
+    key: Mapped[str] = mapped_column(String, unique=True)
+
+class EmployeeSkill(Base):
+    """Who has which skill, derived from ``Employee.skills``."""
+    __tablename__ = "employee_skills"
+
+    # Skill first: the primary key serves "who knows X"; the index serves rewriting one employee's skills
+    skill_id: Mapped[int] = mapped_column(ForeignKey("skills.id"), primary_key=True)
+    employee_id: Mapped[int] = mapped_column(ForeignKey("employees.id"), primary_key=True, index=True)
 
 class Project(Base):
     __tablename__ = "projects"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, index=True)
-    status: Mapped[str] = mapped_column(String, default="Active")
+    # active_history: team counters (app/services/counters.py) need the old value
+    status: Mapped[str] = mapped_column(String, default="Active", active_history=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     stakeholders: Mapped[List[Any]] = mapped_column(JSON, default=list)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -39,11 +74,16 @@ class ProjectAssignment(Base):
     __tablename__ = "project_assignments"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    employee_id: Mapped[int] = mapped_column(ForeignKey("employees.id"))
+    # Indexed for org-wide rollups, which join this table to employee_closure
+    employee_id: Mapped[int] = mapped_column(ForeignKey("employees.id"), index=True, active_history=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"))
     role: Mapped[str] = mapped_column(String)
-    capacity: Mapped[int] = mapped_column(default=100)
+    capacity: Mapped[int] = mapped_column(default=100, active_history=True)
     
+    # Lets a flush of many new rows be one multi-row INSERT .. RETURNING: SQLite does not promise the
+    # order of RETURNING rows, so SQLAlchemy matches ids to objects through this client-filled column
+    _sentinel = insert_sentinel()
+
     employee: Mapped["Employee"] = relationship(back_populates="assignments")
     project: Mapped["Project"] = relationship(back_populates="assignments")
 
@@ -53,16 +93,110 @@ class Goal(Base):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String)
     description: Mapped[str] = mapped_column(Text)
-    status: Mapped[str] = mapped_column(String, default="Pending")
+    # active_history: the status log (app/services/goal_history.py) needs the old value even if unloaded
+    status: Mapped[str] = mapped_column(String, default="Pending", active_history=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     due_date: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     success_metrics: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     manager_support: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
-    employee_id: Mapped[Optional[int]] = mapped_column(ForeignKey("employees.id"), nullable=True)
+    employee_id: Mapped[Optional[int]] = mapped_column(ForeignKey("employees.id"), nullable=True, index=True)
     project_id: Mapped[Optional[int]] = mapped_column(ForeignKey("projects.id"), nullable=True)
     
     ai_suggestions: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # See ProjectAssignment._sentinel
+    _sentinel = insert_sentinel()
     
     employee: Mapped[Optional["Employee"]] = relationship(back_populates="goals")
     project: Mapped[Optional["Project"]] = relationship(back_populates="goals")
+
+class GoalStatusChange(Base):
+    """Append-only log of goal status transitions; ``from_status`` is NULL when the goal was created."""
+    __tablename__ = "goal_status_changes"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # No foreign keys: history outlives the goal and records who owned it at the time
+    goal_id: Mapped[int] = mapped_column(index=True)
+    employee_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    project_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    from_status: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    to_status: Mapped[str] = mapped_column(String)
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    # Time since the goal was created, so cycle times roll up without a self-join
+    age_seconds: Mapped[int] = mapped_column(default=0)
+
+class GoalSignature(Base):
+    """MinHash signature of a goal's title and description (app/services/goal_duplicates.py)."""
+    __tablename__ = "goal_signatures"
+
+    goal_id: Mapped[int] = mapped_column(primary_key=True)
+    signature: Mapped[bytes] = mapped_column(LargeBinary)
+
+class GoalBucket(Base):
+    """LSH bucket of one band of a goal's signature; goals sharing a bucket are duplicate candidates."""
+    __tablename__ = "goal_buckets"
+
+    band: Mapped[int] = mapped_column(primary_key=True)
+    bucket: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    goal_id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+class GoalSuggestion(Base):
+    """An AI goal suggestion prepared ahead of time for one employee (app/services/suggestions.py)."""
+    __tablename__ = "goal_suggestions"
+
+    # No foreign key: rows of deleted employees are cleared by the next warm-up pass
+    employee_id: Mapped[int] = mapped_column(primary_key=True)
+    # Hash of the context the suggestion was generated from; a mismatch means it is stale
+    fingerprint: Mapped[str] = mapped_column(String)
+    suggestion: Mapped[dict] = mapped_column(JSON)
+    generated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+class GoalStatusDaily(Base):
+    """Transitions per day and status, for everyone (scope "all", id 0), one employee or one project."""
+    __tablename__ = "goal_status_daily"
+
+    scope: Mapped[str] = mapped_column(String, primary_key=True)
+    scope_id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[str] = mapped_column(String, primary_key=True)
+    entered: Mapped[int] = mapped_column(default=0)
+    exited: Mapped[int] = mapped_column(default=0)
+    # Sum of age_seconds over the transitions that entered the status
+    age_seconds: Mapped[int] = mapped_column(default=0)
+
+class TeamCounters(Base):
+    """The dashboard's numbers, as a single row (id 1) kept current by app/services/counters.py."""
+    __tablename__ = "team_counters"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    employees: Mapped[int] = mapped_column(default=0)
+    active_projects: Mapped[int] = mapped_column(default=0)
+    pending_goals: Mapped[int] = mapped_column(default=0)
+    blocked_goals: Mapped[int] = mapped_column(default=0)
+    over_allocated: Mapped[int] = mapped_column(default=0)
+    reconciled_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+class AuditEntry(Base):
+    """One committed create, update or delete; ``changes`` maps each changed field to ``[old, new]``."""
+    __tablename__ = "audit_log"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    entity: Mapped[str] = mapped_column(String)
+    entity_id: Mapped[int] = mapped_column()
+    action: Mapped[str] = mapped_column(String)
+    changes: Mapped[dict] = mapped_column(JSON, default=dict)
+    user: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    # Serves one entity's history, newest first, paged by id
+    __table_args__ = (Index("ix_audit_log_entity", "entity", "entity_id", "id"),)
+
+class Feedback(Base):
+    __tablename__ = "feedback"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user: Mapped[str] = mapped_column(String)
+    message: Mapped[str] = mapped_column(Text)
+    # Filled in at submission time; rows reach the table in delayed batches
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
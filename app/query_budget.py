@@ -0,0 +1,85 @@
+"""Per-route limits on the number of SQL statements a request may run.
+
+Routes declare how many statements they are expected to need::
+
+    @router.get("/{employee_id}", dependencies=[query_budget(3)])
+
+The budget is a fixed number, not a function of the data: a page that loads
+its relationships eagerly runs the same queries for 2 employees as for 2000,
+while a missing ``selectinload`` turns into one query per row (or a
+``MissingGreenlet`` error under asyncio). ``QUERY_BUDGET_MODE`` decides what
+happens when a request goes over its budget: ``"warn"`` logs it, ``"raise"``
+(used by the test suite) fails the request with ``QueryBudgetExceeded`` and
+``"off"`` skips counting.
+"""
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, route: str, budget: int, statements: List[str]):
+        self.route = route
+        self.budget = budget
+        self.statements = statements
+        listing = "\n".join(f"  {i}. {sql}" for i, sql in enumerate(statements, 1))
+        super().__init__(f"{route} ran {len(statements)} SQL statements, budget is {budget}:\n{listing}")
+
+
+class QueryLog:
+    def __init__(self, parent: Optional["QueryLog"] = None):
+        self.statements: List[str] = []
+        # An enclosing log (e.g. one a test wraps around the request) sees the statements too
+        self.parent = parent
+
+
+_current: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+# "METHOD /route/{template}" -> budget, for every route that has enforced one so far.
+route_budgets: Dict[str, int] = {}
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _log_statement(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+    log = _current.get()
+    if log is None:
+        return
+    statement = " ".join(statement.split())
+    while log is not None:
+        log.statements.append(statement)
+        log = log.parent
+
+
+def query_budget(budget: int) -> Any:
+    """Route dependency enforcing ``budget`` SQL statements for the request."""
+
+    async def enforce(request: Request):
+        if settings.QUERY_BUDGET_MODE == "off":
+            yield
+            return
+
+        route = f'{request.method} {getattr(request.scope.get("route"), "path", request.url.path)}'
+        route_budgets[route] = budget
+        log = QueryLog(parent=_current.get())
+        token = _current.set(log)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+        if len(log.statements) > budget:
+            error = QueryBudgetExceeded(route, budget, log.statements)
+            if settings.QUERY_BUDGET_MODE == "raise":
+                raise error
+            logger.warning("%s", error)
+
+    # scope="function" runs the check before the response is sent, so "raise" can still fail it
+    return Depends(enforce, scope="function")
@@ -0,0 +1,232 @@
+"""Read-only JSON API under ``/api/v1`` for integrations that sync LeaderAI data.
+
+Each resource is served as a list and by id. Responses are built from the
+selected columns only (a Core ``select`` of the table, no ORM objects) and
+encoded with orjson:
+
+* ``?fields=id,name`` limits the columns read and returned; ``id`` is always
+  included;
+* lists are keyset-paginated: ``?limit=`` rows (default ``PAGE_SIZE``, at
+  most ``MAX_PAGE_SIZE``) with ids above ``?after=``, plus ``next_after`` to
+  pass for the next page (``null`` on the last one), so every page costs the
+  same however deep the sync is;
+* responses carry the same ETags as the HTML pages, so a sync that finds
+  nothing changed gets a 304 without touching the database.
+
+The API uses the same login session as the pages.
+"""
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
+from sqlalchemy import Column, Table, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_user
+from app.database import get_db
+from app.models import Employee, Goal, Project, ProjectAssignment
+from app.query_budget import query_budget
+from app.versioning import page_etag, not_modified, with_etag
+
+router = APIRouter(prefix="/api/v1", tags=["api"])
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+@dataclass(frozen=True)
+class Resource:
+    table: Table
+    # Fields in output order; the same names as app/schemas.py where a schema exists
+    fields: Tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        return self.table.name
+
+    def columns(self, fields: Optional[str]) -> List[Column]:
+        """The columns behind ``?fields=`` (all of them when absent), ``id`` first."""
+        if not fields:
+            return [self.table.c[name] for name in self.fields]
+        wanted = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(wanted) - set(self.fields))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields for {self.name}: {', '.join(unknown)}; available: {', '.join(self.fields)}",
+            )
+        return [self.table.c.id] + [self.table.c[name] for name in dict.fromkeys(wanted) if name != "id"]
+
+
+EMPLOYEES = Resource(Employee.__table__, (
+    "id", "name", "role", "email", "skills", "development_plan", "notes", "potential", "manager_id",
+    "created_at", "updated_at",
+))
+PROJECTS = Resource(Project.__table__, ("id", "name", "status", "description", "stakeholders", "created_at"))
+ASSIGNMENTS = Resource(ProjectAssignment.__table__, ("id", "employee_id", "project_id", "role", "capacity"))
+GOALS = Resource(Goal.__table__, (
+    "id", "title", "description", "status", "due_date", "success_metrics", "manager_support", "employee_id",
+    "project_id", "ai_suggestions", "created_at",
+))
+
+
+async def list_page(
+    request: Request,
+    user: str,
+    db: AsyncSession,
+    resource: Resource,
+    fields: Optional[str],
+    after: Optional[int],
+    limit: int,
+    **filters: Any,
+) -> Response:
+    columns = resource.columns(fields)
+    etag = page_etag(request, user, resource.name)
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
+    table = resource.table
+    query = select().add_columns(*columns).order_by(table.c.id).limit(limit + 1)
+    if after is not None:
+        query = query.where(table.c.id > after)
+    for name, value in filters.items():
+        if value is not None:
+            query = query.where(table.c[name] == value)
+    rows = [dict(row) for row in (await db.execute(query)).mappings()]
+    return with_etag(FastJSONResponse({
+        "data": rows[:limit],
+        "next_after": rows[limit - 1]["id"] if len(rows) > limit else None,
+    }), etag)
+
+
+async def one(
+    request: Request, user: str, db: AsyncSession, resource: Resource, row_id: int, fields: Optional[str]
+) -> Response:
+    columns = resource.columns(fields)
+    etag = page_etag(request, user, (resource.name, row_id))
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
+    query = select().add_columns(*columns).where(resource.table.c.id == row_id)
+    row = (await db.execute(query)).mappings().one_or_none()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Not found in {resource.name}")
+    return with_etag(FastJSONResponse(dict(row)), etag)
+
+
+Fields = Query(None, description="Comma-separated fields to return")
+After = Query(None, ge=0, description="Return rows with ids above this one")
+Limit = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+
+
+@router.get("/employees", dependencies=[query_budget(1)])
+async def list_employees(
+    request: Request,
+    fields: Optional[str] = Fields,
+    after: Optional[int] = After,
+    limit: int = Limit,
+    manager_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    return await list_page(request, user, db, EMPLOYEES, fields, after, limit, manager_id=manager_id)
+
+
+@router.get("/employees/{employee_id}", dependencies=[query_budget(1)])
+async def get_employee(
+    request: Request,
+    employee_id: int,
+    fields: Optional[str] = Fields,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    return await one(request, user, db, EMPLOYEES, employee_id, fields)
+
+
+@router.get("/projects", dependencies=[query_budget(1)])
+async def list_projects(
+    request: Request,
+    fields: Optional[str] = Fields,
+    after: Optional[int] = After,
+    limit: int = Limit,
+    project_status: Optional[str] = Query(None, alias="status"),
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    return await list_page(request, user, db, PROJECTS, fields, after, limit, status=project_status)
+
+
+@router.get("/projects/{project_id}", dependencies=[query_budget(1)])
+async def get_project(
+    request: Request,
+    project_id: int,
+    fields: Optional[str] = Fields,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    return await one(request, user, db, PROJECTS, project_id, fields)
+
+
+@router.get("/assignments", dependencies=[query_budget(1)])
+async def list_assignments(
+    request: Request,
+    fields: Optional[str] = Fields,
+    after: Optional[int] = After,
+    limit: int = Limit,
+    employee_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    return await list_page(
+        request, user, db, ASSIGNMENTS, fields, after, limit, employee_id=employee_id, project_id=project_id
+    )
+
+
+@router.get("/assignments/{assignment_id}", dependencies=[query_budget(1)])
+async def get_assignment(
+    request: Request,
+    assignment_id: int,
+    fields: Optional[str] = Fields,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    return await one(request, user, db, ASSIGNMENTS, assignment_id, fields)
+
+
+@router.get("/goals", dependencies=[query_budget(1)])
+async def list_goals(
+    request: Request,
+    fields: Optional[str] = Fields,
+    after: Optional[int] = After,
+    limit: int = Limit,
+    employee_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    goal_status: Optional[str] = Query(None, alias="status"),
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    return await list_page(
+        request, user, db, GOALS, fields, after, limit,
+        employee_id=employee_id, project_id=project_id, status=goal_status,
+    )
+
+
+@router.get("/goals/{goal_id}", dependencies=[query_budget(1)])
+async def get_goal(
+    request: Request,
+    goal_id: int,
+    fields: Optional[str] = Fields,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    return await one(request, user, db, GOALS, goal_id, fields)
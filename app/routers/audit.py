@@ -0,0 +1,48 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_user
+from app.database import get_db
+from app.models import AuditEntry
+from app.query_budget import query_budget
+from app.services.audit import ENTITIES
+from app.templating import templates
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+PAGE_SIZE = 50
+
+@router.get("/{entity}/{entity_id}", response_class=HTMLResponse, dependencies=[query_budget(2)])
+async def entity_history(
+    request: Request,
+    entity: str,
+    entity_id: int,
+    before: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    if entity not in ENTITIES:
+        raise HTTPException(status_code=404, detail="Unknown entity")
+
+    # Keyset pagination: pages cost the same however far back they are
+    query = select(AuditEntry).where(AuditEntry.entity == entity, AuditEntry.entity_id == entity_id)
+    if before is not None:
+        query = query.where(AuditEntry.id < before)
+    result = await db.execute(query.order_by(AuditEntry.id.desc()).limit(PAGE_SIZE + 1))
+    entries = result.scalars().all()
+
+    return templates.TemplateResponse(
+        request=request,
+        name="audit/history.html",
+        context={
+            "entity": entity,
+            "entity_id": entity_id,
+            "entries": entries[:PAGE_SIZE],
+            "next_before": entries[PAGE_SIZE - 1].id if len(entries) > PAGE_SIZE else None,
+            "user": user,
+        },
+    )
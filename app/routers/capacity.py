@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_user
+from app.config import settings
+from app.database import get_db
+from app.query_budget import query_budget
+from app.services.capacity import TABLES, capacity_cache
+from app.templating import templates
+from app.versioning import page_etag, not_modified, with_etag
+
+router = APIRouter(prefix="/capacity", tags=["capacity"])
+
+@router.get("", response_class=HTMLResponse, dependencies=[query_budget(1)])
+async def capacity_overview(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    etag = page_etag(request, user, *TABLES)
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
+    report = await capacity_cache.get(db)
+    return with_etag(templates.TemplateResponse(
+        request=request,
+        name="capacity/overview.html",
+        context={
+            "report": report,
+            "under_allocated_limit": settings.CAPACITY_UNDER_ALLOCATED,
+            "user": user
+        }
+    ), etag)
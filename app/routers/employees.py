@@ -1,24 +1,56 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from sqlalchemy.orm import selectinload
-from pathlib import Path
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.database import get_db
-from app.models import Employee, ProjectAssignment
+from app.models import Employee, ProjectAssignment, EmployeeClosure, Goal
 from app.auth import get_current_user
+from app.query_budget import query_budget
+from app.services import counters
+from app.services import skills as skill_index
+from app.services.audit import record_delete
+from app.services.capacity import build_report
+from app.services.hierarchy import HierarchyError, detach_statements, org_members
+from app.templating import templates
+from app.versioning import page_etag, not_modified, with_etag, tracker
 
 router = APIRouter(prefix="/employees", tags=["employees"])
-templates = Jinja2Templates(directory=Path(__file__).parent.parent / "templates")
 
-@router.get("/", response_class=HTMLResponse)
+ORG_PAGE_SIZE = 50
+
+def parse_manager_id(value: str) -> Optional[int]:
+    # The manager <select> posts "" for "no manager"
+    if not value or not value.strip():
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid manager")
+
+async def manager_choices(db: AsyncSession, employee_id: Optional[int] = None):
+    """(id, name) of everyone who can be ``employee_id``'s manager: not the employee or anyone under them."""
+    query = select(Employee.id, Employee.name).order_by(Employee.name)
+    if employee_id is not None:
+        query = query.where(
+            Employee.id.not_in(select(EmployeeClosure.descendant_id).where(EmployeeClosure.ancestor_id == employee_id))
+        )
+    return (await db.execute(query)).all()
+
+@router.get("/", response_class=HTMLResponse, dependencies=[query_budget(4)])
 async def list_employees(
     request: Request,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    etag = page_etag(request, user, "employees", "project_assignments", "projects", "goals")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    versions_as_of = tracker.sequence
+
     result = await db.execute(
         select(Employee)
         .options(selectinload(Employee.assignments).selectinload(ProjectAssignment.project))
@@ -26,23 +58,29 @@ async def list_employees(
         .order_by(Employee.name)
     )
     employees = result.scalars().all()
-    return templates.TemplateResponse(
+    return with_etag(templates.TemplateResponse(
         request=request,
         name="employees/list.html",
         context={
             "employees": employees,
-            "user": user
+            "user": user,
+            "versions_as_of": versions_as_of
         }
-    )
+    ), etag)
 
-@router.get("/new", response_class=HTMLResponse)
+@router.get("/new", response_class=HTMLResponse, dependencies=[query_budget(1)])
 async def new_employee_form(
     request: Request, 
+    db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
-    return templates.TemplateResponse(request=request, name="employees/form.html", context={"user": user})
+    return templates.TemplateResponse(
+        request=request,
+        name="employees/form.html",
+        context={"managers": await manager_choices(db), "user": user}
+    )
 
-@router.post("/", response_class=HTMLResponse)
+@router.post("/", response_class=HTMLResponse, dependencies=[query_budget(6)])
 async def create_employee(
     request: Request,
     name: str = Form(...),
@@ -52,6 +90,7 @@ async def create_employee(
     notes: str = Form(None),
     development_plan: str = Form(None),
     potential: str = Form(None),
+    manager_id: str = Form(""),
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
@@ -70,7 +109,8 @@ async def create_employee(
         skills=skill_list,
         notes=notes_list,
         development_plan=development_plan,
-        potential=potential
+        potential=potential,
+        manager_id=parse_manager_id(manager_id)
     )
     
     try:
@@ -88,53 +128,120 @@ async def create_employee(
             }
         )
 
-@router.get("/{employee_id}", response_class=HTMLResponse)
+@router.get("/{employee_id}", response_class=HTMLResponse, dependencies=[query_budget(4)])
 async def employee_detail(
     request: Request,
     employee_id: int,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    etag = page_etag(request, user, ("employees", employee_id), "projects")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
     result = await db.execute(
         select(Employee)
         .options(selectinload(Employee.assignments).selectinload(ProjectAssignment.project))
         .options(selectinload(Employee.goals))
+        .options(joinedload(Employee.manager))
         .filter(Employee.id == employee_id)
     )
-    employee = result.scalar_one_or_none()
+    employee = result.unique().scalar_one_or_none()
     
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
         
-    return templates.TemplateResponse(
+    return with_etag(templates.TemplateResponse(
         request=request,
         name="employees/detail.html",
         context={
             "employee": employee,
             "user": user
         }
+    ), etag)
+
+@router.get("/{employee_id}/org", response_class=HTMLResponse, dependencies=[query_budget(5)])
+async def employee_org(
+    request: Request,
+    employee_id: int,
+    page: int = 1,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    # Every query below is an indexed join on employee_closure, however deep the org
+    etag = page_etag(request, user, "employees", "goals", "project_assignments", "projects")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
+    result = await db.execute(
+        select(Employee).options(joinedload(Employee.manager)).filter(Employee.id == employee_id)
     )
+    employee = result.scalar_one_or_none()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+
+    in_org = (EmployeeClosure.ancestor_id == employee_id) & (EmployeeClosure.depth > 0)
+    headcount, levels = (await db.execute(
+        select(func.count(), func.coalesce(func.max(EmployeeClosure.depth), 0)).where(in_org)
+    )).one()
+    page = max(page, 1)
+    members = (await db.execute(
+        org_members(employee_id)
+        .options(joinedload(Employee.manager))
+        .order_by(EmployeeClosure.depth, Employee.name)
+        .limit(ORG_PAGE_SIZE)
+        .offset((page - 1) * ORG_PAGE_SIZE)
+    )).all()
+    goal_counts = dict((await db.execute(
+        select(Goal.status, func.count())
+        .join(EmployeeClosure, EmployeeClosure.descendant_id == Goal.employee_id)
+        .where(in_org)
+        .group_by(Goal.status)
+    )).all())
+    capacity = await build_report(db, manager_id=employee_id)
+
+    return with_etag(templates.TemplateResponse(
+        request=request,
+        name="employees/org.html",
+        context={
+            "employee": employee,
+            "headcount": headcount,
+            "levels": levels,
+            "members": members,
+            "goal_counts": goal_counts,
+            "capacity": capacity,
+            "page": page,
+            "has_next": page * ORG_PAGE_SIZE < headcount,
+            "user": user
+        }
+    ), etag)
 
-@router.get("/{employee_id}/edit", response_class=HTMLResponse)
+@router.get("/{employee_id}/edit", response_class=HTMLResponse, dependencies=[query_budget(2)])
 async def edit_employee_form(
     request: Request,
     employee_id: int,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    # The manager choices list every employee's name
+    etag = page_etag(request, user, ("employees", employee_id), "employees")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
     result = await db.execute(select(Employee).filter(Employee.id == employee_id))
     employee = result.scalar_one_or_none()
     
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
         
-    return templates.TemplateResponse(
+    return with_etag(templates.TemplateResponse(
         request=request, 
         name="employees/edit.html", 
-        context={"employee": employee, "user": user}
-    )
+        context={"employee": employee, "managers": await manager_choices(db, employee_id), "user": user}
+    ), etag)
 
-@router.post("/{employee_id}/edit", response_class=HTMLResponse)
+# Moving someone to a new manager adds a cycle check and the two closure-table statements
+@router.post("/{employee_id}/edit", response_class=HTMLResponse, dependencies=[query_budget(9)])
 async def update_employee(
     request: Request,
     employee_id: int,
@@ -145,6 +252,7 @@ async def update_employee(
     potential: str = Form(None),
     development_plan: str = Form(None),
     new_note: str = Form(None),
+    manager_id: str = Form(""),
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
@@ -160,6 +268,7 @@ async def update_employee(
     employee.skills = [s.strip() for s in skills.split(",") if s.strip()]
     employee.potential = potential
     employee.development_plan = development_plan
+    employee.manager_id = parse_manager_id(manager_id)
     
     if new_note and new_note.strip():
         # Append to existing notes list
@@ -168,15 +277,25 @@ async def update_employee(
         current_notes.append(new_note.strip())
         employee.notes = current_notes
         
-    await db.commit()
+    try:
+        await db.commit()
+    except HierarchyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return RedirectResponse(url=f"/employees/{employee_id}", status_code=status.HTTP_303_SEE_OTHER)
 
-@router.post("/{employee_id}/delete")
+@router.post("/{employee_id}/delete", dependencies=[query_budget(6)])
 async def delete_employee(
     employee_id: int,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    # A bulk delete skips the session events that maintain the closure table, counters and skill links
+    for statement in detach_statements(employee_id):
+        await db.execute(statement)
+    await db.execute(counters.employee_deleted(employee_id))
+    await db.execute(skill_index.employee_deleted(employee_id))
+    record_delete(db, "employees", employee_id)
     await db.execute(delete(Employee).where(Employee.id == employee_id))
     await db.commit()
     return RedirectResponse(url="/employees", status_code=status.HTTP_303_SEE_OTHER)
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Request, Form, Query
+from fastapi.responses import HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from app.config import settings
+from app.database import get_shared_db
+from app.models import Feedback
+from app.auth import get_admin_user, get_current_user
+from app.query_budget import query_budget
+from app.templating import templates
+from app.services.batch_writer import BatchWriter
+
+router = APIRouter(prefix="/feedback", tags=["feedback"])
+
+PAGE_SIZE = 50
+
+# Started and flushed on shutdown by the app lifespan (app.main).
+feedback_writer = BatchWriter(
+    Feedback,
+    max_batch=settings.FEEDBACK_BATCH_SIZE,
+    max_delay=settings.FEEDBACK_FLUSH_INTERVAL,
+)
+
+@router.get("", response_class=HTMLResponse)
+async def feedback_form(request: Request, user: str = Depends(get_current_user)):
+    return templates.TemplateResponse(request=request, name="feedback/form.html", context={"user": user})
+
+@router.post("", response_class=HTMLResponse, dependencies=[query_budget(1)])
+async def submit_feedback(
+    request: Request,
+    feedback: str = Form(...),
+    user: str = Depends(get_current_user)
+):
+    await feedback_writer.submit({"user": user, "message": feedback, "created_at": datetime.now(timezone.utc)})
+
+    return templates.TemplateResponse(
+        request=request,
+        name="feedback/form.html",
+        context={
+            "user": user,
+            "message": "Thank you for your feedback!",
+        },
+    )
+
+@router.get("/admin", response_class=HTMLResponse, dependencies=[query_budget(3)])
+async def feedback_admin(
+    request: Request,
+    page: int = Query(1, ge=1),
+    db: AsyncSession = Depends(get_shared_db),
+    user: str = Depends(get_admin_user)
+):
+    # Show submissions still sitting in this process's buffer too
+    await feedback_writer.flush()
+
+    total = (await db.execute(select(func.count(Feedback.id)))).scalar_one()
+    result = await db.execute(
+        select(Feedback)
+        .order_by(Feedback.created_at.desc(), Feedback.id.desc())
+        .offset((page - 1) * PAGE_SIZE)
+        .limit(PAGE_SIZE)
+    )
+    return templates.TemplateResponse(
+        request=request,
+        name="feedback/admin.html",
+        context={
+            "entries": result.scalars().all(),
+            "total": total,
+            "page": page,
+            "pages": max(1, -(-total // PAGE_SIZE)),
+            "user": user,
+        },
+    )
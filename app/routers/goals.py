@@ -1,49 +1,59 @@
 from fastapi import APIRouter, Depends, status, Request, Form, BackgroundTasks, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from pathlib import Path
-from typing import Optional, Dict
+from typing import List, Optional, Dict, Union
+import time
 import uuid
 
 from app.database import get_db
-from app.models import Goal, Employee, Project
+from app.models import Goal, GoalStatusChange, Employee, Project
 from app.auth import get_current_user
+from app.query_budget import query_budget
+from app.templating import is_htmx, templates
+from app.versioning import page_etag, not_modified, with_etag, tracker
+from app.services.goal_duplicates import THRESHOLD, duplicate_groups, near_duplicates
+from app.services import bulk, suggestions
+from app.services.goal_history import GOAL_STATUSES, trend
 from app.services.llm import get_llm_service
 
 router = APIRouter(prefix="/goals", tags=["goals"])
-templates = Jinja2Templates(directory=Path(__file__).parent.parent / "templates")
 
 # In-memory task store (Note: Not suitable for multi-worker production, use Redis instead)
 tasks: Dict[str, dict] = {}
 
-@router.get("/", response_class=HTMLResponse)
+@router.get("/", response_class=HTMLResponse, dependencies=[query_budget(2)])
 async def list_goals(
     request: Request,
     employee_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    etag = page_etag(request, user, "goals", "employees")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    versions_as_of = tracker.sequence
+
     result = await db.execute(select(Goal).order_by(Goal.status))
     goals = result.scalars().all()
     
     emp_result = await db.execute(select(Employee))
     employees = emp_result.scalars().all()
 
-    return templates.TemplateResponse(
+    return with_etag(templates.TemplateResponse(
         request=request,
         name="goals/list.html",
         context={
             "goals": goals,
             "employees": employees,
             "user": user,
-            "selected_employee_id": employee_id
+            "selected_employee_id": employee_id,
+            "versions_as_of": versions_as_of
         }
-    )
+    ), etag)
 
-@router.post("/", response_class=HTMLResponse)
+@router.post("/", response_class=HTMLResponse, dependencies=[query_budget(7)])
 async def create_goal(
     request: Request,
     title: str = Form(...),
@@ -66,15 +76,105 @@ async def create_goal(
     )
     db.add(goal)
     await db.commit()
+    # Its signature was stored with it; show the goal with its look-alikes before it joins the pile
+    if await near_duplicates(db, goal.id):
+        if is_htmx(request):
+            return Response(headers={"HX-Redirect": f"/goals/{goal.id}"})
+        return RedirectResponse(url=f"/goals/{goal.id}", status_code=status.HTTP_303_SEE_OTHER)
+    if is_htmx(request):
+        return templates.TemplateResponse(request=request, name="goals/_item.html", context={"goal": goal})
+    return RedirectResponse(url="/goals", status_code=status.HTTP_303_SEE_OTHER)
+
+@router.post("/bulk", dependencies=[query_budget(7)])
+async def create_goals(
+    employee_id: List[int] = Form([]),
+    title: List[str] = Form(...),
+    description: List[str] = Form(...),
+    due_date: List[str] = Form([]),
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    # The same goal for several people, or one goal each; all are written or none.
+    # Goals set for a team alike are expected to look the same, so no duplicate check here.
+    try:
+        goals = await bulk.goals(db, employee_id, title, description, due_date)
+    except bulk.BulkError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.problems)
+    db.add_all(goals)
+    await db.commit()
     return RedirectResponse(url="/goals", status_code=status.HTTP_303_SEE_OTHER)
 
-@router.get("/{goal_id}", response_class=HTMLResponse)
+@router.get("/duplicates", response_class=HTMLResponse, dependencies=[query_budget(2)])
+async def goal_duplicates(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    etag = page_etag(request, user, "goals", "employees")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
+    return with_etag(templates.TemplateResponse(
+        request=request,
+        name="goals/duplicates.html",
+        context={
+            "report": await duplicate_groups(db),
+            "threshold": THRESHOLD,
+            "user": user
+        }
+    ), etag)
+
+@router.get("/trends", response_class=HTMLResponse, dependencies=[query_budget(2)])
+async def goal_trends(
+    request: Request,
+    days: int = 30,
+    employee_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    days = max(1, min(days, 366))
+    # Rollups only change when a goal is written
+    etag = page_etag(request, user, "goals", "employees", "projects")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
+    subject: Union[Employee, Project, None] = None
+    if employee_id is not None:
+        subject = await db.get(Employee, employee_id)
+        scope, scope_id = "employee", employee_id
+    elif project_id is not None:
+        subject = await db.get(Project, project_id)
+        scope, scope_id = "project", project_id
+    else:
+        scope, scope_id = "all", 0
+    if scope != "all" and subject is None:
+        raise HTTPException(status_code=404, detail=f"{scope.title()} not found")
+
+    return with_etag(templates.TemplateResponse(
+        request=request,
+        name="goals/trends.html",
+        context={
+            "trend": await trend(db, scope, scope_id, days),
+            "statuses": GOAL_STATUSES,
+            "scope": scope,
+            "subject": subject,
+            "days": days,
+            "user": user
+        }
+    ), etag)
+
+@router.get("/{goal_id}", response_class=HTMLResponse, dependencies=[query_budget(5)])
 async def goal_detail(
     request: Request,
     goal_id: int,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    etag = page_etag(request, user, ("goals", goal_id), "employees", "projects")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
     result = await db.execute(
         select(Goal)
         .options(selectinload(Goal.employee), selectinload(Goal.project))
@@ -84,15 +184,43 @@ async def goal_detail(
     
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
+
+    history = await db.execute(
+        select(GoalStatusChange)
+        .filter(GoalStatusChange.goal_id == goal_id)
+        .order_by(GoalStatusChange.changed_at.desc(), GoalStatusChange.id.desc())
+    )
         
-    return templates.TemplateResponse(
+    return with_etag(templates.TemplateResponse(
         request=request,
         name="goals/detail.html",
         context={
             "goal": goal,
+            "history": history.scalars().all(),
+            "duplicates": await near_duplicates(db, goal_id),
+            "statuses": GOAL_STATUSES,
             "user": user
         }
-    )
+    ), etag)
+
+@router.post("/{goal_id}/status", dependencies=[query_budget(5)])
+async def update_goal_status(
+    goal_id: int,
+    goal_status: str = Form(..., alias="status"),
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    if goal_status not in GOAL_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown status {goal_status!r}")
+
+    goal = await db.get(Goal, goal_id)
+    if not goal:
+        raise HTTPException(status_code=404, detail="Goal not found")
+
+    # Logged with its daily rollups by app.services.goal_history
+    goal.status = goal_status
+    await db.commit()
+    return RedirectResponse(url=f"/goals/{goal_id}", status_code=status.HTTP_303_SEE_OTHER)
 
 async def run_goal_generation_task(task_id: str, employee_id: int, project_id: int, db_session_factory):
     # We need a fresh session here if we were passing db, but we passed factory or just use IDs and get data.
@@ -111,7 +239,7 @@ async def process_ai_request(task_id: str, employee_context: str, project_contex
         tasks[task_id]["status"] = "completed"
         tasks[task_id]["result"] = result
 
-@router.post("/generate_suggestions")
+@router.post("/generate_suggestions", dependencies=[query_budget(3)])
 async def generate_suggestions(
     request: Request,
     background_tasks: BackgroundTasks,
@@ -122,14 +250,30 @@ async def generate_suggestions(
     user: str = Depends(get_current_user)
 ):
     # Fetch Context
-    emp_result = await db.execute(select(Employee).filter(Employee.id == employee_id))
+    emp_result = await db.execute(
+        select(Employee).options(suggestions.with_context()).filter(Employee.id == employee_id)
+    )
     employee = emp_result.scalar_one_or_none()
     
     if not employee:
         return "Employee not found"
+
+    # The generic suggestion may have been prepared off-hours; use it if nothing has changed since
+    if not title and not project_id:
+        prepared = await suggestions.fresh_suggestion(db, employee)
+        if prepared is not None:
+            return templates.TemplateResponse(
+                request=request,
+                name="goals/suggestion_result.html",
+                context={
+                    "result": prepared,
+                    "employee_id": employee_id,
+                    "fill_title": True
+                }
+            )
         
-    emp_context = f"Name: {employee.name}, Role: {employee.role}, Skills: {employee.skills}, Notes: {employee.notes}"
-    proj_context = "General Improvement"
+    emp_context = suggestions.employee_context(employee)
+    proj_context = suggestions.PROJECT_CONTEXT
     
     if project_id:
         proj_result = await db.execute(select(Project).filter(Project.id == project_id))
@@ -142,7 +286,9 @@ async def generate_suggestions(
         proj_context += f". Proposed Title: {title}"
 
     task_id = str(uuid.uuid4())
-    tasks[task_id] = {"status": "pending", "employee_id": employee_id}
+    tasks[task_id] = {
+        "status": "pending", "employee_id": employee_id, "created_at": time.time(), "fill_title": not title
+    }
     
     background_tasks.add_task(process_ai_request, task_id, emp_context, proj_context, employee.potential)
     
@@ -175,6 +321,7 @@ async def get_task_status(request: Request, task_id: str):
         name="goals/suggestion_result.html",
         context={
             "result": task["result"],
-            "employee_id": task.get("employee_id")
+            "employee_id": task.get("employee_id"),
+            "fill_title": task.get("fill_title", False)
         }
     )
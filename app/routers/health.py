@@ -0,0 +1,39 @@
+import logging
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.metrics import registry
+from app.query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["ops"])
+
+# Both routes are in app.middleware.PUBLIC_PATHS so orchestrators and scrapers don't need a session.
+
+@router.get("/health", dependencies=[query_budget(1)])
+async def health(db: AsyncSession = Depends(get_db)):
+    try:
+        await db.execute(text("SELECT 1"))
+    except Exception:
+        # The error can name hosts, files or credentials; callers are unauthenticated
+        logger.exception("Health check could not reach the database")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "error", "database": "unavailable"},
+        )
+    return {"status": "ok", "database": "ok"}
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not secrets.compare_digest(request.headers.get("authorization", ""), expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
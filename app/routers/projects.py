@@ -1,34 +1,57 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from sqlalchemy.orm import selectinload
-from pathlib import Path
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.database import get_db
 from app.models import Project, Employee, ProjectAssignment
 from app.auth import get_current_user
+from app.query_budget import query_budget
+from app.services import bulk, counters
+from app.services.audit import record_delete
+from app.templating import is_htmx, templates
+from app.versioning import page_etag, not_modified, with_etag, tracker
 
 router = APIRouter(prefix="/projects", tags=["projects"])
-templates = Jinja2Templates(directory=Path(__file__).parent.parent / "templates")
 
-@router.get("/", response_class=HTMLResponse)
+async def assignment_changed(
+    request: Request, db: AsyncSession, project_id: int, assignment: Optional[ProjectAssignment] = None
+) -> HTMLResponse:
+    """The htmx answer to a team edit: the changed row (none once deleted) and the project's new totals."""
+    people, capacity = (await db.execute(
+        select(func.count(ProjectAssignment.id), func.coalesce(func.sum(ProjectAssignment.capacity), 0))
+        .where(ProjectAssignment.project_id == project_id)
+    )).one()
+    return templates.TemplateResponse(
+        request=request,
+        name="projects/_assignment_changed.html",
+        context={"assignment": assignment, "people": people, "capacity": capacity}
+    )
+
+@router.get("/", response_class=HTMLResponse, dependencies=[query_budget(1)])
 async def list_projects(
     request: Request,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    etag = page_etag(request, user, "projects")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    versions_as_of = tracker.sequence
+
     result = await db.execute(select(Project).order_by(Project.name))
     projects = result.scalars().all()
-    return templates.TemplateResponse(
+    return with_etag(templates.TemplateResponse(
         request=request,
         name="projects/list.html",
         context={
             "projects": projects,
-            "user": user
+            "user": user,
+            "versions_as_of": versions_as_of
         }
-    )
+    ), etag)
 
 @router.get("/new", response_class=HTMLResponse)
 async def new_project_form(
@@ -37,7 +60,7 @@ async def new_project_form(
 ):
     return templates.TemplateResponse(request=request, name="projects/form.html", context={"user": user})
 
-@router.post("/", response_class=HTMLResponse)
+@router.post("/", response_class=HTMLResponse, dependencies=[query_budget(2)])
 async def create_project(
     request: Request,
     name: str = Form(...),
@@ -60,13 +83,17 @@ async def create_project(
     await db.commit()
     return RedirectResponse(url="/projects", status_code=status.HTTP_303_SEE_OTHER)
 
-@router.get("/{project_id}", response_class=HTMLResponse)
+@router.get("/{project_id}", response_class=HTMLResponse, dependencies=[query_budget(4)])
 async def project_detail(
     request: Request,
     project_id: int,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    etag = page_etag(request, user, ("projects", project_id), "employees")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
     # Load project with assignments and employees
     result = await db.execute(
         select(Project)
@@ -82,7 +109,7 @@ async def project_detail(
     emp_result = await db.execute(select(Employee))
     all_employees = emp_result.scalars().all()
 
-    return templates.TemplateResponse(
+    return with_etag(templates.TemplateResponse(
         request=request,
         name="projects/detail.html",
         context={
@@ -90,10 +117,11 @@ async def project_detail(
             "all_employees": all_employees,
             "user": user
         }
-    )
+    ), etag)
 
-@router.post("/{project_id}/update")
+@router.post("/{project_id}/update", dependencies=[query_budget(3)])
 async def update_project(
+    request: Request,
     project_id: int,
     name: str = Form(...),
     project_status: str = Form(..., alias="status"),
@@ -114,10 +142,15 @@ async def update_project(
     project.stakeholders = [s.strip() for s in stakeholders.split(",") if s.strip()]
 
     await db.commit()
+    if is_htmx(request):
+        return templates.TemplateResponse(
+            request=request, name="projects/_project_info.html", context={"project": project}
+        )
     return RedirectResponse(url=f"/projects/{project_id}", status_code=status.HTTP_303_SEE_OTHER)
 
-@router.post("/{project_id}/assign")
+@router.post("/{project_id}/assign", dependencies=[query_budget(5)])
 async def assign_employee(
+    request: Request,
     project_id: int,
     employee_id: int = Form(...),
     role: str = Form(...),
@@ -133,10 +166,34 @@ async def assign_employee(
     )
     db.add(assignment)
     await db.commit()
+    if is_htmx(request):
+        await db.refresh(assignment, ["employee"])
+        return await assignment_changed(request, db, project_id, assignment)
     return RedirectResponse(url=f"/projects/{project_id}", status_code=status.HTTP_303_SEE_OTHER)
 
-@router.post("/{project_id}/assignments/{assignment_id}/update")
+@router.post("/{project_id}/assign/bulk", dependencies=[query_budget(5)])
+async def assign_employees(
+    project_id: int,
+    employee_id: List[int] = Form([]),
+    role: List[str] = Form(...),
+    capacity: List[int] = Form([100]),
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    # One role and capacity for everyone, or one per employee; all rows are written or none
+    if await db.get(Project, project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        assignments = await bulk.assignments(db, project_id, employee_id, role, capacity)
+    except bulk.BulkError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.problems)
+    db.add_all(assignments)
+    await db.commit()
+    return RedirectResponse(url=f"/projects/{project_id}", status_code=status.HTTP_303_SEE_OTHER)
+
+@router.post("/{project_id}/assignments/{assignment_id}/update", dependencies=[query_budget(5)])
 async def update_assignment(
+    request: Request,
     project_id: int,
     assignment_id: int,
     role: str = Form(...),
@@ -144,7 +201,11 @@ async def update_assignment(
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
-    result = await db.execute(select(ProjectAssignment).filter(ProjectAssignment.id == assignment_id))
+    result = await db.execute(
+        select(ProjectAssignment)
+        .options(joinedload(ProjectAssignment.employee))
+        .filter(ProjectAssignment.id == assignment_id)
+    )
     assignment = result.scalar_one_or_none()
 
     if not assignment:
@@ -154,25 +215,35 @@ async def update_assignment(
     assignment.capacity = capacity
 
     await db.commit()
+    if is_htmx(request):
+        return await assignment_changed(request, db, project_id, assignment)
     return RedirectResponse(url=f"/projects/{project_id}", status_code=status.HTTP_303_SEE_OTHER)
 
-@router.post("/{project_id}/assignments/{assignment_id}/delete")
+@router.post("/{project_id}/assignments/{assignment_id}/delete", dependencies=[query_budget(3)])
 async def delete_assignment(
+    request: Request,
     project_id: int,
     assignment_id: int,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    # Bulk deletes skip the session events that keep the dashboard counters and the audit log
+    await db.execute(counters.assignment_deleted(assignment_id))
+    record_delete(db, "project_assignments", assignment_id)
     await db.execute(delete(ProjectAssignment).where(ProjectAssignment.id == assignment_id))
     await db.commit()
+    if is_htmx(request):
+        return await assignment_changed(request, db, project_id)
     return RedirectResponse(url=f"/projects/{project_id}", status_code=status.HTTP_303_SEE_OTHER)
 
-@router.post("/{project_id}/delete")
+@router.post("/{project_id}/delete", dependencies=[query_budget(2)])
 async def delete_project(
     project_id: int,
     db: AsyncSession = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
+    await db.execute(counters.project_deleted(project_id))
+    record_delete(db, "projects", project_id)
     await db.execute(delete(Project).where(Project.id == project_id))
     await db.commit()
     return RedirectResponse(url="/projects", status_code=status.HTTP_303_SEE_OTHER)
@@ -0,0 +1,61 @@
+from typing import Optional, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_user
+from app.database import get_db
+from app.models import Employee, Skill
+from app.query_budget import query_budget
+from app.services import skills
+from app.templating import templates
+from app.versioning import page_etag, not_modified, with_etag
+
+router = APIRouter(prefix="/skills", tags=["skills"])
+
+@router.get("", response_class=HTMLResponse, dependencies=[query_budget(2)])
+async def skill_overview(
+    request: Request,
+    name: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    # "Who knows X": aliases and spelling variants resolve to the same skill
+    if name and name.strip():
+        skill = await skills.lookup(db, name)
+        if skill is not None:
+            return RedirectResponse(url=f"/skills/{skill.id}", status_code=status.HTTP_303_SEE_OTHER)
+
+    # Links only change with Employee.skills
+    etag = page_etag(request, user, "employees")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
+    frequencies = (await db.execute(skills.frequencies())).all()
+    return with_etag(templates.TemplateResponse(
+        request=request,
+        name="skills/overview.html",
+        context={"frequencies": frequencies, "name": name, "user": user}
+    ), etag)
+
+@router.get("/{skill_id}", response_class=HTMLResponse, dependencies=[query_budget(2)])
+async def skill_holders(
+    request: Request,
+    skill_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    etag = page_etag(request, user, "employees")
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
+    skill = await db.get(Skill, skill_id)
+    if skill is None:
+        raise HTTPException(status_code=404, detail="Skill not found")
+    holders: Sequence[Employee] = (await db.execute(skills.holders(skill_id))).scalars().all()
+    return with_etag(templates.TemplateResponse(
+        request=request,
+        name="skills/detail.html",
+        context={"skill": skill, "holders": holders, "user": user}
+    ), etag)
@@ -0,0 +1,149 @@
+"""Field-level audit trail for employees, projects and assignments.
+
+A ``before_flush`` session event diffs each modified or deleted audited
+object against its loaded state; ``after_flush`` adds creations, whose ids
+only exist once they are inserted. Entries wait in ``session.info`` until the
+transaction commits (a rollback drops them) and are then queued on
+``audit_writer``, a ``BatchWriter`` that inserts them into ``audit_log`` in
+batches from a background task. A mutation request therefore never waits on
+an audit write; the cost is that a crash can lose the last
+``AUDIT_FLUSH_INTERVAL`` seconds of entries.
+
+``changes`` stores only the fields that changed: ``[old, new]`` for plain
+values and ``{"added": [...], "removed": [...]}`` for lists such as
+``Employee.notes``, so appending one note doesn't copy the whole list.
+Bulk ``delete()`` statements bypass the events; routes using them call
+``record_delete``. Entries are written to the database the change was made
+in (the tenant's, with ``MULTI_TENANT``).
+"""
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import event, inspect, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import Base, tenant_engines
+from app.models import AuditEntry, Employee, Project, ProjectAssignment
+from app.services.batch_writer import BatchWriter, PartialWrite, Row, rows_rejected
+from app.tenancy import current_tenant
+
+# Set per request by app.middleware.AuthMiddleware
+current_user: ContextVar[Optional[str]] = ContextVar("current_user", default=None)
+
+AUDITED: Tuple[Type[Base], ...] = (Employee, Project, ProjectAssignment)
+ENTITIES = {model.__tablename__: model for model in AUDITED}
+SKIPPED = {"id", "created_at", "updated_at"}
+
+
+class AuditWriter(BatchWriter):
+    """A ``BatchWriter`` that sends each entry to the database it was made in."""
+
+    async def _write(self, rows: List[Row]) -> None:
+        by_tenant: Dict[Optional[str], List[Row]] = defaultdict(list)
+        for row in rows:
+            by_tenant[row["tenant"]].append(row)
+        # One transaction per tenant: when one fails, only its rows are handed back
+        failed: List[Row] = []
+        error: Optional[Exception] = None
+        for tenant, tenant_rows in by_tenant.items():
+            entries = [{key: value for key, value in row.items() if key != "tenant"} for row in tenant_rows]
+            try:
+                factory: Callable[[], AsyncSession] = self.session_factory
+                if tenant is not None:
+                    factory = await tenant_engines.sessionmaker(tenant)
+                async with factory() as session:
+                    await session.execute(insert(self.model), entries)
+                    await session.commit()
+            except Exception as e:
+                failed.extend(tenant_rows)
+                # An unreachable database keeps rows for later; let that decide over rejected rows
+                if error is None or not rows_rejected(e):
+                    error = e
+        if error is None:
+            return
+        if len(failed) < len(rows):
+            raise PartialWrite(failed) from error
+        raise error
+
+
+# Started and flushed on shutdown by the app lifespan (app.main).
+audit_writer = AuditWriter(
+    AuditEntry,
+    max_batch=settings.AUDIT_BATCH_SIZE,
+    max_delay=settings.AUDIT_FLUSH_INTERVAL,
+)
+
+
+def _fields(obj: Any) -> List[str]:
+    return [attr.key for attr in inspect(obj).mapper.column_attrs if attr.key not in SKIPPED]
+
+
+def _diff(old: Any, new: Any) -> Any:
+    if isinstance(old, list) or isinstance(new, list):
+        old, new = old or [], new or []
+        return {"added": [v for v in new if v not in old], "removed": [v for v in old if v not in new]}
+    return [old, new]
+
+
+def _pending(session: Session) -> List[Dict[str, Any]]:
+    return session.info.setdefault("audit_entries", [])
+
+
+def _entry(obj: Any, action: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+    return {"entity": obj.__tablename__, "entity_id": obj.id, "action": action, "changes": changes}
+
+
+def record_delete(db: AsyncSession, entity: str, entity_id: int) -> None:
+    """Audit a bulk ``delete()`` of one row; written after the commit, like the event-captured entries."""
+    _pending(db.sync_session).append({"entity": entity, "entity_id": entity_id, "action": "delete", "changes": {}})
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_changes(session: Session, flush_context: Any, instances: Any) -> None:
+    entries = _pending(session)
+    for obj in session.dirty:
+        if isinstance(obj, AUDITED) and obj not in session.new:
+            state = inspect(obj)
+            changes = {}
+            for key in _fields(obj):
+                history = state.attrs[key].history
+                if history.added or history.deleted:
+                    old = history.deleted[0] if history.deleted else None
+                    new = history.added[0] if history.added else None
+                    if old != new:
+                        changes[key] = _diff(old, new)
+            if changes:
+                entries.append(_entry(obj, "update", changes))
+    for obj in session.deleted:
+        if isinstance(obj, AUDITED):
+            values = {key: obj.__dict__.get(key) for key in _fields(obj)}
+            entries.append(_entry(obj, "delete", {k: _diff(v, None) for k, v in values.items() if v is not None}))
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_creations(session: Session, flush_context: Any) -> None:
+    entries = _pending(session)
+    for obj in session.new:
+        if isinstance(obj, AUDITED):
+            values = {key: obj.__dict__.get(key) for key in _fields(obj)}
+            entries.append(_entry(obj, "create", {k: _diff(None, v) for k, v in values.items() if v not in (None, [])}))
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_entries(session: Session) -> None:
+    entries = session.info.pop("audit_entries", None)
+    if not entries:
+        return
+    now = datetime.now(timezone.utc)
+    user, tenant = current_user.get(), current_tenant.get()
+    for entry in entries:
+        audit_writer.enqueue({**entry, "user": user, "tenant": tenant, "created_at": now})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_entries(session: Session) -> None:
+    session.info.pop("audit_entries", None)
@@ -0,0 +1,177 @@
+"""Buffered, batched inserts for append-only tables.
+
+Rows handed to ``BatchWriter.submit`` are kept in memory and written with one
+multi-row INSERT when ``max_batch`` rows are waiting, when the oldest has been
+waiting ``max_delay`` seconds, or on ``close()`` at shutdown. A burst of
+requests therefore costs one round trip to the database instead of one each.
+
+Buffered rows belong to this process: a crash (not a normal shutdown) loses
+whatever had not been flushed yet, so only use this for data where that is
+acceptable, such as feedback or audit trails.
+
+When the database can't be reached the batch is kept for the next flush. When
+it rejects the batch (a constraint or a value it won't store), the batch is
+split in halves until the offending rows are found; those are logged and
+dropped so they don't block everything submitted after them.
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError, StatementError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Base, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+Row = Dict[str, Any]
+
+
+class PartialWrite(Exception):
+    """Raised by ``_write`` when only some rows were committed; ``pending`` holds the others."""
+
+    def __init__(self, pending: List[Row]):
+        self.pending = pending
+        super().__init__(f"{len(pending)} rows not written")
+
+
+def rows_rejected(error: Exception) -> bool:
+    """Whether the database refused the rows themselves, rather than being unavailable."""
+    return isinstance(error, StatementError) and not isinstance(error, (OperationalError, InterfaceError))
+
+
+class BatchWriter:
+    def __init__(
+        self,
+        model: Type[Base],
+        *,
+        max_batch: int = 100,
+        max_delay: float = 1.0,
+        max_pending: int = 10000,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+    ):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        # Upper bound on rows kept while the database is failing; the oldest are dropped.
+        self.max_pending = max_pending
+        self.session_factory = session_factory
+        self.written = 0
+        self.dropped = 0
+        self._buffer: List[Row] = []
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def start(self) -> None:
+        """Start the background task that flushes on ``max_delay``. Call from the running loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"batch-writer-{self.model.__tablename__}")
+
+    async def close(self) -> None:
+        """Stop the background task and write out everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def submit(self, row: Row) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.max_batch:
+            await self.flush()
+        elif len(self._buffer) == 1:
+            self._wakeup.set()
+
+    def enqueue(self, row: Row) -> None:
+        """``submit`` for synchronous callers such as session events: a full batch is flushed in a task."""
+        self._buffer.append(row)
+        if len(self._buffer) > self.max_pending:
+            # Nothing is awaited here, so a failing database must not grow the buffer without bound
+            del self._buffer[0]
+            self.dropped += 1
+        if len(self._buffer) == self.max_batch:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            task = loop.create_task(self.flush())
+            # The loop only keeps weak references to tasks
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif len(self._buffer) == 1:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Insert all buffered rows now; returns how many were written."""
+        async with self._lock:
+            rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            written, pending = await self._write_or_split(rows)
+            if pending:
+                self._requeue(pending)
+            self.written += written
+            return written
+
+    async def _write_or_split(self, rows: List[Row]) -> Tuple[int, List[Row]]:
+        """Write ``rows``, halving a rejected batch to drop only the rows at fault.
+
+        Returns how many rows were written and the ones to keep for the next flush:
+        everything not yet written once the database itself failed.
+        """
+        try:
+            await self._write(rows)
+            return len(rows), []
+        except PartialWrite as e:
+            # The committed rows must not be written again; retry or split only the others
+            written, pending = await self._write_or_split(e.pending)
+            return len(rows) - len(e.pending) + written, pending
+        except Exception as e:
+            if not rows_rejected(e):
+                logger.exception(
+                    "Failed to write %d %s rows; keeping them for the next flush", len(rows), self.model.__tablename__
+                )
+                return 0, rows
+            if len(rows) == 1:
+                logger.error("Dropping a %s row the database rejects: %r (%s)", self.model.__tablename__, rows[0], e)
+                self.dropped += 1
+                return 0, []
+        middle = len(rows) // 2
+        written, pending = await self._write_or_split(rows[:middle])
+        if pending:
+            return written, pending + rows[middle:]
+        more, pending = await self._write_or_split(rows[middle:])
+        return written + more, pending
+
+    async def _write(self, rows: List[Row]) -> None:
+        async with self.session_factory() as session:
+            await session.execute(insert(self.model), rows)
+            await session.commit()
+
+    def _requeue(self, rows: List[Row]) -> None:
+        self._buffer[:0] = rows
+        overflow = len(self._buffer) - self.max_pending
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped += overflow
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Let the batch fill up for at most max_delay after its first row.
+            await asyncio.sleep(self.max_delay)
+            await self.flush()
+            if self._buffer:
+                self._wakeup.set()
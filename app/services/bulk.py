@@ -0,0 +1,108 @@
+"""Validation for the bulk assignment and goal routes.
+
+A bulk form posts one value per row for each field, or a single value that
+applies to every row (a shared role, the same goal for the whole team). The
+whole batch is checked before anything is written, with a fixed number of
+queries however many rows it has, and every problem is reported at once in
+a ``BulkError``. The routes then add the rows together and commit once: the
+ORM sends them as a single multi-row ``INSERT``, and the session events that
+maintain the counters, audit log, goal history and signatures see them like
+any other write.
+"""
+from collections import Counter
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Employee, Goal, ProjectAssignment
+
+# Rows per request; bigger batches should be split by the caller
+MAX_ROWS = 500
+
+
+class BulkError(ValueError):
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("; ".join(problems))
+
+
+def spread(count: int, fields: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """``count`` rows from per-row values, repeating fields that were given once."""
+    problems = [
+        f"{name} needs 1 or {count} values, got {len(values)}"
+        for name, values in fields.items()
+        if len(values) not in (1, count)
+    ]
+    if problems:
+        raise BulkError(problems)
+    return [
+        {name: values[i] if len(values) == count else values[0] for name, values in fields.items()}
+        for i in range(count)
+    ]
+
+
+def _spread(count: int, fields: Dict[str, Sequence[Any]], problems: List[str]) -> List[Dict[str, Any]]:
+    try:
+        return spread(count, fields)
+    except BulkError as e:
+        raise BulkError(problems + e.problems)
+
+
+async def _check_employees(db: AsyncSession, employee_ids: List[int], problems: List[str]) -> None:
+    if not employee_ids:
+        problems.append("Choose at least one employee")
+    elif len(employee_ids) > MAX_ROWS:
+        problems.append(f"At most {MAX_ROWS} rows per request, got {len(employee_ids)}")
+    else:
+        found = set((await db.execute(select(Employee.id).where(Employee.id.in_(employee_ids)))).scalars())
+        missing = sorted(set(employee_ids) - found)
+        if missing:
+            problems.append(f"Unknown employees: {', '.join(map(str, missing))}")
+
+
+async def assignments(
+    db: AsyncSession, project_id: int, employee_ids: List[int], roles: List[str], capacities: List[int]
+) -> List[ProjectAssignment]:
+    """Validated, unsaved assignments of ``employee_ids`` to ``project_id`` (one query)."""
+    problems: List[str] = []
+    await _check_employees(db, employee_ids, problems)
+    repeated = sorted(e for e, times in Counter(employee_ids).items() if times > 1)
+    if repeated:
+        problems.append(f"Employees listed twice: {', '.join(map(str, repeated))}")
+    rows = _spread(len(employee_ids), {"employee_id": employee_ids, "role": roles, "capacity": capacities}, problems)
+    if any(not row["role"].strip() for row in rows):
+        problems.append("Every assignment needs a role")
+    if any(not 0 < row["capacity"] <= 100 for row in rows):
+        problems.append("Capacity must be between 1 and 100")
+    if problems:
+        raise BulkError(problems)
+    return [
+        ProjectAssignment(project_id=project_id, employee_id=row["employee_id"], role=row["role"].strip(),
+                          capacity=row["capacity"])
+        for row in rows
+    ]
+
+
+async def goals(
+    db: AsyncSession,
+    employee_ids: List[int],
+    titles: List[str],
+    descriptions: List[str],
+    due_dates: List[str],
+) -> List[Goal]:
+    """Validated, unsaved goals, one per entry of ``employee_ids`` (one query)."""
+    problems: List[str] = []
+    await _check_employees(db, employee_ids, problems)
+    rows = _spread(len(employee_ids), {
+        "employee_id": employee_ids, "title": titles, "description": descriptions, "due_date": due_dates or [""],
+    }, problems)
+    if any(not row["title"].strip() or not row["description"].strip() for row in rows):
+        problems.append("Every goal needs a title and an objective")
+    if problems:
+        raise BulkError(problems)
+    return [
+        Goal(employee_id=row["employee_id"], title=row["title"].strip(),
+             description=row["description"].strip(), due_date=row["due_date"].strip() or None, status="Pending")
+        for row in rows
+    ]
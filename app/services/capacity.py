@@ -0,0 +1,138 @@
+"""Org-wide capacity planning: allocation per employee and staffing per project.
+
+Both come from one statement: two ``GROUP BY`` aggregates over
+``project_assignments`` (outer-joined so unassigned employees and unstaffed
+projects show up with 0) combined with ``UNION ALL``. The database does the
+summing, so the page costs the same single query for 50 assignments as for
+50,000. Passing ``manager_id`` narrows both halves to one org by joining the
+``employee_closure`` table (see ``app.services.hierarchy``).
+
+With ``CAPACITY_CACHE_ENABLED`` the report is cached in process memory under
+the change-counter versions of the tables it reads (see ``app.versioning``),
+so it is recomputed only after an assignment, employee or project write. Like
+the other version-keyed caches this is only correct when the app runs as a
+single process, so it is off by default and refused with several workers.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Employee, EmployeeClosure, Project, ProjectAssignment
+from app.tenancy import current_tenant
+from app.versioning import tracker
+
+TABLES = ("project_assignments", "employees", "projects")
+
+
+@dataclass
+class Allocation:
+    id: int
+    name: str
+    # Sum of assignment capacities, in percent of one person's time
+    total: int
+    assignments: int
+
+    @property
+    def fte(self) -> float:
+        return self.total / 100
+
+
+@dataclass
+class CapacityReport:
+    employees: List[Allocation] = field(default_factory=list)
+    projects: List[Allocation] = field(default_factory=list)
+
+    @property
+    def over_allocated(self) -> List[Allocation]:
+        return sorted((e for e in self.employees if e.total > 100), key=lambda e: -e.total)
+
+    @property
+    def under_allocated(self) -> List[Allocation]:
+        limit = settings.CAPACITY_UNDER_ALLOCATED
+        return sorted((e for e in self.employees if e.total < limit), key=lambda e: e.total)
+
+    @property
+    def staffed_fte(self) -> float:
+        return sum(p.total for p in self.projects) / 100
+
+
+def capacity_query(manager_id: Optional[int] = None):
+    """Allocation rows for everyone, or for the org under ``manager_id`` (and the projects it staffs)."""
+    by_employee = (
+        select(
+            literal("employee").label("kind"),
+            Employee.id,
+            Employee.name,
+            func.coalesce(func.sum(ProjectAssignment.capacity), 0).label("total"),
+            func.count(ProjectAssignment.id).label("assignments"),
+        )
+        .outerjoin(ProjectAssignment, ProjectAssignment.employee_id == Employee.id)
+        .group_by(Employee.id, Employee.name)
+    )
+    by_project = (
+        select(
+            literal("project").label("kind"),
+            Project.id,
+            Project.name,
+            func.coalesce(func.sum(ProjectAssignment.capacity), 0).label("total"),
+            func.count(ProjectAssignment.id).label("assignments"),
+        )
+        .outerjoin(ProjectAssignment, ProjectAssignment.project_id == Project.id)
+        .group_by(Project.id, Project.name)
+    )
+    if manager_id is not None:
+        in_org = (EmployeeClosure.ancestor_id == manager_id) & (EmployeeClosure.depth > 0)
+        by_employee = by_employee.join(EmployeeClosure, EmployeeClosure.descendant_id == Employee.id).where(in_org)
+        # Inner join: only projects the org works on, counting only the org's share
+        by_project = by_project.join(
+            EmployeeClosure, EmployeeClosure.descendant_id == ProjectAssignment.employee_id
+        ).where(in_org)
+    return union_all(by_employee, by_project)
+
+
+async def build_report(db: AsyncSession, manager_id: Optional[int] = None) -> CapacityReport:
+    report = CapacityReport()
+    for row in (await db.execute(capacity_query(manager_id))).all():
+        allocation = Allocation(id=row.id, name=row.name, total=row.total, assignments=row.assignments)
+        (report.employees if row.kind == "employee" else report.projects).append(allocation)
+    report.employees.sort(key=lambda a: a.name)
+    report.projects.sort(key=lambda a: a.name)
+    return report
+
+
+class CapacityCache:
+    def __init__(self):
+        # One report per tenant database (None without MULTI_TENANT)
+        self._entries: Dict[Optional[str], Tuple[Tuple[int, ...], CapacityReport]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def stamp(self) -> Tuple[int, ...]:
+        return tuple(tracker.table_version(table) for table in TABLES)
+
+    async def get(self, db: AsyncSession) -> CapacityReport:
+        if not settings.CAPACITY_CACHE_ENABLED:
+            return await build_report(db)
+        stamp = self.stamp()
+        tenant = current_tenant.get()
+        entry = self._entries.get(tenant)
+        if entry is not None and entry[0] == stamp:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        versions_as_of = tracker.sequence
+        report = await build_report(db)
+        # A commit landing mid-query may not be in the rows we read; don't keep them
+        if tracker.sequence == versions_as_of:
+            self._entries[tenant] = (stamp, report)
+        return report
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+capacity_cache = CapacityCache()
@@ -0,0 +1,261 @@
+"""Dashboard counters kept in one row instead of counted per page view.
+
+``team_counters`` holds a single row (id 1) with the numbers the home page
+shows: employees, active projects, pending and blocked goals, and people
+allocated over 100%. The page reads that row by primary key.
+
+The counters are updated in the same transaction as the writes that change
+them, so they commit or roll back together:
+
+* ORM writes are counted by a session event (``after_flush``). It adds the
+  flush's deltas with one ``UPDATE``. When assignments change it also runs one
+  query for the affected employees' allocation totals.
+* The bulk ``delete()`` routes bypass the events. They run the matching
+  ``*_deleted`` statement first, the same way ``delete_employee`` runs
+  ``detach_statements`` for the hierarchy.
+
+Anything else (Core writes, ``benchmarks/datagen.py``, manual SQL) is caught
+by ``reconcile``. It recounts everything from the source tables,
+overwrites the row and logs any drift. ``Reconciler`` runs it at startup and
+every ``COUNTERS_RECONCILE_INTERVAL`` seconds.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Connection, DDL, Executable, Select, event, func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Employee, Goal, Project, ProjectAssignment, TeamCounters
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("employees", "active_projects", "pending_goals", "blocked_goals", "over_allocated")
+ROW_ID = 1
+OVER_ALLOCATED = 100
+
+counters = TeamCounters.__table__
+employees = Employee.__table__
+projects = Project.__table__
+goals = Goal.__table__
+assignments = ProjectAssignment.__table__
+
+# A new database starts with nothing to count
+event.listen(counters, "after_create", DDL(
+    f"INSERT INTO team_counters (id, {', '.join(COUNTERS)}) VALUES ({ROW_ID}{', 0' * len(COUNTERS)})"
+))
+
+
+def actual_counts() -> Select:
+    """The counters computed from the source tables, as one row."""
+    totals = (
+        select(assignments.c.employee_id)
+        .join(employees, employees.c.id == assignments.c.employee_id)
+        .group_by(assignments.c.employee_id)
+        .having(func.sum(assignments.c.capacity) > OVER_ALLOCATED)
+        .subquery()
+    )
+    return select(
+        select(func.count()).select_from(employees).scalar_subquery().label("employees"),
+        select(func.count()).where(projects.c.status == "Active").scalar_subquery().label("active_projects"),
+        select(func.count()).where(goals.c.status == "Pending").scalar_subquery().label("pending_goals"),
+        select(func.count()).where(goals.c.status == "Blocked").scalar_subquery().label("blocked_goals"),
+        select(func.count()).select_from(totals).scalar_subquery().label("over_allocated"),
+    )
+
+
+def adjust(deltas: Dict[str, Any]) -> Executable:
+    """Add ``deltas`` (plain ints or SQL expressions) to the counters."""
+    return (
+        update(counters)
+        .where(counters.c.id == ROW_ID)
+        .values({name: counters.c[name] + delta for name, delta in deltas.items()})
+    )
+
+
+def _allocation(employee_id: Any) -> Any:
+    return select(func.coalesce(func.sum(assignments.c.capacity), 0)).where(
+        assignments.c.employee_id == employee_id
+    ).scalar_subquery()
+
+
+def employee_deleted(employee_id: int) -> Executable:
+    """Run before a bulk delete of ``employee_id``."""
+    exists = select(func.count()).where(employees.c.id == employee_id).scalar_subquery()
+    over = select(func.count()).where(
+        employees.c.id == employee_id, _allocation(employee_id) > OVER_ALLOCATED
+    ).scalar_subquery()
+    return adjust({"employees": -exists, "over_allocated": -over})
+
+
+def project_deleted(project_id: int) -> Executable:
+    """Run before a bulk delete of ``project_id`` (its assignments are kept)."""
+    active = select(func.count()).where(projects.c.id == project_id, projects.c.status == "Active")
+    return adjust({"active_projects": -active.scalar_subquery()})
+
+
+def assignment_deleted(assignment_id: int) -> Executable:
+    """Run before a bulk delete of ``assignment_id``: its employee may drop to 100% or below."""
+    target = assignments.alias("target")
+    total = _allocation(target.c.employee_id)
+    drops = (
+        select(func.count())
+        .select_from(target.join(employees, employees.c.id == target.c.employee_id))
+        .where(target.c.id == assignment_id, total > OVER_ALLOCATED, total - target.c.capacity <= OVER_ALLOCATED)
+    )
+    return adjust({"over_allocated": -drops.scalar_subquery()})
+
+
+def _changed(obj: Any, attr: str, default: Any = None) -> Tuple[Any, Any]:
+    """(old, new) values of ``attr`` for a dirty object."""
+    history = inspect(obj).attrs[attr].history
+    new = history.added[0] if history.added else getattr(obj, attr)
+    old = history.deleted[0] if history.deleted else new
+    return old, (default if new is None else new)
+
+
+def _over_allocated_delta(
+    conn: Connection, capacity: Dict[int, int], created: Iterable[int], removed: Iterable[int]
+) -> int:
+    """Change in over-allocated people, given this flush's capacity change per employee."""
+    created, removed = set(created), set(removed)
+    affected = set(capacity) | removed
+    totals: Dict[int, int] = dict(conn.execute(
+        select(assignments.c.employee_id, func.sum(assignments.c.capacity))
+        .where(assignments.c.employee_id.in_(affected))
+        .group_by(assignments.c.employee_id)
+    ).all())
+    delta = 0
+    for employee_id in affected:
+        after = totals.get(employee_id) or 0
+        before = after - capacity.get(employee_id, 0)
+        was = employee_id not in created and before > OVER_ALLOCATED
+        now = employee_id not in removed and after > OVER_ALLOCATED
+        delta += int(now) - int(was)
+    return delta
+
+
+@event.listens_for(Session, "after_flush")
+def _count_changes(session: Session, flush_context: Any) -> None:
+    deltas: Dict[str, int] = defaultdict(int)
+    capacity: Dict[int, int] = defaultdict(int)
+    created: List[int] = []
+    removed: List[int] = []
+
+    def count_status(old: Optional[str], new: Optional[str], names: Dict[str, str]) -> None:
+        for status, name in names.items():
+            deltas[name] += int(new == status) - int(old == status)
+
+    project_statuses = {"Active": "active_projects"}
+    goal_statuses = {"Pending": "pending_goals", "Blocked": "blocked_goals"}
+    for obj in session.new:
+        if isinstance(obj, Employee):
+            deltas["employees"] += 1
+            created.append(obj.id)
+        elif isinstance(obj, Project):
+            count_status(None, obj.status or "Active", project_statuses)
+        elif isinstance(obj, Goal):
+            count_status(None, obj.status or "Pending", goal_statuses)
+        elif isinstance(obj, ProjectAssignment):
+            capacity[obj.employee_id] += obj.capacity if obj.capacity is not None else 100
+    for obj in session.dirty:
+        if obj in session.new:
+            continue
+        if isinstance(obj, Project):
+            count_status(*_changed(obj, "status"), project_statuses)
+        elif isinstance(obj, Goal):
+            count_status(*_changed(obj, "status"), goal_statuses)
+        elif isinstance(obj, ProjectAssignment):
+            old_employee, new_employee = _changed(obj, "employee_id")
+            old_capacity, new_capacity = _changed(obj, "capacity")
+            if (old_employee, old_capacity) != (new_employee, new_capacity):
+                capacity[old_employee] -= old_capacity
+                capacity[new_employee] += new_capacity
+    for obj in session.deleted:
+        if isinstance(obj, Employee):
+            deltas["employees"] -= 1
+            removed.append(obj.id)
+        elif isinstance(obj, Project):
+            count_status(obj.status, None, project_statuses)
+        elif isinstance(obj, Goal):
+            count_status(obj.status, None, goal_statuses)
+        elif isinstance(obj, ProjectAssignment):
+            capacity[obj.employee_id] -= obj.capacity
+
+    conn = session.connection()
+    if capacity or removed:
+        deltas["over_allocated"] += _over_allocated_delta(conn, capacity, created, removed)
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        conn.execute(adjust(deltas))
+
+
+async def read(db: AsyncSession) -> Dict[str, int]:
+    row = await db.get(TeamCounters, ROW_ID)
+    if row is None:
+        # Only if the table was created outside create_all and the migration; the next reconcile fills it in
+        logger.warning("team_counters has no row yet; showing zeros until it is reconciled")
+        return dict.fromkeys(COUNTERS, 0)
+    return {name: getattr(row, name) for name in COUNTERS}
+
+
+def reconcile(conn: Connection) -> Dict[str, int]:
+    """Recount every counter and store the result; returns the drift that was corrected."""
+    actual = dict(conn.execute(actual_counts()).mappings().one())
+    stored = conn.execute(select(counters).where(counters.c.id == ROW_ID)).mappings().one_or_none()
+    values = {**actual, "reconciled_at": datetime.now(timezone.utc)}
+    if stored is None:
+        conn.execute(counters.insert().values(id=ROW_ID, **values))
+        return actual
+    conn.execute(update(counters).where(counters.c.id == ROW_ID).values(values))
+    drift = {name: actual[name] - stored[name] for name in COUNTERS if actual[name] != stored[name]}
+    if drift:
+        logger.warning("Corrected dashboard counter drift: %s", drift)
+    return drift
+
+
+class Reconciler:
+    """Runs ``reconcile`` at startup and then every ``interval`` seconds.
+
+    ``databases`` yields the session factories to reconcile on each pass
+    (``app.database.every_database``: the main database and, in multi-tenant
+    mode, every tenant file, including those whose engine was closed as idle).
+    """
+
+    def __init__(self, databases: Callable[[], AsyncIterator[Callable[[], AsyncSession]]], interval: float):
+        self.databases = databases
+        self.interval = interval
+        self.runs = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="counter-reconciler")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> None:
+        async for session_factory in self.databases():
+            async with session_factory() as session:
+                await session.run_sync(lambda sync_session: reconcile(sync_session.connection()))
+                await session.commit()
+        self.runs += 1
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                # A failed pass (e.g. the database is down) is retried on the next one
+                logger.exception("Dashboard counter reconciliation failed")
+            await asyncio.sleep(self.interval)
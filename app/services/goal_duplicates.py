@@ -0,0 +1,264 @@
+"""Near-duplicate goals, found through MinHash signatures and LSH buckets.
+
+Every goal gets a MinHash signature of its title and description when it is
+written: the minimum of ``PERMUTATIONS`` hash functions over the word pairs
+("shingles") of the text, packed into 256 bytes. The share of positions two
+signatures agree on estimates the Jaccard similarity of their shingle sets,
+so "Improve Python proficiency" and "Improve proficiency in Python" can be
+compared without looking at the text again.
+
+The signature is also cut into ``BANDS`` bands, each hashed into a bucket
+stored in ``goal_buckets``. Goals that share any bucket are candidates (with
+16 bands of 4 rows, goals at 60% similarity share one about 90% of the time;
+below 30%, rarely). Candidates are then checked against ``THRESHOLD`` with
+their signatures. Neither lookup compares every pair of goals:
+
+* ``near_duplicates`` finds one goal's duplicates through the buckets it is
+  in (indexed lookups on the ``goal_buckets`` primary key);
+* ``duplicate_groups`` scans ``goal_buckets`` once, checking every pair of
+  goals in buckets of up to ``PAIRED_BUCKET_SIZE`` goals, and joins the
+  confirmed pairs into groups; its cost grows with the number of goals, not
+  with the number of pairs across all goals.
+
+Known miss: in a bucket larger than ``PAIRED_BUCKET_SIZE`` each goal is only
+checked against the bucket's lowest goal id, so two goals alike to each other
+but not to that goal are grouped only if they also share a smaller bucket.
+With 16 bands that is rare, but the report does not promise every pair.
+
+Like ``app.services.goal_history``, signatures are kept current by a session
+event for ORM writes; Core inserts need ``rebuild`` (see
+``benchmarks/datagen.py``).
+"""
+import hashlib
+import operator
+import random
+import re
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+from sqlalchemy import Connection, and_, delete, event, func, insert, inspect, or_, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import Goal, GoalBucket, GoalSignature
+
+PERMUTATIONS = 64
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+# Estimated Jaccard similarity of word shingles at which goals count as duplicates
+THRESHOLD = 0.6
+# Caps on what one lookup or report reads back
+MAX_CANDIDATES = 200
+REPORT_GROUPS = 100
+REPORT_GROUP_SIZE = 10
+# Buckets up to this size have every pair of goals checked; larger ones pair each goal with the first
+PAIRED_BUCKET_SIZE = 50
+
+signatures = GoalSignature.__table__
+buckets = GoalBucket.__table__
+
+_PRIME = (1 << 61) - 1
+_FORMAT = f"<{PERMUTATIONS}I"
+# Fixed seed: stored signatures are only comparable if every process uses the same functions
+_random = random.Random(20261019)
+_COEFFICIENTS = [(_random.randrange(1, _PRIME), _random.randrange(_PRIME)) for _ in range(PERMUTATIONS)]
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text: str) -> Set[str]:
+    """Adjacent word pairs of ``text``, case-folded (single words for one-word texts)."""
+    words = _WORD.findall(text.casefold())
+    if len(words) < 2:
+        return set(words)
+    return {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+
+def _hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+
+
+def signature(title: str, description: str) -> bytes:
+    hashes = [_hash(shingle) for shingle in shingles(f"{title}\n{description or ''}")] or [0]
+    return struct.pack(_FORMAT, *(
+        min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF for a, b in _COEFFICIENTS
+    ))
+
+
+def similarity(first: bytes, second: bytes) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return sum(map(operator.eq, struct.unpack(_FORMAT, first), struct.unpack(_FORMAT, second))) / PERMUTATIONS
+
+
+def band_buckets(value: bytes) -> List[int]:
+    """One bucket per band: a signed 64-bit hash of the band's slice of the signature."""
+    width = ROWS * 4
+    return [
+        int.from_bytes(hashlib.blake2b(value[band * width:(band + 1) * width], digest_size=8).digest(), "little",
+                       signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def store(conn: Connection, texts: Dict[int, Tuple[str, str]], replace: Iterable[int] = ()) -> int:
+    """Write signatures and buckets for ``{goal_id: (title, description)}``; ``replace`` ids are cleared first."""
+    replace = list(replace)
+    if replace:
+        conn.execute(delete(signatures).where(signatures.c.goal_id.in_(replace)))
+        conn.execute(delete(buckets).where(buckets.c.goal_id.in_(replace)))
+    if not texts:
+        return 0
+    signature_rows, bucket_rows = [], []
+    for goal_id, (title, description) in texts.items():
+        value = signature(title, description)
+        signature_rows.append({"goal_id": goal_id, "signature": value})
+        bucket_rows += [
+            {"band": band, "bucket": bucket, "goal_id": goal_id} for band, bucket in enumerate(band_buckets(value))
+        ]
+    conn.execute(insert(signatures), signature_rows)
+    conn.execute(insert(buckets), bucket_rows)
+    return len(signature_rows)
+
+
+def rebuild(conn: Connection, batch_size: int = 5_000) -> int:
+    """Recompute every goal's signature and buckets; returns the number of goals."""
+    conn.execute(delete(signatures))
+    conn.execute(delete(buckets))
+    total, last = 0, 0
+    while True:
+        chunk = conn.execute(
+            select(Goal.id, Goal.title, Goal.description)
+            .where(Goal.id > last)
+            .order_by(Goal.id)
+            .limit(batch_size)
+        ).all()
+        if not chunk:
+            return total
+        total += store(conn, {goal_id: (title, description) for goal_id, title, description in chunk})
+        last = chunk[-1][0]
+
+
+async def near_duplicates(db: AsyncSession, goal_id: int) -> List[Tuple[Goal, float]]:
+    """Goals at least ``THRESHOLD`` similar to ``goal_id``, most similar first (one query)."""
+    mine, theirs = buckets.alias("mine"), buckets.alias("theirs")
+    candidates = (
+        select(theirs.c.goal_id)
+        .join(mine, and_(mine.c.band == theirs.c.band, mine.c.bucket == theirs.c.bucket))
+        .where(mine.c.goal_id == goal_id, theirs.c.goal_id != goal_id)
+        .distinct()
+        .limit(MAX_CANDIDATES)
+    )
+    rows: Sequence[Tuple[Goal, bytes]] = (await db.execute(
+        select(Goal).add_columns(signatures.c.signature)
+        .join(signatures, signatures.c.goal_id == Goal.id)
+        .where(or_(Goal.id == goal_id, Goal.id.in_(candidates)))
+    )).all()
+    own = next((value for goal, value in rows if goal.id == goal_id), None)
+    if own is None:
+        return []
+    found = [(goal, similarity(own, value)) for goal, value in rows if goal.id != goal_id]
+    return sorted((pair for pair in found if pair[1] >= THRESHOLD), key=lambda pair: (-pair[1], pair[0].id))
+
+
+@dataclass
+class DuplicateGroup:
+    size: int
+    # The first REPORT_GROUP_SIZE goals, oldest first
+    goals: List[Goal]
+
+
+@dataclass
+class DuplicateReport:
+    groups: List[DuplicateGroup]
+    # Totals over all groups, including those beyond REPORT_GROUPS
+    group_count: int
+    goal_count: int
+
+
+async def duplicate_groups(db: AsyncSession) -> DuplicateReport:
+    """Every set of near-duplicate goals, largest first (two queries)."""
+    in_bucket = [buckets.c.band, buckets.c.bucket]
+    sized = select(
+        buckets.c.band,
+        buckets.c.bucket,
+        buckets.c.goal_id,
+        func.min(buckets.c.goal_id).over(partition_by=in_bucket).label("first"),
+        func.count().over(partition_by=in_bucket).label("size"),
+    ).cte("sized")
+    mine, theirs = sized.alias("mine"), sized.alias("theirs")
+    every_pair = (
+        select(mine.c.goal_id, theirs.c.goal_id.label("other"))
+        .join(theirs, and_(
+            theirs.c.band == mine.c.band, theirs.c.bucket == mine.c.bucket, theirs.c.goal_id > mine.c.goal_id,
+        ))
+        .where(mine.c.size <= PAIRED_BUCKET_SIZE)
+    )
+    with_first = (
+        select(sized.c.first, sized.c.goal_id)
+        .where(sized.c.size > PAIRED_BUCKET_SIZE, sized.c.goal_id != sized.c.first)
+    )
+    # Lower id first on both sides, so UNION checks a pair shared by several bands once
+    edges = union(every_pair, with_first).subquery()
+    goal_signatures, other_signatures = signatures.alias("goal_signature"), signatures.alias("other_signature")
+    pairs: Sequence[Tuple[int, int, bytes, bytes]] = (await db.execute(
+        select(edges.c.goal_id, edges.c.other, goal_signatures.c.signature, other_signatures.c.signature)
+        .join(goal_signatures, goal_signatures.c.goal_id == edges.c.goal_id)
+        .join(other_signatures, other_signatures.c.goal_id == edges.c.other)
+    )).all()
+
+    parent: Dict[int, int] = {}
+
+    def root(goal_id: int) -> int:
+        parent.setdefault(goal_id, goal_id)
+        while parent[goal_id] != goal_id:
+            parent[goal_id] = parent[parent[goal_id]]
+            goal_id = parent[goal_id]
+        return goal_id
+
+    for goal_id, other_id, value, other_value in pairs:
+        goal_root, other_root = root(goal_id), root(other_id)
+        # Skip pairs already joined through other goals
+        if goal_root != other_root and similarity(value, other_value) >= THRESHOLD:
+            parent[other_root] = goal_root
+
+    members: Dict[int, List[int]] = {}
+    for goal_id in parent:
+        members.setdefault(root(goal_id), []).append(goal_id)
+    ranked = sorted((ids for ids in members.values() if len(ids) > 1), key=lambda ids: (-len(ids), min(ids)))
+    shown = [sorted(ids)[:REPORT_GROUP_SIZE] for ids in ranked[:REPORT_GROUPS]]
+
+    loaded: Dict[int, Goal] = {}
+    if shown:
+        result = await db.execute(
+            select(Goal).options(joinedload(Goal.employee)).where(Goal.id.in_([i for ids in shown for i in ids]))
+        )
+        loaded = {goal.id: goal for goal in result.scalars()}
+    return DuplicateReport(
+        groups=[
+            DuplicateGroup(size=len(ids), goals=[loaded[i] for i in show if i in loaded])
+            for ids, show in zip(ranked, shown)
+        ],
+        group_count=len(ranked),
+        goal_count=sum(len(ids) for ids in ranked),
+    )
+
+
+def _text_changed(obj: Goal) -> bool:
+    attrs = inspect(obj).attrs
+    return attrs.title.history.has_changes() or attrs.description.history.has_changes()
+
+
+@event.listens_for(Session, "after_flush")
+def _sign_goals(session: Session, flush_context: Any) -> None:
+    texts: Dict[int, Tuple[str, str]] = {}
+    changed: List[int] = []
+    for obj in session.new:
+        if isinstance(obj, Goal):
+            texts[obj.id] = (obj.title, obj.description)
+    for obj in session.dirty:
+        if isinstance(obj, Goal) and obj not in session.new and _text_changed(obj):
+            texts[obj.id] = (obj.title, obj.description)
+            changed.append(obj.id)
+    changed += [obj.id for obj in session.deleted if isinstance(obj, Goal)]
+    if texts or changed:
+        store(session.connection(), texts, replace=changed)
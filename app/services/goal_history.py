@@ -0,0 +1,188 @@
+"""Goal status history and the daily rollups the trends page reads.
+
+Every status a goal takes is appended to ``goal_status_changes`` (creation
+included, with ``from_status`` NULL), together with the goal's age at that
+moment. In the same flush, ``goal_status_daily`` is incremented for the day
+of the change: ``entered`` for the new status, ``exited`` for the old one and
+``age_seconds`` for cycle times. Each change counts three times, once for
+everyone (scope ``"all"``), once for the goal's employee and once for its
+project. So a 90-day trend for any of them reads at most 90 × 4 rollup rows,
+however long the history is.
+
+Like ``app.services.hierarchy``, the bookkeeping runs in session events, so
+any ORM write to ``Goal.status`` is logged. Core ``update()`` statements and
+bulk inserts bypass it. ``rebuild_rollups`` recomputes the rollups from the
+log (see ``benchmarks/datagen.py``).
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Connection, delete, event, insert, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Goal, GoalStatusChange, GoalStatusDaily
+
+GOAL_STATUSES = ["Pending", "In Progress", "Achieved", "Blocked"]
+DONE = "Achieved"
+
+log = GoalStatusChange.__table__
+daily = GoalStatusDaily.__table__
+goals = Goal.__table__
+
+RollupKey = Tuple[str, int, date, str]
+
+
+def _utc(moment: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything written here is UTC
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def scopes(employee_id: Optional[int], project_id: Optional[int]) -> Iterator[Tuple[str, int]]:
+    yield "all", 0
+    if employee_id is not None:
+        yield "employee", employee_id
+    if project_id is not None:
+        yield "project", project_id
+
+
+def rollup_rows(changes: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fold log rows into one ``goal_status_daily`` increment per key."""
+    totals: Dict[RollupKey, List[int]] = defaultdict(lambda: [0, 0, 0])
+    for change in changes:
+        day = change["changed_at"].date()
+        for scope, scope_id in scopes(change["employee_id"], change["project_id"]):
+            entered = totals[(scope, scope_id, day, change["to_status"])]
+            entered[0] += 1
+            entered[2] += change["age_seconds"]
+            if change["from_status"] is not None:
+                totals[(scope, scope_id, day, change["from_status"])][1] += 1
+    return [
+        {"scope": scope, "scope_id": scope_id, "day": day, "status": status,
+         "entered": entered, "exited": exited, "age_seconds": age}
+        for (scope, scope_id, day, status), (entered, exited, age) in totals.items()
+    ]
+
+
+def upsert_rollups(conn: Connection, rows: List[Dict[str, Any]]) -> None:
+    """Add ``rows`` to the rollups in one statement, creating missing days."""
+    dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(daily).values(rows)
+    conn.execute(statement.on_conflict_do_update(
+        index_elements=[daily.c.scope, daily.c.scope_id, daily.c.day, daily.c.status],
+        set_={
+            "entered": daily.c.entered + statement.excluded.entered,
+            "exited": daily.c.exited + statement.excluded.exited,
+            "age_seconds": daily.c.age_seconds + statement.excluded.age_seconds,
+        },
+    ))
+
+
+def rebuild_rollups(conn: Connection, batch_size: int = 10_000) -> int:
+    """Recompute ``goal_status_daily`` from the whole log; returns the number of rollup rows."""
+    conn.execute(delete(daily))
+    changes = conn.execution_options(yield_per=batch_size).execute(select(log)).mappings()
+    rows = rollup_rows({**change, "changed_at": _utc(change["changed_at"])} for change in changes)
+    for start in range(0, len(rows), batch_size):
+        conn.execute(insert(daily), rows[start:start + batch_size])
+    return len(rows)
+
+
+def _change(conn: Connection, goal: Goal, before: Optional[str], now: datetime) -> Dict[str, Any]:
+    created = goal.__dict__.get("created_at")
+    if created is None and before is not None:
+        created = conn.execute(select(goals.c.created_at).where(goals.c.id == goal.id)).scalar()
+    return {
+        "goal_id": goal.id,
+        "employee_id": goal.employee_id,
+        "project_id": goal.project_id,
+        "from_status": before,
+        "to_status": goal.status,
+        "changed_at": now,
+        "age_seconds": int((now - _utc(created)).total_seconds()) if created is not None else 0,
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_new_goals(session: Session, flush_context: Any, instances: Any) -> None:
+    now = datetime.now(timezone.utc)
+    for obj in session.new:
+        if isinstance(obj, Goal):
+            # Known up front (not left to the server default) so the log can compute ages
+            if obj.created_at is None:
+                obj.created_at = now
+            if obj.status is None:
+                obj.status = GOAL_STATUSES[0]
+
+
+@event.listens_for(Session, "after_flush")
+def _log_status_changes(session: Session, flush_context: Any) -> None:
+    now = datetime.now(timezone.utc)
+    conn = session.connection()
+    changes = [_change(conn, obj, None, now) for obj in session.new if isinstance(obj, Goal)]
+    for obj in session.dirty:
+        if isinstance(obj, Goal) and obj not in session.new:
+            history = inspect(obj).attrs.status.history
+            before = history.deleted[0] if history.deleted else None
+            if history.added and history.added[0] != before:
+                changes.append(_change(conn, obj, before, now))
+    if changes:
+        conn.execute(insert(log), changes)
+        upsert_rollups(conn, rollup_rows(changes))
+
+
+@dataclass
+class Trend:
+    days: List[date]
+    # status -> transitions into it, one count per day in ``days``
+    entered: Dict[str, List[int]] = field(default_factory=dict)
+    exited: Dict[str, int] = field(default_factory=dict)
+    age_seconds: Dict[str, int] = field(default_factory=dict)
+
+    def total(self, status: str) -> int:
+        return sum(self.entered.get(status, []))
+
+    @property
+    def opened(self) -> int:
+        # New goals and reopened ones both enter the first status
+        return self.total(GOAL_STATUSES[0])
+
+    @property
+    def completed(self) -> int:
+        return self.total(DONE)
+
+    @property
+    def completion_rate(self) -> Optional[float]:
+        return self.completed / self.opened if self.opened else None
+
+    @property
+    def cycle_days(self) -> Optional[float]:
+        """Mean age, in days, of goals when they were achieved."""
+        return self.age_seconds.get(DONE, 0) / self.completed / 86400 if self.completed else None
+
+    @property
+    def peak(self) -> int:
+        return max((count for counts in self.entered.values() for count in counts), default=0)
+
+
+async def trend(db: AsyncSession, scope: str = "all", scope_id: int = 0, days: int = 30,
+                today: Optional[date] = None) -> Trend:
+    """Daily transitions over the last ``days`` days, read from the rollups only."""
+    today = today or datetime.now(timezone.utc).date()
+    start = today - timedelta(days=days - 1)
+    result = Trend(days=[start + timedelta(days=offset) for offset in range(days)])
+    result.entered = {status: [0] * days for status in GOAL_STATUSES}
+    rows = await db.execute(
+        select(daily).where(daily.c.scope == scope, daily.c.scope_id == scope_id, daily.c.day >= start)
+    )
+    for row in rows:
+        index = (row.day - start).days
+        if index >= days:
+            continue
+        result.entered.setdefault(row.status, [0] * days)[index] += row.entered
+        result.exited[row.status] = result.exited.get(row.status, 0) + row.exited
+        result.age_seconds[row.status] = result.age_seconds.get(row.status, 0) + row.age_seconds
+    return result
@@ -0,0 +1,146 @@
+"""Reporting lines: ``Employee.manager_id`` plus a closure table of every manager/report pair.
+
+``employee_closure`` holds a row ``(ancestor, descendant, depth)`` for every
+manager above each employee, at any distance, plus a ``depth = 0`` row for
+the employee itself. "Everyone under X" is then one indexed lookup on the
+primary key (``ancestor_id = X``) joined to whatever is being asked about
+(employees, goals, assignments), with no recursive walk, however deep the
+org is.
+
+The table is kept in step with ``manager_id`` by session events, so ORM
+writes from any code path maintain it:
+
+* a new employee gets its self row and one row per manager above it;
+* changing ``manager_id`` moves the employee's whole subtree: the links from
+  its old managers to the subtree are deleted and links from the new chain
+  are inserted (two statements, whatever the subtree size);
+* deleting an employee moves their direct reports up to their manager.
+
+Bulk ``update()``/``delete()`` statements and Core inserts bypass the events.
+Callers using them must run ``detach_statements`` themselves (see
+``delete_employee``) or write the closure rows directly (see
+``benchmarks/datagen.py``).
+"""
+from typing import Any, List, Optional, Union
+
+from sqlalchemy import CompoundSelect, Executable, Integer, Select, delete, event, exists, insert, inspect, literal
+from sqlalchemy import or_, select, true, union_all, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import Employee, EmployeeClosure
+
+closure = EmployeeClosure.__table__
+employees = Employee.__table__
+
+
+class HierarchyError(ValueError):
+    pass
+
+
+def subtree_ids(manager_id: int) -> Select:
+    """Ids of everyone reporting to ``manager_id``, directly or not (excluding the manager)."""
+    return select(closure.c.descendant_id).where(closure.c.ancestor_id == manager_id, closure.c.depth > 0)
+
+
+def org_members(manager_id: int) -> Select:
+    """``(Employee, depth)`` rows for ``manager_id``'s org, depth 1 being direct reports."""
+    return (
+        select(Employee).add_columns(closure.c.depth)
+        .join(closure, closure.c.descendant_id == Employee.id)
+        .where(closure.c.ancestor_id == manager_id, closure.c.depth > 0)
+    )
+
+
+def insert_statement(employee_id: int, manager_id: Optional[int]) -> Executable:
+    rows: Union[Select, CompoundSelect] = select(
+        literal(employee_id, Integer), literal(employee_id, Integer), literal(0, Integer)
+    )
+    if manager_id is not None:
+        above = select(closure.c.ancestor_id, literal(employee_id, Integer), closure.c.depth + 1).where(
+            closure.c.descendant_id == manager_id
+        )
+        rows = union_all(rows, above)
+    return insert(closure).from_select(["ancestor_id", "descendant_id", "depth"], rows)
+
+
+def cycle_check(employee_id: int, manager_id: int) -> Select:
+    """True when ``manager_id`` is ``employee_id`` or reports to them."""
+    return select(exists().where(closure.c.ancestor_id == employee_id, closure.c.descendant_id == manager_id))
+
+
+def move_statements(employee_id: int, manager_id: Optional[int]) -> List[Executable]:
+    subtree = select(closure.c.descendant_id).where(closure.c.ancestor_id == employee_id)
+    old_chain = select(closure.c.ancestor_id).where(closure.c.descendant_id == employee_id, closure.c.depth > 0)
+    statements: List[Executable] = [
+        delete(closure).where(closure.c.descendant_id.in_(subtree), closure.c.ancestor_id.in_(old_chain))
+    ]
+    if manager_id is not None:
+        above, below = closure.alias("above"), closure.alias("below")
+        # Every manager in the new chain × everyone in the moved subtree
+        links = (
+            select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+            .select_from(above.join(below, true()))
+            .where(above.c.descendant_id == manager_id, below.c.ancestor_id == employee_id)
+        )
+        statements.append(insert(closure).from_select(["ancestor_id", "descendant_id", "depth"], links))
+    return statements
+
+
+def detach_statements(employee_id: int) -> List[Executable]:
+    """Take ``employee_id`` out of the hierarchy before it is deleted; its reports move up a level."""
+    chain = select(closure.c.ancestor_id).where(closure.c.descendant_id == employee_id, closure.c.depth > 0)
+    below = select(closure.c.descendant_id).where(closure.c.ancestor_id == employee_id, closure.c.depth > 0)
+    own_manager = select(employees.c.manager_id).where(employees.c.id == employee_id).scalar_subquery()
+    return [
+        update(employees).where(employees.c.manager_id == employee_id).values(manager_id=own_manager),
+        update(closure)
+        .where(closure.c.ancestor_id.in_(chain), closure.c.descendant_id.in_(below))
+        .values(depth=closure.c.depth - 1),
+        delete(closure).where(or_(closure.c.ancestor_id == employee_id, closure.c.descendant_id == employee_id)),
+    ]
+
+
+def _managers_first(new: List[Employee]) -> List[Employee]:
+    # A manager created in the same flush as their reports needs their rows inserted first
+    by_id = {obj.id: obj for obj in new}
+
+    def level(obj: Employee) -> int:
+        depth, seen = 0, {obj.id}
+        while obj.manager_id in by_id and obj.manager_id not in seen:
+            obj = by_id[obj.manager_id]
+            seen.add(obj.id)
+            depth += 1
+        return depth
+
+    return sorted(new, key=level)
+
+
+def _manager_changed(obj: Employee) -> bool:
+    attrs = inspect(obj).attrs
+    return attrs.manager_id.history.has_changes() or attrs.manager.history.has_changes()
+
+
+@event.listens_for(Session, "before_flush")
+def _detach_deleted(session: Session, flush_context: Any, instances: Any) -> None:
+    for obj in session.deleted:
+        if isinstance(obj, Employee):
+            for statement in detach_statements(obj.id):
+                session.connection().execute(statement)
+            # Bring reports already loaded in this session in line with the UPDATE above
+            for other in list(session.identity_map.values()):
+                if isinstance(other, Employee) and other.__dict__.get("manager_id") == obj.id:
+                    set_committed_value(other, "manager_id", obj.manager_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_closure(session: Session, flush_context: Any) -> None:
+    conn = session.connection()
+    for obj in _managers_first([obj for obj in session.new if isinstance(obj, Employee)]):
+        conn.execute(insert_statement(obj.id, obj.manager_id))
+    for obj in session.dirty:
+        if isinstance(obj, Employee) and obj not in session.new and _manager_changed(obj):
+            if obj.manager_id is not None and conn.execute(cycle_check(obj.id, obj.manager_id)).scalar():
+                raise HierarchyError(f"Employee {obj.manager_id} reports to employee {obj.id}")
+            for statement in move_statements(obj.id, obj.manager_id):
+                conn.execute(statement)
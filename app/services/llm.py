@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, TYPE_CHECKING
 import json
 from app.config import settings
-from openai import AsyncOpenAI
+from app.metrics import llm_request_duration
+from app.timing import timed
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 class LLMProvider(ABC):
     @abstractmethod
@@ -52,9 +57,24 @@ class MockLLMProvider(LLMProvider):
         - Need more React expertise.
         """
 
+@contextmanager
+def llm_call(provider: str, operation: str):
+    # Counted in the request's Server-Timing header and the /metrics latency histogram
+    with timed("llm"), llm_request_duration.time(provider=provider, operation=operation):
+        yield
+
 class OpenAIProvider(LLMProvider):
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY if hasattr(settings, 'OPENAI_API_KEY') else "dummy")
+        self._client: Optional["AsyncOpenAI"] = None
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        # The SDK (and the pydantic v1 compat layer it pulls in) takes about as
+        # long to import as the rest of the app, so only pay for it on first use.
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY if hasattr(settings, 'OPENAI_API_KEY') else "dummy")
+        return self._client
 
     async def generate_goals(self, employee_context: str, project_context: str, potential: Optional[str] = None, criteria: Optional[str] = None) -> Dict[str, Any]:
         if not hasattr(settings, 'OPENAI_API_KEY') or not settings.OPENAI_API_KEY:
@@ -102,15 +122,18 @@ class OpenAIProvider(LLMProvider):
         """
 
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-5-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
+            with llm_call("openai", "generate_goals"):
+                response = await self.client.chat.completions.create(
+                    model="gpt-5-mini",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    response_format={"type": "json_object"}
+                )
             content = response.choices[0].message.content
+            if content is None:
+                raise ValueError("The model returned no content")
             return json.loads(content)
         except Exception as e:
             return {
@@ -125,14 +148,15 @@ class OpenAIProvider(LLMProvider):
         if not hasattr(settings, 'OPENAI_API_KEY') or not settings.OPENAI_API_KEY:
              return "OpenAI API Key not configured."
 
-        response = await self.client.chat.completions.create(
-            model="gpt-5-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful engineering manager assistant."},
-                {"role": "user", "content": f"Compare these team skills: {', '.join(team_skills)} against these project requirements: {project_requirements}. Identify gaps."}
-            ]
-        )
-        return response.choices[0].message.content
+        with llm_call("openai", "analyze_skill_gap"):
+            response = await self.client.chat.completions.create(
+                model="gpt-5-mini",
+                messages=[
+                    {"role": "system", "content": "You are a helpful engineering manager assistant."},
+                    {"role": "user", "content": f"Compare these team skills: {', '.join(team_skills)} against these project requirements: {project_requirements}. Identify gaps."}
+                ]
+            )
+        return response.choices[0].message.content or ""
 
 def get_llm_service() -> LLMProvider:
     # For now, default to Mock if no API key is present or if configured to use Mock
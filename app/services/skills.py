@@ -0,0 +1,158 @@
+"""Skills as rows: a canonical ``skills`` table and the ``employee_skills`` index.
+
+``Employee.skills`` keeps the list as it was typed and is what the employee
+pages show. Every skill in it is also resolved to a canonical ``skills`` row
+and linked to the employee in ``employee_skills``. Resolution case-folds the
+name, collapses whitespace and maps known aliases ("k8s", "Postgres") to one
+spelling, so "kubernetes", "Kubernetes " and "K8s" are the same skill, found
+through the unique index on ``skills.key``.
+
+"Who knows X" is then one range scan of the ``employee_skills`` primary key,
+and skill frequencies one ``GROUP BY`` over it. Neither loads employees or
+looks inside the JSON lists.
+
+Like ``app.services.hierarchy``, the links are kept in step by a session
+event, so ORM writes from any code path maintain them, in a few statements
+per flush however many employees changed. Bulk ``delete()`` statements bypass
+it (see ``employee_deleted``), and Core inserts need ``rebuild``
+(see ``benchmarks/datagen.py``).
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Connection, Executable, Select, delete, event, func, inspect, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Employee, EmployeeSkill, Skill
+
+skills = Skill.__table__
+links = EmployeeSkill.__table__
+
+# Folded spelling -> canonical name. Keys are compared after skill_key's folding.
+ALIASES = {
+    "k8s": "Kubernetes",
+    "js": "JavaScript",
+    "ts": "TypeScript",
+    "py": "Python",
+    "golang": "Go",
+    "postgres": "PostgreSQL",
+    "psql": "PostgreSQL",
+    "reactjs": "React",
+    "react.js": "React",
+    "node": "Node.js",
+    "nodejs": "Node.js",
+    "ml": "Machine Learning",
+    "amazon web services": "AWS",
+}
+
+
+def _fold(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+def canonical_name(name: str) -> str:
+    """The spelling a new ``skills`` row gets: the alias target, or the name as typed (trimmed)."""
+    return ALIASES.get(_fold(name), " ".join(name.split()))
+
+
+def skill_key(name: str) -> str:
+    """The ``skills.key`` that ``name`` resolves to."""
+    return _fold(canonical_name(name))
+
+
+async def lookup(db: AsyncSession, name: str) -> Optional[Skill]:
+    """The ``Skill`` that ``name`` resolves to (one unique-index lookup)."""
+    return (await db.execute(select(Skill).where(Skill.key == skill_key(name)))).scalar_one_or_none()
+
+
+def holders(skill_id: int) -> Select:
+    """Employees with ``skill_id``, by name."""
+    return (
+        select(Employee)
+        .join(EmployeeSkill, EmployeeSkill.employee_id == Employee.id)
+        .where(EmployeeSkill.skill_id == skill_id)
+        .order_by(Employee.name)
+    )
+
+
+def frequencies() -> Select:
+    """``(id, name, people)`` for every skill anyone has, most common first."""
+    people = func.count(links.c.employee_id).label("people")
+    return (
+        select(skills.c.id, skills.c.name).add_columns(people)
+        .join(links, links.c.skill_id == skills.c.id)
+        .group_by(skills.c.id, skills.c.name)
+        .order_by(people.desc(), skills.c.name)
+    )
+
+
+def employee_deleted(employee_id: int) -> Executable:
+    """Run before a bulk delete of ``employee_id``."""
+    return delete(links).where(links.c.employee_id == employee_id)
+
+
+def skill_ids(conn: Connection, names: Iterable[str]) -> Dict[str, int]:
+    """``{key: id}`` for ``names``, creating the skills nobody had before."""
+    wanted: Dict[str, str] = {}
+    for name in names:
+        wanted.setdefault(skill_key(name), canonical_name(name))
+    if not wanted:
+        return {}
+    # Two statements whether or not any skill is new; existing rows (and their names) are left alone
+    dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+    conn.execute(
+        dialect.insert(skills).on_conflict_do_nothing(index_elements=[skills.c.key]),
+        [{"key": key, "name": name} for key, name in wanted.items()],
+    )
+    return dict(conn.execute(select(skills.c.key, skills.c.id).where(skills.c.key.in_(wanted))).all())
+
+
+def link(conn: Connection, employee_skills: Dict[int, List[str]], replace: Iterable[int] = ()) -> int:
+    """Link each employee to their skills; ``replace`` lists employees whose old links go first."""
+    replace = list(replace)
+    if replace:
+        conn.execute(delete(links).where(links.c.employee_id.in_(replace)))
+    ids = skill_ids(conn, (name for names in employee_skills.values() for name in names))
+    rows: Set[Tuple[int, int]] = {
+        (employee_id, ids[skill_key(name)]) for employee_id, names in employee_skills.items() for name in names
+    }
+    if rows:
+        conn.execute(insert(links), [{"employee_id": e, "skill_id": s} for e, s in sorted(rows)])
+    return len(rows)
+
+
+def rebuild(conn: Connection, batch_size: int = 10_000) -> int:
+    """Recompute ``employee_skills`` from every ``Employee.skills``; returns the number of links."""
+    conn.execute(delete(links))
+    total, last = 0, 0
+    while True:
+        chunk = conn.execute(
+            select(Employee.id, Employee.skills)
+            .where(Employee.id > last)
+            .order_by(Employee.id)
+            .limit(batch_size)
+        ).all()
+        if not chunk:
+            return total
+        total += link(conn, {employee_id: names or [] for employee_id, names in chunk})
+        last = chunk[-1][0]
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_links(session: Session, flush_context: Any) -> None:
+    created: Dict[int, List[str]] = {}
+    changed: Dict[int, List[str]] = {}
+    for obj in session.new:
+        if isinstance(obj, Employee) and obj.__dict__.get("skills"):
+            created[obj.id] = obj.__dict__["skills"]
+    for obj in session.dirty:
+        if isinstance(obj, Employee) and obj not in session.new and inspect(obj).attrs.skills.history.has_changes():
+            changed[obj.id] = obj.skills or []
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Employee)]
+    if not (created or changed or deleted):
+        return
+    conn = session.connection()
+    if deleted:
+        conn.execute(delete(links).where(links.c.employee_id.in_(deleted)))
+    link(conn, {**created, **changed}, replace=changed)
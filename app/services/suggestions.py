@@ -0,0 +1,220 @@
+"""AI goal suggestions prepared off-hours, so the goal form does not wait on the LLM.
+
+``Warmer`` walks every employee once per ``SUGGESTIONS_WARMUP_INTERVAL`` while
+the clock is inside the off-hours window (``SUGGESTIONS_OFF_HOURS_START`` to
+``SUGGESTIONS_OFF_HOURS_END``, local time). For each one it builds the same
+context the goal form sends to the LLM and hashes it together with the
+employee's potential. Only employees whose hash differs from the one stored
+with their suggestion in ``goal_suggestions`` (or who have none yet) are sent
+to the LLM, at most ``SUGGESTIONS_WARMUP_CONCURRENCY`` at a time. Editing
+skills, notes, potential or assignments therefore invalidates a suggestion
+without any bookkeeping on the write path, and a pass over an unchanged team
+makes no LLM calls at all.
+
+``/goals/generate_suggestions`` without a title or project checks the stored
+suggestion against the employee's current hash and answers with it straight
+away; anything else still goes to the LLM as a background task.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models import Employee, GoalSuggestion, ProjectAssignment
+from app.services.llm import get_llm_service
+
+logger = logging.getLogger(__name__)
+
+suggestions = GoalSuggestion.__table__
+employees = Employee.__table__
+
+# What the warm-up asks for: the generic suggestion the form gets with no title or project
+PROJECT_CONTEXT = "General Improvement"
+BATCH_SIZE = 100
+
+
+def with_context():
+    """Loader options for everything ``employee_context`` reads (two queries)."""
+    return selectinload(Employee.assignments).joinedload(ProjectAssignment.project)
+
+
+def employee_context(employee: Employee) -> str:
+    """The LLM's view of an employee; ``employee.assignments`` (and their projects) must be loaded."""
+    assignments = "; ".join(
+        f"{assignment.project.name if assignment.project else 'another project'} as {assignment.role} "
+        f"({assignment.capacity}%)"
+        for assignment in sorted(employee.assignments, key=lambda assignment: assignment.id)
+    ) or "none"
+    return (
+        f"Name: {employee.name}, Role: {employee.role}, Skills: {employee.skills}, Notes: {employee.notes}, "
+        f"Assignments: {assignments}"
+    )
+
+
+def fingerprint(employee: Employee) -> str:
+    """Changes whenever anything the LLM would be told about ``employee`` changes."""
+    payload = json.dumps([employee_context(employee), employee.potential])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def usable(result: Any) -> bool:
+    # Failures come back as an "error" key or, from the OpenAI provider, as a placeholder goal;
+    # neither is worth keeping until the next pass
+    return isinstance(result, dict) and not result.get("error") and result.get("title") != "Error Generating Goal"
+
+
+async def fresh_suggestion(db: AsyncSession, employee: Employee) -> Optional[Dict[str, Any]]:
+    """The stored suggestion for ``employee`` if it was generated from their current details (one query)."""
+    stored = await db.get(GoalSuggestion, employee.id)
+    if stored is None or stored.fingerprint != fingerprint(employee):
+        return None
+    return stored.suggestion
+
+
+def in_off_hours(hour: int, start: int, end: int) -> bool:
+    """Whether ``hour`` falls in ``[start, end)``, wrapping past midnight; ``start == end`` is all day."""
+    if start == end:
+        return True
+    if start < end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+async def _stale(session: AsyncSession, after: int) -> Tuple[List[Tuple[int, str, Optional[str], str]], int]:
+    """The next batch's stale employees as ``(id, context, potential, fingerprint)``, and its last id."""
+    batch = (await session.execute(
+        select(Employee).options(with_context()).where(Employee.id > after).order_by(Employee.id).limit(BATCH_SIZE)
+    )).scalars().all()
+    if not batch:
+        return [], after
+    stored: Dict[int, str] = dict((await session.execute(
+        select(suggestions.c.employee_id, suggestions.c.fingerprint)
+        .where(suggestions.c.employee_id.in_([employee.id for employee in batch]))
+    )).all())
+    stale = []
+    for employee in batch:
+        current = fingerprint(employee)
+        if stored.get(employee.id) != current:
+            stale.append((employee.id, employee_context(employee), employee.potential, current))
+    return stale, batch[-1].id
+
+
+async def warm(session_factory: Callable[[], AsyncSession], semaphore: asyncio.Semaphore) -> int:
+    """Regenerate every stale suggestion in one database; returns how many were stored."""
+    async with session_factory() as session:
+        # Suggestions of deleted employees
+        await session.execute(delete(suggestions).where(suggestions.c.employee_id.not_in(select(employees.c.id))))
+        await session.commit()
+
+    llm = get_llm_service()
+
+    async def generate(context: str, potential: Optional[str]) -> Any:
+        async with semaphore:
+            return await llm.generate_goals(context, PROJECT_CONTEXT, potential)
+
+    stored, last = 0, 0
+    while True:
+        # No transaction stays open while the LLM works
+        async with session_factory() as session:
+            stale, last_in_batch = await _stale(session, last)
+        if last_in_batch == last:
+            return stored
+        last = last_in_batch
+        if not stale:
+            continue
+
+        results = await asyncio.gather(
+            *(generate(context, potential) for _, context, potential, _ in stale), return_exceptions=True
+        )
+        now = datetime.now(timezone.utc)
+        rows = [
+            {"employee_id": employee_id, "fingerprint": current, "suggestion": result, "generated_at": now}
+            for (employee_id, _, _, current), result in zip(stale, results)
+            if usable(result)
+        ]
+        if len(rows) < len(stale):
+            logger.warning("Could not prepare goal suggestions for %d employees", len(stale) - len(rows))
+        if rows:
+            async with session_factory() as session:
+                dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+                upsert = dialect.insert(suggestions)
+                await session.execute(
+                    upsert.on_conflict_do_update(
+                        index_elements=[suggestions.c.employee_id],
+                        set_={
+                            "fingerprint": upsert.excluded.fingerprint,
+                            "suggestion": upsert.excluded.suggestion,
+                            "generated_at": upsert.excluded.generated_at,
+                        },
+                    ),
+                    rows,
+                )
+                await session.commit()
+            stored += len(rows)
+
+
+class Warmer:
+    """Runs ``warm`` on every database every ``interval`` seconds inside the off-hours window.
+
+    ``databases`` works as for ``app.services.counters.Reconciler``. The
+    ``concurrency`` cap on LLM calls is shared by all databases.
+    """
+
+    def __init__(
+        self,
+        databases: Callable[[], AsyncIterator[Callable[[], AsyncSession]]],
+        interval: float,
+        concurrency: int,
+        off_hours: Tuple[int, int],
+        clock: Callable[[], datetime] = datetime.now,
+    ):
+        self.databases = databases
+        self.interval = interval
+        self.concurrency = concurrency
+        self.off_hours = off_hours
+        self.clock = clock
+        self.runs = 0
+        self.generated = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="suggestion-warmer")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def due(self) -> bool:
+        return in_off_hours(self.clock().hour, *self.off_hours)
+
+    async def run_once(self) -> int:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        generated = 0
+        async for session_factory in self.databases():
+            generated += await warm(session_factory, semaphore)
+        self.runs += 1
+        self.generated += generated
+        return generated
+
+    async def _run(self) -> None:
+        while True:
+            if self.due():
+                try:
+                    await self.run_once()
+                except Exception:
+                    # Whatever was stored before the failure is kept; the rest is retried next pass
+                    logger.exception("Goal suggestion warm-up failed")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,88 @@
+import logging
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app import IMPORT_STARTED_AT
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+class StartupProfile:
+    """Wall-clock time spent in each phase of application startup."""
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = [("imports", time.perf_counter() - IMPORT_STARTED_AT)]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    @property
+    def total(self) -> float:
+        return sum(seconds for _, seconds in self.phases)
+
+    def report(self) -> str:
+        lines = [f"Startup finished in {self.total * 1000:.1f}ms"]
+        lines += [f"  {name:<12} {seconds * 1000:8.1f}ms" for name, seconds in self.phases]
+        return "\n".join(lines)
+
+
+def configure_logging(level: str) -> None:
+    """Show the app's own records at ``level``; uvicorn's default config only sets up uvicorn's loggers."""
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(level)
+    # When the host (gunicorn, a --log-config file, pytest) installed root handlers, records go there
+    if not logging.getLogger().handlers and not app_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s - %(message)s"))
+        app_logger.addHandler(handler)
+
+
+def alembic_config() -> Config:
+    config = Config(str(PROJECT_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "alembic"))
+    return config
+
+
+@lru_cache
+def alembic_scripts() -> ScriptDirectory:
+    return ScriptDirectory.from_config(alembic_config())
+
+
+def alembic_head() -> Optional[str]:
+    return alembic_scripts().get_current_head()
+
+
+async def schema_is_current(conn: AsyncConnection) -> bool:
+    """True when the database's Alembic revision is the latest one on disk.
+
+    One read of ``alembic_version`` replaces the per-table reflection that
+    ``create_all`` does on every boot.
+    """
+    current = await conn.run_sync(lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision())
+    return current is not None and current == alembic_head()
+
+
+def seed_marker_exists(path: str) -> bool:
+    return Path(path).exists()
+
+
+def write_seed_marker(path: str) -> None:
+    try:
+        Path(path).touch()
+    except OSError:
+        logger.warning("Could not write seed marker %s", path)
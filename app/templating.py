@@ -0,0 +1,85 @@
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict
+
+from fastapi import Request
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from app.assets import asset_url
+from app.config import settings
+from app.fragments import cached_fragment
+from app.timing import current_timings
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+
+@dataclass
+class RenderStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+# Cumulative render timings per top-level template name, for this process.
+render_stats: Dict[str, RenderStats] = {}
+
+
+class InstrumentedTemplate(Template):
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        timings = current_timings()
+        if timings is not None:
+            timings.render_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            render_stats.setdefault(self.name or "<string>", RenderStats()).record(elapsed)
+            if timings is not None:
+                timings.render_depth -= 1
+                # Fragments rendered from inside a page are already part of its time
+                if timings.render_depth == 0:
+                    timings.add("tpl", elapsed)
+
+
+def create_environment() -> Environment:
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        # Compiled templates are shared across processes and restarts through the
+        # bytecode cache; in production templates only change on deploy, so skip
+        # the mtime check that otherwise runs on every render.
+        bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR),
+        auto_reload=settings.ENVIRONMENT != "production",
+    )
+    env.template_class = InstrumentedTemplate
+    env.globals["cached_fragment"] = cached_fragment
+    env.globals["asset_url"] = asset_url
+    env.globals["debug_toolbar"] = settings.DEBUG_TOOLBAR
+    env.globals["request_timings"] = current_timings
+    return env
+
+
+# The one template environment for the whole app; import this instead of
+# creating a Jinja2Templates per module.
+templates = Jinja2Templates(env=create_environment())
+
+
+def is_htmx(request: Request) -> bool:
+    """Whether htmx sent ``request``, so a mutation can answer with the fragments it changed."""
+    return request.headers.get("HX-Request") == "true"
+
+
+def precompile_templates() -> int:
+    """Load every template so the first request doesn't pay for compilation."""
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
@@ -0,0 +1,232 @@
+"""One SQLite database per team lead (``MULTI_TENANT=true``).
+
+Every user who logs in is a tenant with their own file,
+``{TENANT_DATABASE_DIR}/{username}.db``. SQLite allows one writer per file, so
+with separate files one lead's writes never wait for another's, and their
+data can't show up in each other's pages.
+
+``AuthMiddleware`` puts the tenant in ``current_tenant`` for the request, and
+``app.database.get_db`` opens the session on that tenant's engine from an
+``EngineCache``: engines are opened on first use, kept in least-recently-used
+order, and disposed (closing their connections and file handles) when the
+cache is over ``TENANT_ENGINE_CACHE_SIZE`` or an engine has been unused for
+``TENANT_ENGINE_IDLE_SECONDS``.
+
+A new tenant file gets the current schema and is stamped at the Alembic head.
+Existing files are upgraded with ``scripts/migrate_tenants.py``, which runs
+the migrations for all of them in parallel. ``DATABASE_URL`` still holds
+app-wide data (feedback) and is what ``/health`` checks.
+"""
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from alembic import command
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import MetaData, create_engine, event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import TENANT_NAME, settings
+from app.metrics import forget_pool, instrument_pool
+from app.startup import alembic_config, alembic_head, alembic_scripts
+
+logger = logging.getLogger(__name__)
+
+# Set per request by app.middleware.AuthMiddleware when MULTI_TENANT is on
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+
+def tenant_path(tenant: str) -> Path:
+    if not TENANT_NAME.match(tenant):
+        raise ValueError(f"Invalid tenant name {tenant!r}")
+    return Path(settings.TENANT_DATABASE_DIR) / f"{tenant}.db"
+
+
+def tenant_url(tenant: str) -> str:
+    return f"sqlite+aiosqlite:///{tenant_path(tenant)}"
+
+
+def tenant_files() -> List[Path]:
+    return sorted(Path(settings.TENANT_DATABASE_DIR).glob("*.db"))
+
+
+def _sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    # WAL lets readers run alongside the tenant's single writer
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.close()
+
+
+def prepare_schema(conn: Connection, metadata: MetaData) -> None:
+    """Create and stamp a new tenant database; warn when an existing one needs migrating."""
+    context = MigrationContext.configure(conn)
+    current = context.get_current_revision()
+    if current is None:
+        metadata.create_all(conn)
+        context.stamp(alembic_scripts(), "head")
+    elif current != alembic_head():
+        logger.warning(
+            "Tenant database %s is at revision %s, not %s; run scripts/migrate_tenants.py",
+            conn.engine.url.database, current, alembic_head(),
+        )
+
+
+@dataclass
+class TenantEngine:
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker
+    last_used: float
+
+
+class EngineCache:
+    def __init__(self, metadata: MetaData, max_engines: int, idle_seconds: float):
+        self.metadata = metadata
+        self.max_engines = max_engines
+        self.idle_seconds = idle_seconds
+        self.opened = 0
+        self.evicted = 0
+        self._engines: "OrderedDict[str, TenantEngine]" = OrderedDict()
+        # Serialises opening, so two first requests for a tenant don't both create its schema
+        self._lock = asyncio.Lock()
+        self._reaper: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def __contains__(self, tenant: str) -> bool:
+        return tenant in self._engines
+
+    @asynccontextmanager
+    async def borrowed(self, tenant: str) -> AsyncIterator[async_sessionmaker]:
+        """``tenant``'s session factory for a background pass over every tenant.
+
+        An open engine is reused without counting as a use; otherwise a temporary
+        engine is opened and disposed afterwards, so the pass neither pushes active
+        tenants out of the cache nor keeps idle ones open.
+        """
+        entry = self._engines.get(tenant)
+        if entry is not None:
+            yield entry.sessionmaker
+            return
+        engine = create_async_engine(tenant_url(tenant))
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+        try:
+            yield async_sessionmaker(
+                autocommit=False, autoflush=False, bind=engine, class_=AsyncSession, expire_on_commit=False
+            )
+        finally:
+            await engine.dispose()
+
+    async def sessionmaker(self, tenant: str) -> async_sessionmaker:
+        entry = self._engines.get(tenant)
+        if entry is None:
+            async with self._lock:
+                entry = self._engines.get(tenant)
+                if entry is None:
+                    entry = await self._open(tenant)
+                    self._engines[tenant] = entry
+        entry.last_used = time.monotonic()
+        self._engines.move_to_end(tenant)
+        await self.evict()
+        return entry.sessionmaker
+
+    async def _open(self, tenant: str) -> TenantEngine:
+        path = tenant_path(tenant)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        engine = create_async_engine(tenant_url(tenant))
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+        instrument_pool(engine, "tenant")
+        # In a fresh context, so per-request accounting (query budgets, Server-Timing)
+        # doesn't bill the schema check to whichever request happened to open the tenant
+        await asyncio.create_task(self._prepare(engine), context=contextvars.Context())
+        self.opened += 1
+        sessionmaker = async_sessionmaker(
+            autocommit=False, autoflush=False, bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+        return TenantEngine(engine, sessionmaker, time.monotonic())
+
+    async def _prepare(self, engine: AsyncEngine) -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(prepare_schema, self.metadata)
+
+    async def evict(self) -> None:
+        """Dispose the least recently used engines beyond the cache size, and any idle too long."""
+        now = time.monotonic()
+        # Ordered oldest first, so stop at the first one that is neither surplus nor idle
+        while self._engines:
+            tenant, entry = next(iter(self._engines.items()))
+            if len(self._engines) <= self.max_engines and now - entry.last_used < self.idle_seconds:
+                break
+            del self._engines[tenant]
+            self.evicted += 1
+            # Sessions still using it keep their connection until they close it
+            forget_pool(entry.engine)
+            await entry.engine.dispose()
+
+    def start(self) -> None:
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.idle_seconds / 2, 1))
+            await self.evict()
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        while self._engines:
+            _, entry = self._engines.popitem()
+            forget_pool(entry.engine)
+            await entry.engine.dispose()
+
+
+def current_revision(path: Path) -> Optional[str]:
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        with engine.connect() as conn:
+            return MigrationContext.configure(conn).get_current_revision()
+    finally:
+        engine.dispose()
+
+
+def upgrade_tenant(path: Path) -> Dict[str, Any]:
+    """Run the Alembic migrations on one tenant file (in a worker process)."""
+    started = time.perf_counter()
+    before = current_revision(path)
+    config = alembic_config()
+    config.attributes["database_url"] = f"sqlite+aiosqlite:///{path}"
+    command.upgrade(config, "head")
+    return {
+        "tenant": path.stem,
+        "from": before,
+        "to": current_revision(path),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def migrate_tenants(paths: Sequence[Path], jobs: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Upgrade every tenant file to the Alembic head, ``jobs`` files at a time.
+
+    Each file has its own write lock, so the migrations don't wait for each
+    other; worker processes sidestep the GIL and Alembic's per-process state.
+    """
+    if not paths:
+        return []
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    # spawn: workers start clean instead of inheriting the caller's event loop and threads
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(upgrade_tenant, paths))
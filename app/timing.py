@@ -0,0 +1,102 @@
+"""Per-request time spent in the database, template rendering and LLM calls.
+
+``ServerTimingMiddleware`` (app.middleware) starts a ``RequestTimings`` for
+each request and reports it in a ``Server-Timing`` header, which browser
+devtools show under the request's Timing tab. The pieces are recorded by:
+
+- SQLAlchemy cursor events on every engine (``db``, plus the query count),
+- ``app.templating.InstrumentedTemplate`` for page renders (``tpl``),
+- ``timed("llm")`` around provider calls in ``app.services.llm``.
+
+Work done in background tasks after the response has started (such as AI goal
+generation) is not part of the header.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Server-Timing metric names and their descriptions.
+METRICS = {"db": "Database", "tpl": "Templates", "llm": "LLM"}
+
+
+@dataclass
+class RequestTimings:
+    started: float = field(default_factory=time.perf_counter)
+    durations: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(METRICS, 0.0))
+    queries: int = 0
+    # Nesting depth of template renders, so fragments rendered inside a page aren't counted twice.
+    render_depth: int = 0
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def add(self, metric: str, seconds: float) -> None:
+        self.durations[metric] += seconds
+
+    def header(self) -> str:
+        descriptions = {**METRICS, "db": f"Database ({self.queries} queries)"}
+        entries = [
+            f'{name};dur={seconds * 1000:.1f};desc="{descriptions[name]}"' for name, seconds in self.durations.items()
+        ]
+        entries.append(f'total;dur={self.total * 1000:.1f};desc="Total"')
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def collect_timings() -> Iterator[RequestTimings]:
+    """Attribute timings recorded in this context (and tasks it spawns) to a new ``RequestTimings``."""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(metric: str) -> Iterator[None]:
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(metric, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+    timings = _current.get()
+    started = conn.info.get("query_started")
+    if timings is None or not started:
+        return
+    timings.add("db", time.perf_counter() - started.pop())
+    timings.queries += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _failed_cursor_execute(exception_context: Any) -> None:
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
@@ -0,0 +1,180 @@
+"""Change counters for tables and rows, and the HTTP conditional-GET helpers built on them.
+
+Every committed ORM write bumps a counter for the table it touched, for the
+row itself and for every row it references through a foreign key (so adding a
+goal bumps its employee). Bulk ``update()``/``delete()`` statements can't tell
+which rows they hit, so they bump a per-table generation that invalidates every
+row of that table and of the tables it references.
+
+Pages hash the versions they depend on into an ETag; when the browser sends it
+back unchanged we answer ``304 Not Modified`` before any query or render.
+
+Versions live in process memory, like the AI task store in ``app.routers.goals``:
+with several worker processes a worker would not see writes made by the others,
+so ``ETAGS_ENABLED`` and the caches keyed on these versions must be off
+unless the app runs as a single process (enforced in ``app.config``).
+"""
+import hashlib
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple, Union, cast
+
+from fastapi import Request, Response, status
+from sqlalchemy import Table, event, inspect
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.config import settings
+
+EntityKey = Tuple[str, Any]
+Dependency = Union[str, EntityKey]
+
+
+class ChangeTracker:
+    def __init__(self):
+        # Changes on every restart/deploy, so ETags from an older process never match.
+        self.epoch = uuid.uuid4().hex[:12]
+        # Number of commits applied so far; lets readers detect writes that
+        # landed while they were loading data.
+        self.sequence = 0
+        self._tables: Dict[str, int] = defaultdict(int)
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._entities: Dict[EntityKey, int] = defaultdict(int)
+
+    def table_version(self, table: str) -> int:
+        return self._tables[table]
+
+    def entity_version(self, table: str, key: Any) -> str:
+        return f"{self._generations[table]}.{self._entities[(table, key)]}"
+
+    def version(self, dependency: Dependency) -> str:
+        if isinstance(dependency, str):
+            return str(self.table_version(dependency))
+        return self.entity_version(*dependency)
+
+    def apply(self, changes: "Changes") -> None:
+        self.sequence += 1
+        for table in changes.tables:
+            self._tables[table] += 1
+        for table in changes.generations:
+            self._generations[table] += 1
+        for entity in changes.entities:
+            self._entities[entity] += 1
+
+
+class Changes:
+    """Writes made by one session since its last commit."""
+
+    def __init__(self):
+        self.tables: Set[str] = set()
+        self.generations: Set[str] = set()
+        self.entities: Set[EntityKey] = set()
+
+    def add_entity(self, table: str, key: Any, *, touch_table: bool = True) -> None:
+        if touch_table:
+            self.tables.add(table)
+        if key is not None:
+            self.entities.add((table, key))
+
+    def add_bulk(self, table: str) -> None:
+        self.tables.add(table)
+        self.generations.add(table)
+
+
+tracker = ChangeTracker()
+
+
+def pending_changes(session: Session) -> Changes:
+    return session.info.setdefault("pending_changes", Changes())
+
+
+def _record_object(changes: Changes, obj: Any) -> None:
+    state = inspect(obj)
+    table = state.mapper.local_table
+    # New objects get their identity key only after the flush completes, so
+    # read the primary key straight from the freshly inserted column values.
+    identity = state.identity or tuple(
+        state.dict.get(state.mapper.get_property_by_column(col).key) for col in state.mapper.primary_key
+    )
+    changes.add_entity(table.name, identity[0] if identity and len(identity) == 1 else identity)
+
+    for column in table.columns:
+        for fk in column.foreign_keys:
+            attr = state.mapper.get_property_by_column(column).key
+            history = state.attrs[attr].history
+            # The parent it points to now, and the one it pointed to before the change
+            for value in {*history.sum(), state.dict.get(attr)}:
+                if value is not None:
+                    # Only the referenced row changes; pages listing the parent
+                    # table declare the child table when they show its data.
+                    changes.add_entity(fk.column.table.name, value, touch_table=False)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, flush_context: Any) -> None:
+    changes = pending_changes(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        _record_object(changes, obj)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk(orm_execute_state: ORMExecuteState) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    changes = pending_changes(orm_execute_state.session)
+    # Mapped classes here are all on plain tables, never joins or subqueries
+    table = cast(Table, mapper.local_table)
+    changes.add_bulk(table.name)
+    for fk in table.foreign_keys:
+        changes.add_bulk(fk.column.table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session) -> None:
+    changes = session.info.pop("pending_changes", None)
+    if changes is not None:
+        tracker.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop("pending_changes", None)
+
+
+def page_etag(request: Request, user: Optional[str], *dependencies: Dependency) -> str:
+    """Weak ETag for a page built from ``dependencies`` (table names or ``(table, id)`` pairs)."""
+    parts: Iterable[str] = (
+        tracker.epoch,
+        user or "",
+        str(request.url.path),
+        str(request.url.query),
+        *(f"{dep}={tracker.version(dep)}" for dep in dependencies),
+    )
+    digest = hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """The 304 response to send if the client already has ``etag``, else None."""
+    if not settings.ETAGS_ENABLED:
+        return None
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if "*" in candidates or etag.removeprefix("W/") in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+    return None
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    if settings.ETAGS_ENABLED:
+        response.headers.update(_cache_headers(etag))
+    return response
+
+
+def _cache_headers(etag: str) -> Dict[str, str]:
+    # Pages are per-user and must be revalidated on every navigation.
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
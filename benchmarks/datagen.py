@@ -0,0 +1,358 @@
+"""Deterministic synthetic organisation for reproducing production-sized performance problems.
+
+    python -m benchmarks.datagen --scale 1 --seed 42 --reset
+
+Scale 1 is 5,000 employees, 500 projects, ~12,500 assignments and 50,000
+goals (~68k rows, plus the reporting-line closure table and the goal status
+log and rollups); scale 15 is about a
+million rows, with a management tree about ten levels deep. The same
+``--seed`` and ``--scale`` always produce the same data. Rows are written with
+SQLAlchemy Core ``executemany`` inserts on a synchronous connection to
+``DATABASE_URL`` (or ``--database-url``), bypassing the ORM unit of work and
+its events.
+"""
+import argparse
+import random
+import time
+from bisect import bisect
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import Connection, Table, create_engine, event, func, select
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.database import Base
+from app import models  # noqa: F401  (registers the tables on Base.metadata)
+from app.services.counters import reconcile
+from app.services.goal_duplicates import rebuild as rebuild_signatures
+from app.services.goal_history import rebuild_rollups
+from app.services.skills import rebuild as rebuild_skills
+
+BATCH_SIZE = 10_000
+EPOCH = datetime(2019, 1, 1, tzinfo=timezone.utc)
+
+FIRST_NAMES = [
+    "Ada", "Alan", "Amara", "Ben", "Chen", "Dana", "Diego", "Elena", "Farah", "Grace", "Hana", "Ibrahim", "Ines",
+    "Jonas", "Kai", "Lena", "Lucas", "Maya", "Mei", "Nina", "Omar", "Priya", "Quinn", "Rosa", "Sam", "Sofia",
+    "Tariq", "Uma", "Victor", "Wei", "Yara", "Zoe",
+]
+LAST_NAMES = [
+    "Adams", "Bauer", "Costa", "Dubois", "Evans", "Fischer", "Garcia", "Hansen", "Ito", "Jensen", "Kim", "Lopez",
+    "Müller", "Nakamura", "Okafor", "Patel", "Quinn", "Rossi", "Silva", "Tanaka", "Usman", "Varga", "Weber",
+    "Xu", "Yilmaz", "Zhang",
+]
+ROLES = [
+    ("Junior Dev", 20), ("Software Engineer", 35), ("Senior Dev", 20), ("Staff Engineer", 6),
+    ("Senior Architect", 3), ("Engineering Manager", 6), ("QA Engineer", 5), ("Support Engineer", 5),
+]
+# (skill, popularity); employees draw 2-8 skills weighted by popularity
+SKILLS = [
+    ("Python", 30), ("SQL", 25), ("JavaScript", 22), ("TypeScript", 15), ("React", 14), ("Java", 12),
+    ("Go", 8), ("Rust", 3), ("Kubernetes", 9), ("Docker", 16), ("AWS", 14), ("Terraform", 6),
+    ("System Design", 10), ("Leadership", 7), ("Cloud Architecture", 5), ("Spring Boot", 6), ("Kafka", 4),
+    ("Machine Learning", 5), ("Data Engineering", 6), ("Security", 4), ("Basic Troubleshooting", 5),
+]
+POTENTIALS = [("P1", 10), ("P2", 30), ("P3", 45), ("P4", 10), (None, 5)]
+PROJECT_STATUSES = [("Active", 60), ("On Hold", 15), ("Completed", 25)]
+GOAL_STATUSES = [("Pending", 30), ("In Progress", 35), ("Achieved", 25), ("Blocked", 10)]
+PROJECT_WORDS = [
+    "Atlas", "Beacon", "Cobalt", "Delta", "Ember", "Falcon", "Granite", "Harbor", "Ion", "Juniper", "Keystone",
+    "Lumen", "Meridian", "Nimbus", "Orion", "Pulse", "Quartz", "Relay", "Summit", "Tidal", "Vector", "Zenith",
+]
+PROJECT_KINDS = ["Migration", "Platform", "Redesign", "Rollout", "Integration", "Analytics", "Modernization"]
+STAKEHOLDERS = ["CTO", "CPO", "VP Engineering", "Head of Sales", "Finance", "Legal", "Customer Success", "Security"]
+NOTE_TEMPLATES = [
+    "1:1 - discussed progress on {skill}.", "Delivered {project} milestone on time.",
+    "Needs support with {skill}.", "Mentored a new hire on {skill}.", "Raised concerns about workload.",
+    "Positive feedback from {project} stakeholders.", "Missed deadline on {project}.",
+]
+# Status path that ends in each goal's current status; each step is logged in goal_status_changes
+GOAL_PATHS = {
+    "Pending": ["Pending"],
+    "In Progress": ["Pending", "In Progress"],
+    "Achieved": ["Pending", "In Progress", "Achieved"],
+    "Blocked": ["Pending", "In Progress", "Blocked"],
+}
+GOAL_VERBS = ["Improve", "Learn", "Lead", "Ship", "Reduce", "Automate", "Document", "Mentor on"]
+
+
+@dataclass
+class Scale:
+    employees: int
+    projects: int
+    assignments_per_employee: float = 2.5
+    goals_per_employee: int = 10
+    note_years: int = 3
+    # Reports per manager; 3 makes scale 15 (75,000 people) about ten levels deep
+    span_of_control: int = 3
+
+    @classmethod
+    def from_factor(cls, factor: float) -> "Scale":
+        return cls(employees=max(1, int(5000 * factor)), projects=max(1, int(500 * factor)))
+
+
+class Weighted:
+    """Weighted choice with the cumulative weights computed once (``rng.choices`` redoes it per call)."""
+
+    def __init__(self, choices: List[tuple]):
+        self.values = [value for value, _ in choices]
+        self.cumulative = list(accumulate(weight for _, weight in choices))
+        self.total = self.cumulative[-1]
+
+    def pick(self, rng: random.Random):
+        return self.values[bisect(self.cumulative, rng.random() * self.total)]
+
+    def sample(self, rng: random.Random, k: int) -> List:
+        """Up to ``k`` distinct values (duplicates drawn are dropped)."""
+        return list(dict.fromkeys(self.pick(rng) for _ in range(k)))
+
+
+def batches(rows: Iterator[Dict], size: int = BATCH_SIZE) -> Iterator[List[Dict]]:
+    batch: List[Dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Generator:
+    """Row generators for each table. Ids are assigned here so references need no read-back."""
+
+    def __init__(self, scale: Scale, seed: int, first_ids: Dict[str, int]):
+        self.scale = scale
+        self.seed = seed
+        self.first_ids = first_ids
+        self.skills = Weighted(SKILLS)
+        self.roles = Weighted(ROLES)
+        self.potentials = Weighted(POTENTIALS)
+        self.goal_statuses = Weighted(GOAL_STATUSES)
+        self.project_statuses = Weighted(PROJECT_STATUSES)
+        # Per-row strftime/format calls dominate generation time at a million rows, so reuse them
+        self.dates = [(EPOCH + timedelta(days=day)).date().isoformat() for day in range(9 * 365)]
+        self.project_names = [self.project_name(project_id) for project_id in self.project_ids()]
+        self.goal_titles = {skill: [f"{verb} {skill}" for verb in GOAL_VERBS] for skill in self.skills.values}
+        # (id, employee, project, status, created) per goal, filled in by ``goals`` for ``goal_history``
+        self.goal_states: List[tuple] = []
+
+    def rng(self, table: str) -> random.Random:
+        # One stream per table, so changing one table's distribution leaves the others' data alone
+        return random.Random(f"{self.seed}:{table}")
+
+    def employee_ids(self) -> range:
+        start = self.first_ids["employees"]
+        return range(start, start + self.scale.employees)
+
+    def project_ids(self) -> range:
+        start = self.first_ids["projects"]
+        return range(start, start + self.scale.projects)
+
+    def manager_offset(self, offset: int) -> Optional[int]:
+        # Breadth-first complete tree: employee 0 runs the company
+        return (offset - 1) // self.scale.span_of_control if offset else None
+
+    def project_name(self, project_id: int) -> str:
+        offset = project_id - self.first_ids["projects"]
+        word = PROJECT_WORDS[offset % len(PROJECT_WORDS)]
+        kind = PROJECT_KINDS[(offset // len(PROJECT_WORDS)) % len(PROJECT_KINDS)]
+        return f"{word} {kind} {offset // (len(PROJECT_WORDS) * len(PROJECT_KINDS)) + 1}"
+
+    def employees(self) -> Iterator[Dict]:
+        rng = self.rng("employees")
+        dates, project_names = self.dates, self.project_names
+        first_id = self.first_ids["employees"]
+        for employee_id in self.employee_ids():
+            manager = self.manager_offset(employee_id - first_id)
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            skills = self.skills.sample(rng, rng.randint(2, 8))
+            hired = rng.randint(0, 5 * 365)
+            notes = [
+                f"{dates[hired + 30 * month]}: "
+                + rng.choice(NOTE_TEMPLATES).format(skill=rng.choice(skills), project=rng.choice(project_names))
+                for month in range(rng.randint(1, self.scale.note_years * 12))
+            ]
+            yield {
+                "id": employee_id,
+                "name": f"{first} {last}",
+                "role": self.roles.pick(rng),
+                "email": f"{first}.{last}.{employee_id}@example.com".lower(),
+                "skills": skills,
+                "development_plan": f"Grow {rng.choice(skills)} expertise." if rng.random() < 0.7 else None,
+                "notes": notes,
+                "potential": self.potentials.pick(rng),
+                "created_at": EPOCH + timedelta(days=hired),
+                "updated_at": None,
+                "manager_id": None if manager is None else first_id + manager,
+            }
+
+    def closure(self) -> Iterator[Dict]:
+        """``employee_closure`` rows for the tree built in ``employees`` (Core inserts skip the ORM events)."""
+        first_id = self.first_ids["employees"]
+        for employee_id in self.employee_ids():
+            offset: Optional[int] = employee_id - first_id
+            depth = 0
+            while offset is not None:
+                yield {"ancestor_id": first_id + offset, "descendant_id": employee_id, "depth": depth}
+                offset, depth = self.manager_offset(offset), depth + 1
+
+    def projects(self) -> Iterator[Dict]:
+        rng = self.rng("projects")
+        for project_id in self.project_ids():
+            yield {
+                "id": project_id,
+                "name": self.project_name(project_id),
+                "status": self.project_statuses.pick(rng),
+                "description": f"{rng.choice(PROJECT_KINDS)} work for {rng.choice(STAKEHOLDERS)}.",
+                "stakeholders": rng.sample(STAKEHOLDERS, rng.randint(1, 4)),
+                "created_at": EPOCH + timedelta(days=rng.randint(0, 6 * 365)),
+            }
+
+    def assignments(self) -> Iterator[Dict]:
+        rng = self.rng("project_assignments")
+        next_id = self.first_ids["project_assignments"]
+        projects = self.project_ids()
+        mean = self.scale.assignments_per_employee
+        for employee_id in self.employee_ids():
+            count = max(0, min(len(projects), round(rng.gauss(mean, 1))))
+            for project_id in rng.sample(projects, count):
+                yield {
+                    "id": next_id,
+                    "employee_id": employee_id,
+                    "project_id": project_id,
+                    "role": rng.choice(["Contributor", "Lead", "Reviewer", "Advisor"]),
+                    # Deliberately allows over-allocation (>100% in total) for capacity views
+                    "capacity": rng.choice([10, 20, 25, 40, 50, 60, 80, 100]),
+                }
+                next_id += 1
+
+    def goals(self) -> Iterator[Dict]:
+        rng = self.rng("goals")
+        # Separate stream: adding creation dates left the other goal columns as they were
+        created_rng = self.rng("goal_created")
+        next_id = self.first_ids["goals"]
+        projects = self.project_ids()
+        dates = self.dates[: 7 * 365]
+        skills = self.skills.values
+        descriptions = {skill: f"Build depth in {skill} through project work and review." for skill in skills}
+        metrics = {skill: f"- Ship one {skill} change per quarter.\n- Positive peer review." for skill in skills}
+        for employee_id in self.employee_ids():
+            for _ in range(self.scale.goals_per_employee):
+                skill = self.skills.pick(rng)
+                row = {
+                    "id": next_id,
+                    "title": rng.choice(self.goal_titles[skill]),
+                    "description": descriptions[skill],
+                    "status": self.goal_statuses.pick(rng),
+                    "due_date": rng.choice(dates),
+                    "success_metrics": metrics[skill],
+                    "manager_support": "- Monthly check-in.",
+                    "employee_id": employee_id,
+                    "project_id": rng.choice(projects) if rng.random() < 0.6 else None,
+                    "ai_suggestions": None,
+                    "created_at": EPOCH + timedelta(seconds=created_rng.randrange(7 * 365 * 86400)),
+                }
+                self.goal_states.append(
+                    (next_id, employee_id, row["project_id"], row["status"], row["created_at"])
+                )
+                yield row
+                next_id += 1
+
+    def goal_history(self) -> Iterator[Dict]:
+        """``goal_status_changes`` rows walking each goal from creation to its current status."""
+        rng = self.rng("goal_status_changes")
+        for goal_id, employee_id, project_id, status, created in self.goal_states:
+            changed, before = created, None
+            for after in GOAL_PATHS[status]:
+                yield {
+                    "goal_id": goal_id,
+                    "employee_id": employee_id,
+                    "project_id": project_id,
+                    "from_status": before,
+                    "to_status": after,
+                    "changed_at": changed,
+                    "age_seconds": int((changed - created).total_seconds()),
+                }
+                changed, before = changed + timedelta(seconds=rng.randrange(60 * 86400)), after
+
+
+def sync_url(url: str) -> str:
+    """The synchronous-driver equivalent of an async DATABASE_URL."""
+    parsed = make_url(url)
+    driver = {"sqlite+aiosqlite": "sqlite", "postgresql+asyncpg": "postgresql+psycopg2"}.get(parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False) if driver else url
+
+
+def next_ids(conn: Connection, tables: Dict[str, Table]) -> Dict[str, int]:
+    return {name: (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1 for name, table in tables.items()}
+
+
+def insert(conn: Connection, table: Table, rows: Iterator[Dict]) -> int:
+    count = 0
+    for batch in batches(rows):
+        conn.execute(table.insert(), batch)
+        count += len(batch)
+    return count
+
+
+def generate(database_url: str, scale: Scale, seed: int, reset: bool = False) -> Dict[str, float]:
+    engine = create_engine(sync_url(database_url))
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _fast_bulk_load(dbapi_connection, connection_record):
+            # Throwaway benchmark data: trade durability for load speed
+            dbapi_connection.execute("PRAGMA synchronous = OFF")
+            dbapi_connection.execute("PRAGMA journal_mode = MEMORY")
+
+    tables = {name: Base.metadata.tables[name] for name in ("employees", "projects", "project_assignments", "goals")}
+    if reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    stats: Dict[str, float] = {}
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        generator = Generator(scale, seed, next_ids(conn, tables))
+        steps: List[tuple[str, Callable[[], Iterator[Dict]]]] = [
+            ("employees", generator.employees),
+            ("projects", generator.projects),
+            ("project_assignments", generator.assignments),
+            ("goals", generator.goals),
+        ]
+        for name, rows in steps:
+            stats[name] = insert(conn, tables[name], rows())
+        stats["employee_closure"] = insert(conn, Base.metadata.tables["employee_closure"], generator.closure())
+        stats["goal_status_changes"] = insert(
+            conn, Base.metadata.tables["goal_status_changes"], generator.goal_history()
+        )
+        stats["goal_status_daily"] = rebuild_rollups(conn)
+        stats["employee_skills"] = rebuild_skills(conn)
+        stats["goal_signatures"] = rebuild_signatures(conn)
+        # Core inserts skip the counter events too; recount so the dashboard is right straight away
+        reconcile(conn)
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    derived = ("employee_closure", "goal_status_changes", "goal_status_daily", "employee_skills", "goal_signatures")
+    stats["rows_per_second"] = round(sum(stats[name] for name in (*tables, *derived)) / stats["seconds"])
+    engine.dispose()
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="1.0 = 5,000 employees / 50,000 goals")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    args = parser.parse_args()
+
+    stats = generate(args.database_url, Scale.from_factor(args.scale), args.seed, args.reset)
+    for name, value in stats.items():
+        print(f"{name:>20} {value:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""HTTP load benchmark for every read and write route.
+
+Logs in, discovers employee/project/goal ids by scraping the list pages, then
+drives each route in turn with ``--concurrency`` concurrent clients and reports
+requests per second and p50/p95/p99 latency per route as JSON::
+
+    # In-process (httpx ASGI transport) against DATABASE_URL
+    DATABASE_URL=sqlite+aiosqlite:///./bench.db python -m benchmarks.load --requests 200 --concurrency 10
+
+    # Against a running server
+    python -m benchmarks.load --url http://localhost:8000 --output run.json
+
+    # Compare with an earlier run
+    python -m benchmarks.load --baseline run.json
+
+Write routes create, edit and delete rows (deletes only touch rows the
+benchmark created itself), so point it at a throwaway database, e.g. one filled
+by ``python -m benchmarks.datagen``.
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+import time
+import uuid
+from contextlib import AsyncExitStack, redirect_stdout
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import httpx
+
+from app.config import settings
+
+Request = Tuple[str, Optional[Dict[str, object]]]
+
+
+@dataclass
+class Ids:
+    employees: List[int] = field(default_factory=list)
+    projects: List[int] = field(default_factory=list)
+    goals: List[int] = field(default_factory=list)
+    assignments: List[Tuple[int, int]] = field(default_factory=list)
+    skills: List[int] = field(default_factory=list)
+    # Rows created for the delete routes, consumed one per request
+    disposable_employees: List[int] = field(default_factory=list)
+    disposable_projects: List[int] = field(default_factory=list)
+    disposable_assignments: List[Tuple[int, int]] = field(default_factory=list)
+    # Project created to hold the disposable assignments, removed after the run
+    holder_project: Optional[int] = None
+
+
+def unbounded(ids: Ids) -> Optional[int]:
+    return None
+
+
+@dataclass
+class Route:
+    method: str
+    path: str
+    build: Callable[[Ids, int], Request]
+    # Upper bound on requests given the discovered ids (None: no bound); delete
+    # routes can only run as often as there are disposable rows
+    limit: Callable[[Ids], Optional[int]] = unbounded
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+def pick(values: Sequence, i: int):
+    return values[i % len(values)]
+
+
+def unique() -> str:
+    return uuid.uuid4().hex[:10]
+
+
+ROUTES: List[Route] = [
+    Route("GET", "/", lambda ids, i: ("/", None)),
+    Route("GET", "/login", lambda ids, i: ("/login", None)),
+    Route("GET", "/health", lambda ids, i: ("/health", None)),
+    Route("GET", "/employees/", lambda ids, i: ("/employees/", None)),
+    Route("GET", "/employees/new", lambda ids, i: ("/employees/new", None)),
+    Route("GET", "/employees/{employee_id}", lambda ids, i: (f"/employees/{pick(ids.employees, i)}", None)),
+    Route("GET", "/employees/{employee_id}/edit", lambda ids, i: (f"/employees/{pick(ids.employees, i)}/edit", None)),
+    Route("GET", "/employees/{employee_id}/org", lambda ids, i: (f"/employees/{pick(ids.employees, i)}/org", None)),
+    Route("GET", "/projects/", lambda ids, i: ("/projects/", None)),
+    Route("GET", "/projects/new", lambda ids, i: ("/projects/new", None)),
+    Route("GET", "/projects/{project_id}", lambda ids, i: (f"/projects/{pick(ids.projects, i)}", None)),
+    Route("GET", "/goals/", lambda ids, i: ("/goals/", None)),
+    Route("GET", "/goals/{goal_id}", lambda ids, i: (f"/goals/{pick(ids.goals, i)}", None)),
+    Route("GET", "/goals/duplicates", lambda ids, i: ("/goals/duplicates", None)),
+    Route("GET", "/goals/trends", lambda ids, i: (
+        f"/goals/trends?employee_id={pick(ids.employees, i)}&days=90" if i % 2 else "/goals/trends?days=90", None
+    )),
+    Route("GET", "/feedback", lambda ids, i: ("/feedback", None)),
+    Route("GET", "/feedback/admin", lambda ids, i: ("/feedback/admin", None)),
+    Route("GET", "/capacity", lambda ids, i: ("/capacity", None)),
+    Route("GET", "/audit/{entity}/{entity_id}", lambda ids, i: (f"/audit/employees/{pick(ids.employees, i)}", None)),
+    Route("GET", "/skills", lambda ids, i: ("/skills", None)),
+    Route("GET", "/skills/{skill_id}", lambda ids, i: (f"/skills/{pick(ids.skills, i)}", None),
+          limit=lambda ids: None if ids.skills else 0),
+    # Integration syncs: full pages, then a narrow field selection further in
+    Route("GET", "/api/v1/employees", lambda ids, i: (
+        f"/api/v1/employees?fields=name,email,skills&after={pick(ids.employees, i)}" if i % 2 else "/api/v1/employees",
+        None,
+    )),
+    Route("GET", "/api/v1/employees/{employee_id}", lambda ids, i: (
+        f"/api/v1/employees/{pick(ids.employees, i)}", None
+    )),
+    Route("GET", "/api/v1/projects", lambda ids, i: ("/api/v1/projects?limit=500", None)),
+    Route("GET", "/api/v1/projects/{project_id}", lambda ids, i: (f"/api/v1/projects/{pick(ids.projects, i)}", None)),
+    Route("GET", "/api/v1/assignments", lambda ids, i: (
+        f"/api/v1/assignments?employee_id={pick(ids.employees, i)}" if i % 2 else "/api/v1/assignments", None
+    )),
+    Route("GET", "/api/v1/assignments/{assignment_id}", lambda ids, i: (
+        f"/api/v1/assignments/{pick(ids.assignments, i)[1]}", None
+    ), limit=lambda ids: None if ids.assignments else 0),
+    Route("GET", "/api/v1/goals", lambda ids, i: (
+        f"/api/v1/goals?after={pick(ids.goals, i)}&limit=1000" if i % 2 else "/api/v1/goals?status=Blocked", None
+    )),
+    Route("GET", "/api/v1/goals/{goal_id}", lambda ids, i: (f"/api/v1/goals/{pick(ids.goals, i)}", None)),
+    Route("POST", "/employees/", lambda ids, i: ("/employees/", {
+        "name": f"Bench {unique()}", "role": "Engineer", "email": f"bench-{unique()}@example.com",
+        "skills": "Python, SQL",
+    })),
+    Route("POST", "/employees/{employee_id}/edit", lambda ids, i: (f"/employees/{pick(ids.employees, i)}/edit", {
+        "name": f"Bench Edited {i}", "role": "Engineer", "email": f"bench-edit-{unique()}@example.com",
+        "skills": "Python", "new_note": f"Benchmark note {i}",
+    })),
+    Route("POST", "/projects/", lambda ids, i: ("/projects/", {
+        "name": f"Bench Project {unique()}", "status": "Active", "stakeholders": "CTO, PM",
+    })),
+    Route("POST", "/projects/{project_id}/update", lambda ids, i: (f"/projects/{pick(ids.projects, i)}/update", {
+        "name": f"Bench Project {i}", "status": "Active", "description": "Benchmark", "stakeholders": "CTO",
+    })),
+    Route("POST", "/projects/{project_id}/assign", lambda ids, i: (f"/projects/{pick(ids.projects, i)}/assign", {
+        "employee_id": pick(ids.employees, i), "role": "Contributor", "capacity": 20,
+    })),
+    # A squad of up to eight in one request
+    Route("POST", "/projects/{project_id}/assign/bulk", lambda ids, i: (
+        f"/projects/{pick(ids.projects, i)}/assign/bulk", {
+            "employee_id": sorted({pick(ids.employees, i * 8 + n) for n in range(8)}),
+            "role": "Contributor", "capacity": 5,
+        },
+    )),
+    Route(
+        "POST", "/projects/{project_id}/assignments/{assignment_id}/update",
+        lambda ids, i: ("/projects/{}/assignments/{}/update".format(*pick(ids.assignments, i)), {
+            "role": "Contributor", "capacity": 10 + i % 50,
+        }),
+        limit=lambda ids: None if ids.assignments else 0,
+    ),
+    Route("POST", "/goals/", lambda ids, i: ("/goals/", {
+        "title": f"Bench goal {i}", "description": "Benchmark goal", "employee_id": pick(ids.employees, i),
+    })),
+    Route("POST", "/goals/bulk", lambda ids, i: ("/goals/bulk", {
+        "employee_id": sorted({pick(ids.employees, i + n) for n in range(8)}),
+        "title": f"Bench team goal {i}", "description": "Benchmark", "due_date": "Q4",
+    })),
+    Route("POST", "/goals/{goal_id}/status", lambda ids, i: (f"/goals/{pick(ids.goals, i)}/status", {
+        "status": ("Pending", "In Progress", "Achieved", "Blocked")[i % 4],
+    })),
+    Route("POST", "/goals/generate_suggestions", lambda ids, i: ("/goals/generate_suggestions", {
+        # Every other request has no project: answered from the off-hours suggestion when it is fresh
+        "employee_id": pick(ids.employees, i), **({"project_id": pick(ids.projects, i)} if i % 2 else {}),
+    })),
+    Route("POST", "/feedback", lambda ids, i: ("/feedback", {"feedback": f"Benchmark feedback {i}"})),
+    Route(
+        "POST", "/projects/{project_id}/assignments/{assignment_id}/delete",
+        lambda ids, i: ("/projects/{}/assignments/{}/delete".format(*ids.disposable_assignments.pop()), {}),
+        limit=lambda ids: len(ids.disposable_assignments),
+    ),
+    Route(
+        "POST", "/projects/{project_id}/delete",
+        lambda ids, i: (f"/projects/{ids.disposable_projects.pop()}/delete", {}),
+        limit=lambda ids: len(ids.disposable_projects),
+    ),
+    Route(
+        "POST", "/employees/{employee_id}/delete",
+        lambda ids, i: (f"/employees/{ids.disposable_employees.pop()}/delete", {}),
+        limit=lambda ids: len(ids.disposable_employees),
+    ),
+]
+
+
+def scrape(html: str, pattern: str) -> List[int]:
+    return sorted({int(value) for value in re.findall(pattern, html)})
+
+
+async def discover(client: httpx.AsyncClient) -> Ids:
+    ids = Ids(
+        employees=scrape((await client.get("/employees/")).text, r'href="/employees/(\d+)"'),
+        projects=scrape((await client.get("/projects/")).text, r'href="/projects/(\d+)"'),
+        skills=scrape((await client.get("/skills")).text, r'href="/skills/(\d+)"'),
+    )
+    # Goals are only linked from employee pages
+    for employee_id in ids.employees[:20]:
+        ids.goals += scrape((await client.get(f"/employees/{employee_id}")).text, r'href="/goals/(\d+)"')
+    if not (ids.employees and ids.projects and ids.goals):
+        raise SystemExit("Need employees, projects and goals; seed the database first (python -m benchmarks.datagen)")
+    for project_id in ids.projects[:20]:
+        html = (await client.get(f"/projects/{project_id}")).text
+        ids.assignments += [(project_id, a) for a in scrape(html, r"/assignments/(\d+)/update")]
+    return ids
+
+
+DELETE_EMPLOYEE = "POST /employees/{employee_id}/delete"
+DELETE_PROJECT = "POST /projects/{project_id}/delete"
+DELETE_ASSIGNMENT = "POST /projects/{project_id}/assignments/{assignment_id}/delete"
+
+
+async def create_projects(client: httpx.AsyncClient, count: int) -> List[int]:
+    before = set(scrape((await client.get("/projects/")).text, r'href="/projects/(\d+)"'))
+    for _ in range(count):
+        await client.post("/projects/", data={"name": f"Disposable {unique()}", "status": "Active"})
+    return sorted(set(scrape((await client.get("/projects/")).text, r'href="/projects/(\d+)"')) - before)
+
+
+async def create_disposables(client: httpx.AsyncClient, ids: Ids, count: int, routes: Set[str]) -> None:
+    """Create rows for the selected delete routes to remove, so existing data is left alone."""
+    if DELETE_EMPLOYEE in routes:
+        for _ in range(count):
+            await client.post("/employees/", data={"name": f"Disposable {unique()}", "role": "Temp",
+                                                   "email": f"disposable-{unique()}@example.com"})
+        employees = scrape((await client.get("/employees/")).text, r'href="/employees/(\d+)"')
+        ids.disposable_employees = sorted(set(employees) - set(ids.employees))
+
+    if DELETE_PROJECT in routes:
+        ids.disposable_projects = await create_projects(client, count)
+
+    if DELETE_ASSIGNMENT in routes:
+        # On a project of their own, so no real project's team changes
+        (ids.holder_project,) = await create_projects(client, 1)
+        for i in range(count):
+            await client.post(f"/projects/{ids.holder_project}/assign",
+                              data={"employee_id": pick(ids.employees, i), "role": "Temp", "capacity": 1})
+        html = (await client.get(f"/projects/{ids.holder_project}")).text
+        ids.disposable_assignments = [
+            (ids.holder_project, a) for a in scrape(html, r"/assignments/(\d+)/update")
+        ]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_route(client: httpx.AsyncClient, route: Route, ids: Ids, requests: int, concurrency: int) -> Dict:
+    available = route.limit(ids)
+    if available is not None:
+        requests = min(requests, available)
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            url, data = route.build(ids, i)
+            started = time.perf_counter()
+            response = await client.request(route.method, url, data=data)
+            latencies.append(time.perf_counter() - started)
+            # Writes answer with 303 redirects, which are not followed
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, requests)))))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed and latencies else 0.0,
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+    }
+
+
+def compare(results: Dict, baseline: Dict) -> Dict[str, Dict[str, float]]:
+    """Percentage change per route against a previous run (positive p95 = slower)."""
+    changes = {}
+    for name, current in results["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if not previous:
+            continue
+        changes[name] = {
+            metric: round((current[metric] - previous[metric]) / previous[metric] * 100, 1)
+            for metric in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            if previous.get(metric)
+        }
+    return changes
+
+
+async def run(
+    url: Optional[str], requests: int, concurrency: int, routes: Optional[List[str]] = None, warmup: int = 5
+) -> Dict:
+    async with AsyncExitStack() as stack:
+        if url is None:
+            from app.main import app
+
+            # Run startup (schema, seed) as a server would, keeping stdout for the report
+            with redirect_stdout(sys.stderr):
+                await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+            client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+        else:
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            client = httpx.AsyncClient(base_url=url, timeout=60, limits=limits)
+        await stack.enter_async_context(client)
+
+        response = await client.post(
+            "/login", data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD}
+        )
+        if "session_user" not in client.cookies:
+            raise SystemExit(f"Login failed ({response.status_code}); check ADMIN_USERNAME/ADMIN_PASSWORD")
+
+        ids = await discover(client)
+        selected = [route for route in ROUTES if not routes or route.name in routes]
+        await create_disposables(client, ids, requests, {route.name for route in selected})
+
+        results: Dict[str, Dict] = {}
+        for route in selected:
+            if warmup and route.method == "GET":
+                await run_route(client, route, ids, warmup, 1)
+            results[route.name] = await run_route(client, route, ids, requests, concurrency)
+        if ids.holder_project is not None:
+            await client.post(f"/projects/{ids.holder_project}/delete")
+
+    return {
+        "meta": {
+            "target": url or "asgi",
+            "database": settings.DATABASE_URL if url is None else None,
+            "requests_per_route": requests,
+            "concurrency": concurrency,
+            "employees": len(ids.employees),
+            "projects": len(ids.projects),
+            "goals": len(ids.goals),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "routes": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process ASGI app)")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--route", action="append", dest="routes", help='Only run e.g. "GET /goals/" (repeatable)')
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.url, args.requests, args.concurrency, args.routes))
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["change_pct"] = compare(results, json.load(f))
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Per-request overhead of the auth/CSRF middleware stack.
+
+Compares a bare app against the previous ``@app.middleware("http")`` +
+``BaseHTTPMiddleware`` setup and the current pure ASGI middleware::
+
+    python -m benchmarks.middleware --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Callable, Dict
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, RedirectResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware import PUBLIC_PATHS, AuthMiddleware, CSRFMiddleware, sign_session
+
+
+def bare_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/ping")
+    async def ping():
+        return PlainTextResponse("pong")
+
+    return app
+
+
+def legacy_app() -> FastAPI:
+    app = bare_app()
+
+    class PassthroughCSRF(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            return await call_next(request)
+
+    app.add_middleware(PassthroughCSRF)
+
+    @app.middleware("http")
+    async def auth_middleware(request: Request, call_next):
+        if any(request.url.path.startswith(path) for path in PUBLIC_PATHS):
+            return await call_next(request)
+        if not request.cookies.get("session_user"):
+            return RedirectResponse(url="/login", status_code=303)
+        return await call_next(request)
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = bare_app()
+    app.add_middleware(AuthMiddleware)
+    app.add_middleware(CSRFMiddleware)
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+    cookies = {"session_user": sign_session("bench")}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies=cookies) as client:
+        for _ in range(min(requests // 10, 200)):
+            await client.post("/ping")
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await client.post("/ping", headers={"Origin": "http://bench"})
+            assert response.status_code == 200
+        return (time.perf_counter() - started) / requests * 1e6
+
+
+async def run(requests: int) -> Dict[str, float]:
+    variants: Dict[str, Callable[[], FastAPI]] = {"bare": bare_app, "legacy": legacy_app, "asgi": asgi_app}
+    results = {name: await measure(factory(), requests) for name, factory in variants.items()}
+    return {
+        **{f"{name}_us_per_request": round(us, 1) for name, us in results.items()},
+        "legacy_overhead_us": round(results["legacy"] - results["bare"], 1),
+        "asgi_overhead_us": round(results["asgi"] - results["bare"], 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
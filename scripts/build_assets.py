@@ -0,0 +1,62 @@
+"""Build the static bundle: vendored htmx plus Tailwind CSS compiled from our templates.
+
+    python scripts/build_assets.py [--htmx-file htmx.min.js] [--css-file app.css]
+
+Writes content-hashed, gzip/brotli precompressed files and a manifest to
+``app/static/dist`` (see ``app.assets``). Tailwind is run through the
+``tailwindcss`` standalone CLI if it is on PATH, otherwise through ``npx``.
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.assets import write_bundle  # noqa: E402
+
+HTMX_VERSION = "1.9.10"
+HTMX_URL = f"https://unpkg.com/htmx.org@{HTMX_VERSION}/dist/htmx.min.js"
+TAILWIND_VERSION = "3.4.3"
+
+
+def fetch_htmx(htmx_file: Optional[Path] = None) -> bytes:
+    if htmx_file is not None:
+        return htmx_file.read_bytes()
+    print(f"Downloading htmx {HTMX_VERSION}")
+    with urllib.request.urlopen(HTMX_URL, timeout=30) as response:
+        return response.read()
+
+
+def build_css() -> bytes:
+    command = shutil.which("tailwindcss")
+    cli = [command] if command else ["npx", "--yes", f"tailwindcss@{TAILWIND_VERSION}"]
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "app.css"
+        subprocess.run(
+            [*cli, "-c", "tailwind.config.js", "-i", "assets/tailwind.css", "-o", str(output), "--minify"],
+            cwd=ROOT,
+            check=True,
+        )
+        return output.read_bytes()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--htmx-file", type=Path, help="Use a local htmx.min.js instead of downloading it")
+    parser.add_argument("--css-file", type=Path, help="Use an already compiled Tailwind stylesheet")
+    args = parser.parse_args()
+
+    css = args.css_file.read_bytes() if args.css_file else build_css()
+    manifest = write_bundle({"htmx.js": fetch_htmx(args.htmx_file), "app.css": css})
+    for name, path in manifest.items():
+        print(f"{name} -> /static/{path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Upgrade every tenant database (``MULTI_TENANT``) to the latest Alembic revision, in parallel.
+
+    python scripts/migrate_tenants.py [--jobs 8] [--dir tenants]
+
+Tenant files are ``*.db`` in ``TENANT_DATABASE_DIR`` (see ``app.tenancy``).
+The shared ``DATABASE_URL`` database is still migrated with ``alembic upgrade head``.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.config import settings  # noqa: E402
+from app.tenancy import migrate_tenants, tenant_files  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=None, help="Parallel migrations (default: CPU count)")
+    parser.add_argument("--dir", default=settings.TENANT_DATABASE_DIR, help="Directory of tenant .db files")
+    args = parser.parse_args()
+
+    settings.TENANT_DATABASE_DIR = args.dir
+    paths = tenant_files()
+    started = time.perf_counter()
+    for result in migrate_tenants(paths, args.jobs):
+        print(f"{result['tenant']:<24} {result['from']} -> {result['to']} ({result['seconds']}s)")
+    print(f"Migrated {len(paths)} tenant databases in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
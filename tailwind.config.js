@@ -0,0 +1,8 @@
+/** Tailwind build config; scripts/build_assets.py compiles assets/tailwind.css with it. */
+module.exports = {
+  content: ["./app/templates/**/*.html"],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};
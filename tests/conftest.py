@@ -1,8 +1,10 @@
 import pytest
 import pytest_asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from app.database import Base, get_db
+from app.config import settings
+from app.database import Base, get_db, get_shared_db
 from app.main import app
+from app.services.audit import audit_writer
 from typing import AsyncGenerator
 
 # Use in-memory SQLite for tests
@@ -13,6 +15,28 @@ TestingSessionLocal = async_sessionmaker(
     autocommit=False, autoflush=False, bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(monkeypatch):
+    # Any route going over its query_budget fails the test that hit it
+    monkeypatch.setattr(settings, "QUERY_BUDGET_MODE", "raise")
+
+@pytest.fixture(autouse=True)
+def enable_version_caches(monkeypatch):
+    # Off by default for multi-worker deployments; the suite runs in one process
+    monkeypatch.setattr(settings, "ETAGS_ENABLED", True)
+    monkeypatch.setattr(settings, "FRAGMENT_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "CAPACITY_CACHE_ENABLED", True)
+
+@pytest.fixture(autouse=True)
+def isolate_audit_writer(monkeypatch):
+    # Commits in any test queue audit entries; keep them in the test database and out of the next test
+    monkeypatch.setattr(audit_writer, "session_factory", TestingSessionLocal)
+    # A full batch would start its flush on the test's event loop, which is blocked (while holding
+    # the writer's lock) during TestClient requests; tests flush explicitly instead
+    monkeypatch.setattr(audit_writer, "max_batch", audit_writer.max_pending)
+    yield
+    audit_writer._buffer.clear()
+
 @pytest_asyncio.fixture(scope="function")
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with engine.begin() as conn:
@@ -29,6 +53,7 @@ def override_get_db(db_session: AsyncSession):
     async def _override_get_db():
         yield db_session
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_shared_db] = _override_get_db
     yield
     app.dependency_overrides.clear()
 
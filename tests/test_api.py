@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.models import Employee, Goal, Project, ProjectAssignment
+from app.routers import api
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def seed(db_session):
+    team = [Employee(name=f"E{i}", role="Dev", email=f"e{i}@test.com", skills=["Go"], notes=[]) for i in range(5)]
+    project = Project(name="Apollo", status="Active", stakeholders=["CTO"])
+    db_session.add_all(team + [project])
+    await db_session.flush()
+    db_session.add_all([
+        ProjectAssignment(employee_id=team[0].id, project_id=project.id, role="Lead", capacity=60),
+        Goal(title="Ship", description="d", status="Blocked", employee_id=team[0].id, project_id=project.id),
+        Goal(title="Learn", description="d", employee_id=team[1].id),
+    ])
+    await db_session.commit()
+    return team, project
+
+@pytest.mark.asyncio
+async def test_lists_page_by_id_with_selected_fields(db_session, override_get_db):
+    team, _ = await seed(db_session)
+    login(client)
+
+    first = client.get("/api/v1/employees?fields=name,skills&limit=2")
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "application/json"
+    assert first.json() == {
+        "data": [
+            {"id": team[0].id, "name": "E0", "skills": ["Go"]},
+            {"id": team[1].id, "name": "E1", "skills": ["Go"]},
+        ],
+        "next_after": team[1].id,
+    }
+    pages, url = [], "/api/v1/employees?fields=email&limit=2"
+    while True:
+        page = client.get(url).json()
+        pages.append([row["email"] for row in page["data"]])
+        if page["next_after"] is None:
+            break
+        url = f"/api/v1/employees?fields=email&limit=2&after={page['next_after']}"
+    assert pages == [["e0@test.com", "e1@test.com"], ["e2@test.com", "e3@test.com"], ["e4@test.com"]]
+
+    unknown = client.get("/api/v1/employees?fields=name,salary")
+    assert unknown.status_code == 400
+    assert "salary" in unknown.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_resources_filter_and_fetch_by_id(db_session, override_get_db):
+    team, project = await seed(db_session)
+    login(client)
+
+    blocked = client.get("/api/v1/goals?status=Blocked&fields=title,project_id").json()["data"]
+    assert blocked == [{"id": blocked[0]["id"], "title": "Ship", "project_id": project.id}]
+    assignments = client.get(f"/api/v1/assignments?employee_id={team[0].id}").json()["data"]
+    assert [(row["role"], row["capacity"]) for row in assignments] == [("Lead", 60)]
+
+    detail = client.get(f"/api/v1/projects/{project.id}").json()
+    assert detail["name"] == "Apollo" and detail["stakeholders"] == ["CTO"]
+    assert detail["created_at"]
+    assert client.get("/api/v1/goals/999").status_code == 404
+
+    etag = client.get(f"/api/v1/employees/{team[2].id}").headers["etag"]
+    assert client.get(f"/api/v1/employees/{team[2].id}", headers={"If-None-Match": etag}).status_code == 304
+
+def test_rows_are_encoded_with_orjson():
+    content = {"data": [{"id": 1, "name": "Zoë", "created_at": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)}]}
+    body = api.FastJSONResponse(content).body
+    assert body == '{"data":[{"id":1,"name":"Zoë","created_at":"2026-01-02T03:04:05+00:00"}]}'.encode()
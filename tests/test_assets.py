@@ -0,0 +1,87 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import assets, main
+from app.assets import IMMUTABLE, PrecompressedStaticFiles, asset_url, load_manifest, write_bundle
+
+CSS = b".btn{color:red}" * 50
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    manifest = write_bundle({"app.css": CSS, "htmx.js": b"htmx()"}, tmp_path)
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=tmp_path), name="static")
+    return TestClient(app), manifest
+
+
+def test_write_bundle_fingerprints_and_compresses(tmp_path):
+    manifest = write_bundle({"app.css": CSS}, tmp_path)
+    path = manifest["app.css"]
+    assert path.startswith("dist/app.") and path.endswith(".css")
+    assert (tmp_path / path).read_bytes() == CSS
+    assert gzip.decompress((tmp_path / f"{path}.gz").read_bytes()) == CSS
+    assert json.loads((tmp_path / "dist" / "manifest.json").read_text()) == manifest
+
+    # Same content, same name; changed content, new name
+    assert write_bundle({"app.css": CSS}, tmp_path) == manifest
+    assert write_bundle({"app.css": CSS + b"x"}, tmp_path)["app.css"] != path
+    assert not (tmp_path / path).exists()
+
+
+def test_serves_brotli_then_gzip_with_immutable_caching(bundle):
+    client, manifest = bundle
+    url = f"/static/{manifest['app.css']}"
+
+    pytest.importorskip("brotli")
+    response = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(CSS)
+    assert response.content == CSS  # decoded by the client
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == CSS
+
+
+def test_serves_identity_without_accept_encoding(bundle):
+    client, manifest = bundle
+    response = client.get(f"/static/{manifest['htmx.js']}", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.content == b"htmx()"
+
+
+def test_asset_url_uses_manifest_or_falls_back(tmp_path, monkeypatch):
+    load_manifest.cache_clear()
+    monkeypatch.setattr(assets, "load_manifest", lambda: load_manifest(tmp_path))
+    try:
+        assert asset_url("htmx.js").startswith("https://unpkg.com/")
+        assert asset_url("app.css") is None
+
+        load_manifest.cache_clear()
+        manifest = write_bundle({"app.css": CSS}, tmp_path)
+        assert asset_url("app.css") == f"/static/{manifest['app.css']}"
+    finally:
+        load_manifest.cache_clear()
+
+
+def test_login_page_uses_the_bundle(tmp_path, monkeypatch):
+    load_manifest.cache_clear()
+    monkeypatch.setattr(assets, "load_manifest", lambda: load_manifest(tmp_path))
+    try:
+        manifest = write_bundle({"app.css": CSS}, tmp_path)
+        page = TestClient(main.app).get("/login").text
+        assert f'href="/static/{manifest["app.css"]}"' in page
+        assert "cdn.tailwindcss.com" not in page
+    finally:
+        load_manifest.cache_clear()
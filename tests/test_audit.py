@@ -0,0 +1,134 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.main import app
+from app.models import AuditEntry, Employee, Project
+from app.routers import audit as audit_router
+from app.services import audit
+from app.services.audit import audit_writer
+from tests.conftest import TestingSessionLocal
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def history(db_session, entity, entity_id):
+    await audit_writer.flush()
+    result = await db_session.execute(
+        select(AuditEntry).where(AuditEntry.entity == entity, AuditEntry.entity_id == entity_id).order_by(AuditEntry.id)
+    )
+    return result.scalars().all()
+
+@pytest.mark.asyncio
+async def test_edits_are_audited_as_field_diffs_after_commit(db_session, override_get_db):
+    employee = Employee(name="Ann", role="Dev", email="ann@test.com", potential="P3", notes=["first"])
+    db_session.add(employee)
+    await db_session.commit()
+    employee_id = employee.id
+    login(client)
+
+    response = client.post(f"/employees/{employee_id}/edit", data={
+        "name": "Ann", "role": "Dev", "email": "ann@test.com", "potential": "P1",
+        "development_plan": "Lead the platform team", "new_note": "promoted",
+    }, follow_redirects=False)
+    assert response.status_code == 303
+    # Queued, not written by the request itself
+    assert audit_writer.pending == 2
+
+    created, updated = await history(db_session, "employees", employee_id)
+    assert created.action == "create" and created.changes["name"] == [None, "Ann"]
+    assert updated.action == "update" and updated.user == settings.ADMIN_USERNAME
+    assert updated.changes == {
+        "potential": ["P3", "P1"],
+        "development_plan": [None, "Lead the platform team"],
+        "notes": {"added": ["promoted"], "removed": []},
+    }
+
+@pytest.mark.asyncio
+async def test_rolled_back_changes_are_not_audited(db_session, override_get_db):
+    project = Project(name="Alpha")
+    db_session.add(project)
+    await db_session.commit()
+    project_id = project.id
+    await audit_writer.flush()
+
+    project.status = "On Hold"
+    await db_session.flush()
+    await db_session.rollback()
+    assert audit_writer.pending == 0
+    assert [entry.action for entry in await history(db_session, "projects", project_id)] == ["create"]
+
+@pytest.mark.asyncio
+async def test_bulk_deletes_are_audited(db_session, override_get_db):
+    project = Project(name="Alpha")
+    db_session.add(project)
+    await db_session.commit()
+    project_id = project.id
+    login(client)
+
+    client.post(f"/projects/{project_id}/delete")
+    assert [entry.action for entry in await history(db_session, "projects", project_id)] == ["create", "delete"]
+
+@pytest.mark.asyncio
+async def test_history_page_is_paginated_newest_first(db_session, override_get_db, monkeypatch):
+    monkeypatch.setattr(audit_router, "PAGE_SIZE", 2)
+    project = Project(name="v0")
+    db_session.add(project)
+    await db_session.commit()
+    for version in range(1, 4):
+        project.name = f"v{version}"
+        await db_session.commit()
+    login(client)
+
+    # The page only reads: entries still queued are not written by it
+    assert audit_writer.pending == 4
+    assert client.get(f"/audit/projects/{project.id}").text.count("&rarr;") == 0
+    assert audit_writer.pending == 4
+    await audit_writer.flush()
+
+    first = client.get(f"/audit/projects/{project.id}")
+    assert first.status_code == 200
+    assert "&rarr; v3" in first.text and "&rarr; v2" in first.text and "v0" not in first.text
+    assert "?before=" in first.text
+    before = first.text.split("?before=")[1].split('"')[0]
+
+    second = client.get(f"/audit/projects/{project.id}?before={before}")
+    assert "&rarr; v1" in second.text and "created" in second.text
+    assert "?before=" not in second.text
+
+    assert client.get("/audit/goals/1").status_code == 404
+
+@pytest.mark.asyncio
+async def test_a_failing_tenant_does_not_rewrite_the_others(db_session, monkeypatch):
+    class Tenants:
+        reachable = False
+
+        async def sessionmaker(self, tenant):
+            if not self.reachable:
+                raise OperationalError("connect", {}, Exception(f"{tenant}.db is locked"))
+            return TestingSessionLocal
+
+    tenants = Tenants()
+    monkeypatch.setattr(audit, "tenant_engines", tenants)
+    now = datetime.now(timezone.utc)
+    for tenant in (None, "acme", None):
+        audit_writer.enqueue({"entity": "projects", "entity_id": 1, "action": "update", "changes": {},
+                              "user": tenant, "tenant": tenant, "created_at": now})
+
+    assert await audit_writer.flush() == 2
+    assert await audit_writer.flush() == 0
+    assert audit_writer.pending == 1
+
+    tenants.reachable = True
+    assert await audit_writer.flush() == 1
+    users = (await db_session.execute(select(AuditEntry.user).order_by(AuditEntry.id))).scalars().all()
+    assert users == [None, None, "acme"]
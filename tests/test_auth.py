@@ -32,7 +32,7 @@ def test_login_failure():
     assert response.status_code == 200
     assert "Invalid credentials" in response.text
 
-def test_access_protected_route():
+def test_access_protected_route(db_session, override_get_db):
     # Login first
     client.post(
         "/login",
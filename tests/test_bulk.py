@@ -0,0 +1,105 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.main import app
+from app.models import Employee, Goal, GoalStatusChange, Project, ProjectAssignment, TeamCounters
+from app.query_budget import QueryLog, _current
+from app.services import bulk
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def seed(db_session, size=10):
+    team = [Employee(name=f"E{i}", role="Dev", email=f"e{i}@test.com") for i in range(size)]
+    projects = [Project(name="Apollo", status="Active"), Project(name="Gemini", status="Active")]
+    db_session.add_all(team + projects)
+    await db_session.commit()
+    return [employee.id for employee in team], [project.id for project in projects]
+
+def post_logged(url, data):
+    log = QueryLog()
+    token = _current.set(log)
+    try:
+        response = client.post(url, data=data, follow_redirects=False)
+    finally:
+        _current.reset(token)
+    return response, log.statements
+
+def test_spread_repeats_single_values():
+    assert bulk.spread(2, {"employee_id": [1, 2], "role": ["Dev"]}) == [
+        {"employee_id": 1, "role": "Dev"}, {"employee_id": 2, "role": "Dev"},
+    ]
+    with pytest.raises(bulk.BulkError, match="role needs 1 or 3 values, got 2"):
+        bulk.spread(3, {"employee_id": [1, 2, 3], "role": ["Dev", "Lead"]})
+
+@pytest.mark.asyncio
+async def test_bulk_assign_is_one_insert_however_many_rows(db_session, override_get_db):
+    team, (apollo, gemini) = await seed(db_session)
+    login(client)
+
+    pair, pair_statements = post_logged(f"/projects/{apollo}/assign/bulk", {
+        "employee_id": team[:2], "role": ["Lead", "Dev"], "capacity": [60, 40],
+    })
+    squad, squad_statements = post_logged(f"/projects/{gemini}/assign/bulk", {
+        "employee_id": team[:1] + team[2:], "role": "Dev", "capacity": 80,
+    })
+    assert pair.status_code == squad.status_code == 303
+    assert squad.headers["location"] == f"/projects/{gemini}"
+    # The same statements for 2 rows as for 9 (only the squad pushes someone over 100% and updates that counter)
+    assert len(pair_statements) == len([s for s in squad_statements if not s.startswith("UPDATE team_counters")])
+    assert sum(s.startswith("INSERT INTO project_assignments") for s in squad_statements) == 1
+
+    rows = (await db_session.execute(
+        select(ProjectAssignment.project_id, ProjectAssignment.role, ProjectAssignment.capacity)
+        .order_by(ProjectAssignment.id)
+    )).all()
+    assert rows[:2] == [(apollo, "Lead", 60), (apollo, "Dev", 40)]
+    assert rows[2:] == [(gemini, "Dev", 80)] * 9
+    # Session events saw the batch like any other write
+    db_session.expire_all()
+    assert (await db_session.get(TeamCounters, 1)).over_allocated == 1
+
+@pytest.mark.asyncio
+async def test_invalid_batch_reports_every_problem_and_writes_nothing(db_session, override_get_db):
+    team, (apollo, _) = await seed(db_session, size=2)
+    login(client)
+
+    response = client.post(f"/projects/{apollo}/assign/bulk", data={
+        "employee_id": [team[0], team[0], 999], "role": ["Dev", "", "Dev"], "capacity": 150,
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == [
+        "Unknown employees: 999", f"Employees listed twice: {team[0]}",
+        "Every assignment needs a role", "Capacity must be between 1 and 100",
+    ]
+    assert client.post("/projects/999/assign/bulk", data={"employee_id": team, "role": "Dev"}).status_code == 404
+
+    mismatched = client.post("/goals/bulk", data={
+        "employee_id": team, "title": ["One", "Two", "Three"], "description": "d",
+    })
+    assert mismatched.status_code == 400
+    assert mismatched.json()["detail"] == ["title needs 1 or 2 values, got 3"]
+    assert (await db_session.execute(select(func.count(ProjectAssignment.id)))).scalar() == 0
+    assert (await db_session.execute(select(func.count(Goal.id)))).scalar() == 0
+
+@pytest.mark.asyncio
+async def test_bulk_goals_for_a_team(db_session, override_get_db):
+    team, _ = await seed(db_session, size=3)
+    login(client)
+
+    response = client.post("/goals/bulk", data={
+        "employee_id": team, "title": "Write a design doc", "description": "One per quarter.", "due_date": "Q3",
+    }, follow_redirects=False)
+    assert response.status_code == 303
+    goals = (await db_session.execute(select(Goal).order_by(Goal.id))).scalars().all()
+    assert [(goal.employee_id, goal.title, goal.due_date) for goal in goals] == [
+        (employee_id, "Write a design doc", "Q3") for employee_id in team
+    ]
+    assert (await db_session.execute(select(func.count(GoalStatusChange.id)))).scalar() == 3
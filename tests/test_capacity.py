@@ -0,0 +1,79 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.models import Employee, Project, ProjectAssignment
+from app.services.capacity import capacity_cache
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def seed(db_session):
+    busy = Employee(name="Busy Bee", role="Dev", email="busy@test.com")
+    idle = Employee(name="Idle Ian", role="Dev", email="idle@test.com")
+    steady = Employee(name="Steady Sue", role="Dev", email="steady@test.com")
+    alpha = Project(name="Alpha", status="Active")
+    beta = Project(name="Beta", status="Active")
+    db_session.add_all([busy, idle, steady, alpha, beta])
+    await db_session.flush()
+    db_session.add_all([
+        ProjectAssignment(employee_id=busy.id, project_id=alpha.id, role="Dev", capacity=80),
+        ProjectAssignment(employee_id=busy.id, project_id=beta.id, role="Dev", capacity=40),
+        ProjectAssignment(employee_id=steady.id, project_id=alpha.id, role="Dev", capacity=100),
+    ])
+    await db_session.commit()
+    return busy, idle, steady, alpha, beta
+
+@pytest.mark.asyncio
+async def test_capacity_report_aggregates_in_one_query(db_session, override_get_db):
+    capacity_cache.clear()
+    busy, idle, steady, alpha, beta = await seed(db_session)
+
+    report = await capacity_cache.get(db_session)
+    totals = {e.name: (e.total, e.assignments) for e in report.employees}
+    assert totals == {"Busy Bee": (120, 2), "Idle Ian": (0, 0), "Steady Sue": (100, 1)}
+    assert {p.name: p.fte for p in report.projects} == {"Alpha": 1.8, "Beta": 0.4}
+    assert report.staffed_fte == 2.2
+    assert [e.name for e in report.over_allocated] == ["Busy Bee"]
+    assert [e.name for e in report.under_allocated] == ["Idle Ian"]
+
+@pytest.mark.asyncio
+async def test_capacity_report_is_cached_until_an_assignment_changes(db_session, override_get_db, monkeypatch):
+    capacity_cache.clear()
+    busy, idle, steady, alpha, beta = await seed(db_session)
+
+    first = await capacity_cache.get(db_session)
+    assert await capacity_cache.get(db_session) is first
+
+    db_session.add(ProjectAssignment(employee_id=idle.id, project_id=beta.id, role="Dev", capacity=60))
+    await db_session.commit()
+
+    second = await capacity_cache.get(db_session)
+    assert second is not first
+    assert [e.name for e in second.under_allocated] == []
+
+    # Without the setting every request builds the report
+    monkeypatch.setattr(settings, "CAPACITY_CACHE_ENABLED", False)
+    assert await capacity_cache.get(db_session) is not await capacity_cache.get(db_session)
+
+@pytest.mark.asyncio
+async def test_capacity_page(db_session, override_get_db):
+    capacity_cache.clear()
+    await seed(db_session)
+    login(client)
+
+    response = client.get("/capacity")
+    assert response.status_code == 200
+    assert "Capacity Planning" in response.text
+    assert "120%" in response.text
+    assert "1.80 FTE" in response.text
+
+    # Reassigning through the UI invalidates the cached report
+    client.post("/projects/2/assign", data={"employee_id": 2, "role": "Dev", "capacity": 150})
+    response = client.get("/capacity")
+    assert "150%" in response.text
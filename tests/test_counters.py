@@ -0,0 +1,125 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.main import app
+from app.models import Employee, Goal, Project, ProjectAssignment, TeamCounters
+from app.services import counters
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def stored(db_session):
+    db_session.expunge_all()
+    return await counters.read(db_session)
+
+async def actual(db_session):
+    return dict((await db_session.execute(counters.actual_counts())).mappings().one())
+
+@pytest.mark.asyncio
+async def test_orm_writes_keep_counters_in_step(db_session, override_get_db):
+    assert await stored(db_session) == dict.fromkeys(counters.COUNTERS, 0)
+
+    ann = Employee(name="Ann", role="Dev", email="ann@test.com")
+    bob = Employee(name="Bob", role="Dev", email="bob@test.com")
+    alpha = Project(name="Alpha")
+    beta = Project(name="Beta", status="On Hold")
+    db_session.add_all([ann, bob, alpha, beta])
+    await db_session.flush()
+    first = ProjectAssignment(employee_id=ann.id, project_id=alpha.id, role="Dev", capacity=80)
+    db_session.add_all([
+        first,
+        ProjectAssignment(employee_id=ann.id, project_id=beta.id, role="Dev", capacity=40),
+        Goal(title="g1", description="d", employee_id=ann.id),
+        Goal(title="g2", description="d", employee_id=bob.id, status="Blocked"),
+    ])
+    await db_session.commit()
+    assert await stored(db_session) == await actual(db_session) == {
+        "employees": 2, "active_projects": 1, "pending_goals": 1, "blocked_goals": 1, "over_allocated": 1,
+    }
+
+    first = await db_session.get(ProjectAssignment, first.id)
+    first.capacity = 50
+    beta = await db_session.get(Project, beta.id)
+    beta.status = "Active"
+    goal = (await db_session.execute(select(Goal).where(Goal.title == "g1"))).scalar_one()
+    goal.status = "Blocked"
+    await db_session.commit()
+    assert await stored(db_session) == await actual(db_session) == {
+        "employees": 2, "active_projects": 2, "pending_goals": 0, "blocked_goals": 2, "over_allocated": 0,
+    }
+
+    # Moving an assignment to someone else can push them over
+    first = await db_session.get(ProjectAssignment, first.id)
+    first.employee_id = bob.id
+    first.capacity = 120
+    await db_session.commit()
+    assert (await stored(db_session))["over_allocated"] == (await actual(db_session))["over_allocated"] == 1
+
+    # A rolled-back write leaves the counters alone
+    db_session.add(Employee(name="Cat", role="Dev", email="cat@test.com"))
+    await db_session.flush()
+    await db_session.rollback()
+    assert (await stored(db_session))["employees"] == 2
+
+@pytest.mark.asyncio
+async def test_bulk_delete_routes_update_counters(db_session, override_get_db):
+    ann = Employee(name="Ann", role="Dev", email="ann@test.com")
+    bob = Employee(name="Bob", role="Dev", email="bob@test.com")
+    alpha = Project(name="Alpha")
+    db_session.add_all([ann, bob, alpha])
+    await db_session.flush()
+    over = ProjectAssignment(employee_id=ann.id, project_id=alpha.id, role="Dev", capacity=90)
+    db_session.add_all([
+        over,
+        ProjectAssignment(employee_id=ann.id, project_id=alpha.id, role="Dev", capacity=30),
+        ProjectAssignment(employee_id=bob.id, project_id=alpha.id, role="Dev", capacity=150),
+    ])
+    await db_session.commit()
+    bob_id, alpha_id, over_id = bob.id, alpha.id, over.id
+    assert (await stored(db_session))["over_allocated"] == 2
+    login(client)
+
+    client.post(f"/projects/{alpha_id}/assignments/{over_id}/delete")
+    assert await stored(db_session) == await actual(db_session)
+    assert (await stored(db_session))["over_allocated"] == 1
+
+    client.post(f"/employees/{bob_id}/delete")
+    client.post(f"/projects/{alpha_id}/delete")
+    assert await stored(db_session) == await actual(db_session) == {
+        "employees": 1, "active_projects": 0, "pending_goals": 0, "blocked_goals": 0, "over_allocated": 0,
+    }
+
+@pytest.mark.asyncio
+async def test_reconcile_corrects_drift(db_session, override_get_db, caplog):
+    db_session.add(Employee(name="Ann", role="Dev", email="ann@test.com"))
+    await db_session.commit()
+    # A Core write skips the session events
+    await db_session.execute(update(TeamCounters).values(employees=7))
+    await db_session.commit()
+
+    with caplog.at_level(logging.WARNING, logger="app.services.counters"):
+        drift = await db_session.run_sync(lambda session: counters.reconcile(session.connection()))
+    await db_session.commit()
+    assert drift == {"employees": -6}
+    assert "drift" in caplog.text
+    assert (await stored(db_session))["employees"] == 1
+
+@pytest.mark.asyncio
+async def test_dashboard_renders_counters(db_session, override_get_db):
+    db_session.add_all([Project(name="Alpha"), Goal(title="g", description="d")])
+    await db_session.commit()
+    login(client)
+
+    response = client.get("/")
+    assert response.status_code == 200
+    assert "Active Projects" in response.text
+    assert "Pending Goals" in response.text
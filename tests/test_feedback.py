@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.main import app
+from app.config import settings
+from app.models import Feedback
+from app.routers.feedback import feedback_writer, PAGE_SIZE
+from app.services.batch_writer import BatchWriter
+from tests.conftest import TestingSessionLocal
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+@pytest.fixture
+def writer_to_test_db(monkeypatch):
+    monkeypatch.setattr(feedback_writer, "session_factory", TestingSessionLocal)
+    yield feedback_writer
+
+@pytest.mark.asyncio
+async def test_feedback_is_buffered_and_shown_in_admin(db_session, override_get_db, writer_to_test_db):
+    login(client)
+    response = client.post("/feedback", data={"feedback": "Love the goals page"})
+    assert response.status_code == 200
+    assert "Thank you for your feedback!" in response.text
+
+    # Still buffered: nothing written until a batch fills or the timer fires
+    assert feedback_writer.pending == 1
+    assert (await db_session.execute(select(Feedback))).scalars().all() == []
+
+    # The admin view flushes this process's buffer first
+    response = client.get("/feedback/admin")
+    assert response.status_code == 200
+    assert "Love the goals page" in response.text
+    assert feedback_writer.pending == 0
+
+    entry = (await db_session.execute(select(Feedback))).scalar_one()
+    assert entry.user == settings.ADMIN_USERNAME
+
+@pytest.mark.asyncio
+async def test_feedback_admin_paginates(db_session, override_get_db, writer_to_test_db):
+    login(client)
+    for i in range(PAGE_SIZE + 5):
+        await feedback_writer.submit({"user": "admin", "message": f"note {i:03d}"})
+
+    first = client.get("/feedback/admin").text
+    assert "Page 1 of 2" in first
+    assert f"note {PAGE_SIZE + 4:03d}" in first
+    assert "note 000" not in first
+
+    second = client.get("/feedback/admin?page=2").text
+    assert "note 000" in second
+    assert f"note {PAGE_SIZE + 4:03d}" not in second
+
+@pytest.mark.asyncio
+async def test_batch_writer_flushes_on_size_timer_and_close(db_session):
+    writer = BatchWriter(Feedback, max_batch=3, max_delay=0.05, session_factory=TestingSessionLocal)
+
+    for i in range(4):
+        await writer.submit({"user": "u", "message": f"size {i}"})
+    # One full batch written with a single INSERT, one row left over
+    assert writer.written == 3
+    assert writer.pending == 1
+
+    writer.start()
+    await writer.submit({"user": "u", "message": "timer"})
+    await asyncio.sleep(0.2)
+    assert writer.pending == 0
+    assert writer.written == 5
+
+    await writer.submit({"user": "u", "message": "shutdown"})
+    await writer.close()
+    assert writer.pending == 0
+
+    async with TestingSessionLocal() as session:
+        messages = (await session.execute(select(Feedback.message))).scalars().all()
+    assert len(messages) == 6
+
+@pytest.mark.asyncio
+async def test_batch_writer_drops_only_rows_the_database_rejects(db_session):
+    writer = BatchWriter(Feedback, max_batch=10, session_factory=TestingSessionLocal)
+    for i in range(7):
+        # Two rows violate NOT NULL; they must not hold back the others
+        await writer.submit({"user": "u", "message": None if i in (2, 5) else f"ok {i}"})
+
+    assert await writer.flush() == 5
+    assert writer.pending == 0
+    assert writer.dropped == 2
+    async with TestingSessionLocal() as session:
+        messages = (await session.execute(select(Feedback.message).order_by(Feedback.id))).scalars().all()
+    assert messages == ["ok 0", "ok 1", "ok 3", "ok 4", "ok 6"]
+
+@pytest.mark.asyncio
+async def test_batch_writer_keeps_rows_while_database_is_unavailable(tmp_path):
+    unreachable = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/feedback.db")
+    writer = BatchWriter(
+        Feedback, max_batch=10, max_pending=2, session_factory=async_sessionmaker(unreachable)
+    )
+    for i in range(3):
+        await writer.submit({"user": "u", "message": f"later {i}"})
+
+    assert await writer.flush() == 0
+    assert writer.pending == 2
+    assert writer.dropped == 1
+    await unreachable.dispose()
@@ -0,0 +1,58 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app.main import app
+from app.config import settings
+from app.fragments import fragment_cache
+from app.models import Employee, Project
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+@pytest.mark.asyncio
+async def test_unchanged_cards_are_reused(db_session, override_get_db):
+    login(client)
+    client.post("/employees/", data={"name": "Card One", "role": "Dev", "email": "one@test.com"})
+    client.post("/employees/", data={"name": "Card Two", "role": "Dev", "email": "two@test.com"})
+    client.post("/projects/", data={"name": "Fragment Project", "status": "Active"})
+
+    one = (await db_session.execute(select(Employee).filter_by(email="one@test.com"))).scalar_one()
+    project = (await db_session.execute(select(Project).filter_by(name="Fragment Project"))).scalar_one()
+
+    first = client.get("/employees/").text
+    hits = fragment_cache.hits
+    assert client.get("/employees/").text == first
+    assert fragment_cache.hits == hits + 2
+
+    # Only the card of the employee whose assignments changed is re-rendered
+    client.post(f"/projects/{project.id}/assign", data={"employee_id": one.id, "role": "Lead", "capacity": 120})
+    db_session.expunge_all()
+    hits, misses = fragment_cache.hits, fragment_cache.misses
+    response = client.get("/employees/")
+    assert fragment_cache.hits == hits + 1
+    assert fragment_cache.misses == misses + 1
+    assert "Fragment Project (Lead)" in response.text
+    assert "Total Capacity: 120%" in response.text
+
+@pytest.mark.asyncio
+async def test_project_rename_refreshes_employee_cards(db_session, override_get_db):
+    login(client)
+    client.post("/employees/", data={"name": "Renamed Worker", "role": "Dev", "email": "renamed@test.com"})
+    client.post("/projects/", data={"name": "Old Name", "status": "Active"})
+    emp = (await db_session.execute(select(Employee).filter_by(email="renamed@test.com"))).scalar_one()
+    project = (await db_session.execute(select(Project).filter_by(name="Old Name"))).scalar_one()
+    client.post(f"/projects/{project.id}/assign", data={"employee_id": emp.id, "role": "Dev", "capacity": 50})
+
+    db_session.expunge_all()
+    assert "Old Name (Dev)" in client.get("/employees/").text
+
+    client.post(f"/projects/{project.id}/update", data={"name": "New Name", "status": "Active"})
+    db_session.expunge_all()
+    response = client.get("/employees/")
+    assert "New Name (Dev)" in response.text
+    assert "Old Name" not in response.text
@@ -0,0 +1,151 @@
+import sqlite3
+
+import pytest
+from alembic import command
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete, insert, select
+
+from app.config import settings
+from app.database import Base
+from app.main import app
+from app.models import Employee, Goal, GoalBucket, GoalSignature
+from app.services import goal_duplicates
+from app.services.goal_duplicates import duplicate_groups, near_duplicates, signature, similarity
+from app.startup import alembic_config
+
+client = TestClient(app)
+
+PYTHON = "Enhance skills in Python based on General Improvement. Focus on async patterns and testing."
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+def test_signatures_estimate_text_similarity():
+    original = signature("Improve Python Proficiency", PYTHON)
+    assert similarity(original, signature("improve python proficiency", PYTHON + "!")) == 1.0
+    reworded = signature("Improve Python Proficiency", PYTHON.replace("testing", "profiling"))
+    assert goal_duplicates.THRESHOLD <= similarity(original, reworded) < 1.0
+    assert similarity(original, signature("Learn Kubernetes", "Run the staging cluster for a quarter.")) < 0.2
+
+@pytest.mark.asyncio
+async def test_signatures_follow_goal_writes(db_session, override_get_db):
+    first = Goal(title="Improve Python Proficiency", description=PYTHON)
+    second = Goal(title="Improve Python Proficiency", description=PYTHON)
+    other = Goal(title="Learn Kubernetes", description="Run the staging cluster for a quarter.")
+    db_session.add_all([first, second, other])
+    await db_session.commit()
+    assert [goal.id for goal, _ in await near_duplicates(db_session, first.id)] == [second.id]
+    assert await near_duplicates(db_session, other.id) == []
+
+    second.title, second.description = "Learn Kubernetes", "Run the staging cluster for a quarter!"
+    await db_session.commit()
+    assert await near_duplicates(db_session, first.id) == []
+    assert [goal.id for goal, _ in await near_duplicates(db_session, other.id)] == [second.id]
+
+    await db_session.delete(second)
+    await db_session.commit()
+    assert await near_duplicates(db_session, other.id) == []
+    remaining = (await db_session.execute(select(GoalBucket.goal_id).distinct())).scalars().all()
+    assert sorted(remaining) == sorted([first.id, other.id])
+
+@pytest.mark.asyncio
+async def test_creating_a_duplicate_flags_it(db_session, override_get_db):
+    employee = Employee(name="Ann", role="Dev", email="ann@test.com")
+    db_session.add(employee)
+    await db_session.flush()
+    db_session.add(Goal(title="Improve Python Proficiency", description=PYTHON, employee_id=employee.id))
+    await db_session.commit()
+    employee_id = employee.id
+    login(client)
+
+    fresh = client.post("/goals/", data={
+        "title": "Present at a conference", "description": "Give a talk on our platform.", "employee_id": employee_id,
+    }, follow_redirects=False)
+    assert fresh.headers["location"] == "/goals"
+
+    duplicate = client.post("/goals/", data={
+        "title": "Improve python proficiency", "description": PYTHON, "employee_id": employee_id,
+    }, follow_redirects=False)
+    assert duplicate.status_code == 303
+    assert duplicate.headers["location"].startswith("/goals/")
+    page = client.get(duplicate.headers["location"])
+    assert "This goal looks like 1 other goal" in page.text
+    assert "100% similar" in page.text
+
+@pytest.mark.asyncio
+async def test_duplicate_report_groups_similar_goals(db_session, override_get_db):
+    db_session.add_all(
+        [Goal(title="Improve Python Proficiency", description=PYTHON) for _ in range(3)]
+        + [Goal(title="Learn Kubernetes", description="Run the staging cluster for a quarter.") for _ in range(2)]
+        + [Goal(title="Present at a conference", description="Give a talk on our platform.")]
+    )
+    await db_session.commit()
+
+    report = await duplicate_groups(db_session)
+    assert (report.group_count, report.goal_count) == (2, 5)
+    assert [group.size for group in report.groups] == [3, 2]
+    assert {goal.title for goal in report.groups[0].goals} == {"Improve Python Proficiency"}
+
+    # Same result from signatures recomputed in bulk
+    await db_session.run_sync(lambda session: goal_duplicates.rebuild(session.connection(), batch_size=4))
+    await db_session.commit()
+    assert len((await db_session.execute(select(GoalSignature.goal_id))).scalars().all()) == 6
+    assert [group.size for group in (await duplicate_groups(db_session)).groups] == [3, 2]
+
+    login(client)
+    response = client.get("/goals/duplicates")
+    assert response.status_code == 200
+    assert "5 goals in 2 groups" in response.text
+
+@pytest.mark.asyncio
+async def test_duplicate_report_checks_every_pair_in_a_bucket(db_session, override_get_db):
+    unrelated = Goal(title="Learn Kubernetes", description="Run the staging cluster for a quarter.")
+    first = Goal(title="Improve Python Proficiency", description=PYTHON)
+    second = Goal(title="Improve Python Proficiency", description=PYTHON)
+    db_session.add_all([unrelated, first, second])
+    await db_session.commit()
+    # Leave the three goals sharing one bucket, where the lowest id is unlike the other two
+    await db_session.execute(delete(GoalBucket))
+    await db_session.execute(insert(GoalBucket), [
+        {"band": 0, "bucket": 1, "goal_id": goal.id} for goal in (unrelated, first, second)
+    ])
+    await db_session.commit()
+
+    report = await duplicate_groups(db_session)
+    assert [[goal.id for goal in group.goals] for group in report.groups] == [[first.id, second.id]]
+
+    # Past PAIRED_BUCKET_SIZE only pairs with the bucket's first goal are checked
+    goal_duplicates.PAIRED_BUCKET_SIZE, size = 2, goal_duplicates.PAIRED_BUCKET_SIZE
+    try:
+        assert (await duplicate_groups(db_session)).groups == []
+    finally:
+        goal_duplicates.PAIRED_BUCKET_SIZE = size
+
+def test_migration_signs_goals_on_its_own(tmp_path):
+    path = tmp_path / "before_signatures.db"
+    config = alembic_config()
+    config.attributes["database_url"] = f"sqlite+aiosqlite:///{path}"
+    config.attributes["configure_logger"] = False
+    # The tables as they were just before goal signatures (the revision chain starts from an existing schema)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[
+        table for table in Base.metadata.sorted_tables if table.name not in ("goal_signatures", "goal_buckets")
+    ])
+    engine.dispose()
+    command.stamp(config, "d4f6b8a0c2e5")
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO goals (title, description, status) VALUES (?, ?, 'Pending')", [
+            ("Improve Python Proficiency", PYTHON),
+            ("Learn Kubernetes", "Run the staging cluster for a quarter."),
+        ])
+
+    command.upgrade(config, "e5a7c9b1d3f6")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT goal_id, signature FROM goal_signatures ORDER BY goal_id").fetchall() == [
+            (1, signature("Improve Python Proficiency", PYTHON)),
+            (2, signature("Learn Kubernetes", "Run the staging cluster for a quarter.")),
+        ]
+        assert conn.execute("SELECT count(*) FROM goal_buckets").fetchone() == (2 * goal_duplicates.BANDS,)
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.config import settings
+from app.main import app
+from app.models import Employee, Goal, GoalStatusChange, GoalStatusDaily, Project
+from app.services.goal_history import rebuild_rollups, trend
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def seed(db_session):
+    employee = Employee(name="Goal Getter", role="Dev", email="getter@test.com")
+    project = Project(name="Apollo", status="Active")
+    db_session.add_all([employee, project])
+    await db_session.flush()
+    goal = Goal(title="Ship it", description="d", employee_id=employee.id, project_id=project.id)
+    db_session.add(goal)
+    await db_session.commit()
+    return employee, project, goal
+
+async def rollups(db_session):
+    rows = (await db_session.execute(select(GoalStatusDaily))).scalars().all()
+    return {(r.scope, r.status): (r.entered, r.exited) for r in rows}
+
+@pytest.mark.asyncio
+async def test_status_changes_are_logged_and_rolled_up(db_session, override_get_db):
+    employee, project, goal = await seed(db_session)
+
+    goal.status = "In Progress"
+    await db_session.commit()
+    goal.status = "Achieved"
+    await db_session.commit()
+    # Writing the same status again is not a transition
+    goal.status = "Achieved"
+    await db_session.commit()
+
+    log = (await db_session.execute(select(GoalStatusChange).order_by(GoalStatusChange.id))).scalars().all()
+    assert [(c.from_status, c.to_status) for c in log] == [
+        (None, "Pending"), ("Pending", "In Progress"), ("In Progress", "Achieved"),
+    ]
+    assert all(c.employee_id == employee.id and c.project_id == project.id for c in log)
+
+    totals = await rollups(db_session)
+    for scope in ("all", "employee", "project"):
+        assert totals[(scope, "Pending")] == (1, 1)
+        assert totals[(scope, "In Progress")] == (1, 1)
+        assert totals[(scope, "Achieved")] == (1, 0)
+
+@pytest.mark.asyncio
+async def test_trend_reads_rollups_for_one_scope(db_session, override_get_db):
+    employee, project, goal = await seed(db_session)
+    other = Goal(title="Other", description="d")
+    db_session.add(other)
+    await db_session.commit()
+    goal.status = "Achieved"
+    await db_session.commit()
+
+    org = await trend(db_session, days=7)
+    mine = await trend(db_session, "employee", employee.id, days=7)
+    assert len(org.days) == 7 and org.days[-1] == datetime.now(timezone.utc).date()
+    assert (org.opened, org.completed, org.completion_rate) == (2, 1, 0.5)
+    assert (mine.opened, mine.completed, mine.completion_rate) == (1, 1, 1.0)
+    assert mine.entered["Achieved"][-1] == 1
+    assert mine.cycle_days is not None and mine.cycle_days < 1
+
+    # Older than the window: not counted
+    assert (await trend(db_session, days=7, today=datetime.now(timezone.utc).date() + timedelta(days=30))).opened == 0
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental_rollups(db_session, override_get_db):
+    employee, project, goal = await seed(db_session)
+    goal.status = "Blocked"
+    await db_session.commit()
+    incremental = await rollups(db_session)
+
+    await db_session.run_sync(lambda session: rebuild_rollups(session.connection()))
+    await db_session.commit()
+    db_session.expunge_all()
+    assert await rollups(db_session) == incremental
+
+@pytest.mark.asyncio
+async def test_status_route_validates_and_records_history(db_session, override_get_db):
+    employee, project, goal = await seed(db_session)
+    goal_id = goal.id
+    login(client)
+
+    assert client.post(f"/goals/{goal_id}/status", data={"status": "Done-ish"}).status_code == 400
+    assert client.post("/goals/9999/status", data={"status": "Achieved"}).status_code == 404
+
+    response = client.post(f"/goals/{goal_id}/status", data={"status": "In Progress"}, follow_redirects=False)
+    assert response.status_code == 303
+
+    page = client.get(f"/goals/{goal_id}")
+    assert "Pending &rarr; In Progress" in page.text
+
+    trends = client.get(f"/goals/trends?project_id={project.id}")
+    assert trends.status_code == 200
+    assert "Goal Trends: Apollo" in trends.text
+    assert client.get("/goals/trends?employee_id=9999").status_code == 404
@@ -0,0 +1,134 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app.main import app
+from app.config import settings
+from app.models import Employee, EmployeeClosure, Goal
+from app.services.hierarchy import HierarchyError, subtree_ids
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def closure_rows(db_session):
+    result = await db_session.execute(
+        select(EmployeeClosure.ancestor_id, EmployeeClosure.descendant_id, EmployeeClosure.depth)
+    )
+    return set(result.all())
+
+async def expected_rows(db_session):
+    """The closure computed the slow way, by walking manager_id in Python."""
+    managers = dict((await db_session.execute(select(Employee.id, Employee.manager_id))).all())
+    rows = set()
+    for employee_id in managers:
+        node, depth = employee_id, 0
+        while node is not None:
+            rows.add((node, employee_id, depth))
+            node, depth = managers[node], depth + 1
+    return rows
+
+async def build_tree(db_session, levels, span):
+    """A complete tree ``levels`` deep where every manager has ``span`` reports; returns it level by level."""
+    tree = [[Employee(name="Root", role="CEO", email="root@test.com")]]
+    for level in range(1, levels):
+        tree.append([
+            Employee(name=f"L{level}-{i}", role="Dev", email=f"l{level}-{i}@test.com", manager=manager)
+            for i, manager in enumerate(m for m in tree[-1] for _ in range(span))
+        ])
+    db_session.add_all([employee for level in tree for employee in level])
+    await db_session.commit()
+    return tree
+
+@pytest.mark.asyncio
+async def test_closure_follows_inserts_and_moves(db_session):
+    tree = await build_tree(db_session, levels=4, span=2)
+    assert await closure_rows(db_session) == await expected_rows(db_session)
+
+    # Move a level-1 manager (and their 6 reports) under a level-3 employee in the other branch
+    moved, new_manager = tree[1][0], tree[3][-1]
+    moved.manager_id = new_manager.id
+    await db_session.commit()
+    assert await closure_rows(db_session) == await expected_rows(db_session)
+    root_org = await db_session.execute(subtree_ids(tree[0][0].id))
+    assert len(root_org.all()) == 14
+
+    # Making someone report to their own report is refused
+    tree[0][0].manager_id = tree[2][0].id
+    with pytest.raises(HierarchyError):
+        await db_session.commit()
+    await db_session.rollback()
+    assert await closure_rows(db_session) == await expected_rows(db_session)
+
+@pytest.mark.asyncio
+async def test_deleting_a_manager_moves_reports_up(db_session):
+    tree = await build_tree(db_session, levels=3, span=2)
+    middle = tree[1][0]
+    await db_session.delete(middle)
+    await db_session.commit()
+
+    assert await closure_rows(db_session) == await expected_rows(db_session)
+    for report in tree[2][:2]:
+        await db_session.refresh(report)
+        assert report.manager_id == tree[0][0].id
+
+@pytest.mark.asyncio
+async def test_subtree_of_a_ten_level_org(db_session):
+    tree = await build_tree(db_session, levels=10, span=2)
+    assert await closure_rows(db_session) == await expected_rows(db_session)
+
+    # Everyone under a level-2 manager: 2 + 4 + ... + 128 people across 7 levels
+    result = await db_session.execute(subtree_ids(tree[2][0].id))
+    assert len(result.all()) == 254
+
+@pytest.mark.asyncio
+async def test_org_pages_and_manager_edits(db_session, override_get_db):
+    tree = await build_tree(db_session, levels=3, span=2)
+    root, lead, other_lead = tree[0][0], tree[1][0], tree[1][1]
+    root_id, lead_id, other_lead_id, report_id = root.id, lead.id, other_lead.id, tree[2][0].id
+    db_session.add(Goal(title="Org goal", description="d", employee_id=tree[2][0].id, status="Achieved"))
+    await db_session.commit()
+    login(client)
+
+    response = client.get(f"/employees/{root_id}/org")
+    assert response.status_code == 200
+    assert "L2-3" in response.text
+    assert "Achieved" in response.text
+
+    response = client.get(f"/employees/{lead_id}/edit")
+    # A manager can't be moved under their own reports
+    assert f'value="{report_id}"' not in response.text
+    assert f'value="{other_lead_id}"' in response.text
+
+    response = client.post(
+        f"/employees/{lead_id}/edit",
+        data={"name": "L1-0", "role": "Dev", "email": "l1-0@test.com", "manager_id": other_lead_id},
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+    assert await closure_rows(db_session) == await expected_rows(db_session)
+
+    response = client.post(
+        f"/employees/{root_id}/edit",
+        data={"name": "Root", "role": "CEO", "email": "root@test.com", "manager_id": report_id},
+    )
+    assert response.status_code == 400
+
+    # A tampered form value is a bad request on create and edit alike
+    response = client.post(
+        f"/employees/{root_id}/edit",
+        data={"name": "Root", "role": "CEO", "email": "root@test.com", "manager_id": "boss"},
+    )
+    assert response.status_code == 400
+    response = client.post(
+        "/employees/", data={"name": "New", "role": "Dev", "email": "new@test.com", "manager_id": "1; DROP"}
+    )
+    assert response.status_code == 400
+
+    response = client.post(f"/employees/{other_lead_id}/delete", follow_redirects=False)
+    assert response.status_code == 303
+    db_session.expire_all()
+    assert await closure_rows(db_session) == await expected_rows(db_session)
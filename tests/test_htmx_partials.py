@@ -0,0 +1,95 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.config import settings
+from app.main import app
+from app.models import Employee, Goal, Project
+
+client = TestClient(app)
+
+HX = {"HX-Request": "true"}
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def seed(db_session):
+    team = [
+        Employee(name="Ada", role="Dev", email="ada@test.com"),
+        Employee(name="Grace", role="Dev", email="grace@test.com"),
+    ]
+    project = Project(name="Apollo", status="Active", stakeholders=["CTO"])
+    db_session.add_all(team + [project])
+    await db_session.commit()
+    return team, project
+
+@pytest.mark.asyncio
+async def test_team_edits_return_the_row_and_new_totals(db_session, override_get_db):
+    (ada, grace), project = await seed(db_session)
+    login(client)
+
+    added = client.post(f"/projects/{project.id}/assign", data={
+        "employee_id": ada.id, "role": "Lead", "capacity": 60,
+    }, headers=HX)
+    assert added.status_code == 200
+    assert "<html" not in added.text
+    assert added.text.count("<li ") == 1 and "Ada" in added.text and "Lead (60%)" in added.text
+    assert 'id="project-allocation"' in added.text and 'hx-swap-oob="true"' in added.text
+    assert "1 person assigned, 60% combined capacity" in added.text
+
+    # Without htmx the same form still posts, redirects and reloads the page
+    fallback = client.post(f"/projects/{project.id}/assign", data={
+        "employee_id": grace.id, "role": "Dev", "capacity": 30,
+    }, follow_redirects=False)
+    assert fallback.status_code == 303
+    assert fallback.headers["location"] == f"/projects/{project.id}"
+
+    assignment_id = int(added.text.split('id="assignment-', 1)[1].split('"', 1)[0])
+    edited = client.post(f"/projects/{project.id}/assignments/{assignment_id}/update", data={
+        "role": "Architect", "capacity": 50,
+    }, headers=HX)
+    assert "Architect (50%)" in edited.text
+    assert "2 people assigned, 80% combined capacity" in edited.text
+
+    removed = client.post(f"/projects/{project.id}/assignments/{assignment_id}/delete", headers=HX)
+    assert removed.status_code == 200
+    assert "<li" not in removed.text
+    assert "1 person assigned, 30% combined capacity" in removed.text
+
+    page = client.get(f"/projects/{project.id}")
+    assert "Grace" in page.text and "Architect" not in page.text
+    assert "1 person assigned, 30% combined capacity" in page.text
+
+@pytest.mark.asyncio
+async def test_project_edit_returns_the_details_block(db_session, override_get_db):
+    _, project = await seed(db_session)
+    login(client)
+
+    response = client.post(f"/projects/{project.id}/update", data={
+        "name": "Apollo II", "status": "On Hold", "description": "Second flight", "stakeholders": "CTO, CFO",
+    }, headers=HX)
+    assert response.status_code == 200
+    assert response.text.startswith('<div id="project-info"')
+    assert "Apollo II" in response.text and "CTO, CFO" in response.text
+    # Back to the details, with the edit form hidden again
+    assert 'id="edit-project" action="/projects/' in response.text
+    assert 'class="hidden bg-gray-50 p-6"' in response.text
+
+@pytest.mark.asyncio
+async def test_new_goal_is_returned_as_a_list_item(db_session, override_get_db):
+    (ada, _), _ = await seed(db_session)
+    login(client)
+
+    data = {"title": "Learn Rust", "description": "Ship one service in Rust", "employee_id": ada.id}
+    created = client.post("/goals/", data=data, headers=HX)
+    assert created.status_code == 200
+    assert created.text.lstrip().startswith("<li") and "Learn Rust" in created.text
+
+    # A near-duplicate still goes to the goal page, through htmx's redirect header
+    again = client.post("/goals/", data=data, headers=HX)
+    goal_id = (await db_session.execute(select(Goal.id).order_by(Goal.id.desc()))).scalars().first()
+    assert again.status_code == 200
+    assert again.headers["HX-Redirect"] == f"/goals/{goal_id}"
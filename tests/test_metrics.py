@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.main import app
+from app.config import settings
+from app.database import get_db
+from app.metrics import (
+    Histogram, Registry, db_connection_hold_duration, db_pool_wait_duration, forget_pool, http_requests,
+    instrument_pool, registry,
+)
+from app.models import Employee
+from app.routers.goals import tasks
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+@pytest.mark.asyncio
+async def test_health_checks_database(db_session, override_get_db):
+    anonymous = TestClient(app)
+    response = anonymous.get("/health", follow_redirects=False)
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok", "database": "ok"}
+
+def test_health_hides_database_errors(caplog):
+    class Unreachable:
+        async def execute(self, statement):
+            raise OperationalError("SELECT 1", {}, Exception("could not connect to db.internal:5432 as admin"))
+
+    app.dependency_overrides[get_db] = lambda: Unreachable()
+    try:
+        response = TestClient(app).get("/health")
+    finally:
+        del app.dependency_overrides[get_db]
+    assert response.status_code == 503
+    assert response.json() == {"status": "error", "database": "unavailable"}
+    assert "db.internal" in caplog.text
+
+@pytest.mark.asyncio
+async def test_metrics_are_public_and_labelled_by_route_template(db_session, override_get_db):
+    login(client)
+    client.post("/employees/", data={"name": "Metric", "role": "Dev", "email": "metric@test.com"})
+    employee = (await db_session.execute(select(Employee).filter_by(email="metric@test.com"))).scalar_one()
+
+    before = http_requests.value(method="GET", route="/employees/{employee_id}", status="200")
+    client.get(f"/employees/{employee.id}")
+    client.get(f"/employees/{employee.id}/edit")
+    assert http_requests.value(method="GET", route="/employees/{employee_id}", status="200") == before + 1
+
+    response = TestClient(app).get("/metrics", follow_redirects=False)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'duration_seconds_bucket{method="GET",route="/employees/{employee_id}",le="+Inf"}' in body
+    assert "leaderai_http_requests_in_flight 1" in body
+    assert "# TYPE leaderai_db_pool_wait_duration_seconds histogram" in body
+    assert "# TYPE leaderai_db_connection_hold_duration_seconds histogram" in body
+    assert 'leaderai_db_pool_connections{database="main",state="checked_out"}' in body
+
+@pytest.mark.asyncio
+async def test_pool_wait_time_shows_an_exhausted_pool(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0)
+    instrument_pool(engine, "waits")
+    try:
+        held = await engine.connect()
+        waiting = asyncio.create_task(engine.connect().start())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        await held.close()
+        await (await waiting).close()
+        assert db_pool_wait_duration.count(database="waits") == 2
+        waited = db_pool_wait_duration._values[("waits",)][-2]
+        assert waited >= 0.05
+        assert db_connection_hold_duration.count(database="waits") == 2
+
+        # dispose() swaps in a new pool, which is timed as well
+        await engine.dispose()
+        async with engine.connect():
+            pass
+        assert db_pool_wait_duration.count(database="waits") == 3
+        assert 'leaderai_db_pool_connections{database="waits",state="size"} 1' in registry.render()
+    finally:
+        forget_pool(engine)
+        await engine.dispose()
+    assert 'database="waits",state=' not in registry.render()
+
+def test_metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    anonymous = TestClient(app)
+    assert anonymous.get("/metrics").status_code == 401
+    assert anonymous.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+def test_ai_task_metrics(monkeypatch):
+    monkeypatch.setitem(tasks, "old", {"status": "pending", "created_at": time.time() - 90})
+    monkeypatch.setitem(tasks, "done", {"status": "completed", "result": {}})
+
+    body = TestClient(app).get("/metrics").text
+    pending = next(line for line in body.splitlines() if line.startswith('leaderai_ai_tasks{status="pending"}'))
+    assert float(pending.split()[-1]) >= 1
+    age = next(line for line in body.splitlines() if line.startswith("leaderai_ai_task_oldest_pending_age_seconds "))
+    assert float(age.split()[-1]) >= 90
+
+def test_histogram_exposition():
+    registry = Registry()
+    histogram = registry.register(Histogram("demo_seconds", "Demo.", ["op"], buckets=(0.1, 1.0)))
+    histogram.observe(0.05, op="a")
+    histogram.observe(0.5, op="a")
+    histogram.observe(5, op="a")
+
+    assert registry.render().splitlines() == [
+        "# HELP demo_seconds Demo.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{op="a",le="0.1"} 1',
+        'demo_seconds_bucket{op="a",le="1.0"} 2',
+        'demo_seconds_bucket{op="a",le="+Inf"} 3',
+        'demo_seconds_sum{op="a"} 5.55',
+        'demo_seconds_count{op="a"} 3',
+    ]
@@ -0,0 +1,63 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth import get_current_user
+from app.main import app
+from app.config import settings
+from app.middleware import AuthMiddleware, CSRFMiddleware, sign_session
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+def make_probe_app():
+    probe = FastAPI()
+
+    @probe.get("/whoami")
+    async def whoami(user: str = Depends(get_current_user)):
+        return {"user": user}
+
+    @probe.post("/mutate")
+    async def mutate(user: str = Depends(get_current_user)):
+        return {"ok": True}
+
+    probe.add_middleware(AuthMiddleware)
+    probe.add_middleware(CSRFMiddleware, trusted_origins=["https://trusted.example.com"])
+    return TestClient(probe, base_url="http://testserver")
+
+def test_user_resolved_into_scope():
+    probe = make_probe_app()
+    assert probe.get("/whoami", follow_redirects=False).status_code == 303
+
+    probe.cookies.set("session_user", sign_session("lead"))
+    assert probe.get("/whoami").json() == {"user": "lead"}
+
+    # A cookie naming a user without a valid signature is not a session
+    probe.cookies.set("session_user", "lead")
+    assert probe.get("/whoami", follow_redirects=False).status_code == 303
+    probe.cookies.set("session_user", sign_session("lead").replace("lead", "boss", 1))
+    assert probe.get("/whoami", follow_redirects=False).status_code == 303
+
+def test_public_paths_skip_auth():
+    anonymous = TestClient(app)
+    assert anonymous.get("/login").status_code == 200
+    assert anonymous.get("/openapi.json").status_code == 200
+
+def test_cross_origin_post_rejected():
+    probe = make_probe_app()
+    probe.cookies.set("session_user", sign_session("lead"))
+
+    assert probe.post("/mutate").status_code == 200
+    assert probe.post("/mutate", headers={"Origin": "http://testserver"}).status_code == 200
+    assert probe.post("/mutate", headers={"Origin": "https://trusted.example.com"}).status_code == 200
+    assert probe.post("/mutate", headers={"Origin": "https://evil.example.com"}).status_code == 403
+    assert probe.post("/mutate", headers={"Referer": "https://evil.example.com/form"}).status_code == 403
+
+def test_app_blocks_cross_site_form_post(db_session, override_get_db):
+    login(client)
+    response = client.post("/feedback", data={"feedback": "hi"}, headers={"Origin": "https://evil.example.com"})
+    assert response.status_code == 403
@@ -0,0 +1,165 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.main import app
+from app.config import settings
+from app.models import Employee, Project, ProjectAssignment, Goal
+from app.query_budget import QueryBudgetExceeded, QueryLog, _current, query_budget, route_budgets
+from app.routers.feedback import feedback_writer
+from tests.conftest import engine, TestingSessionLocal
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def seed(db_session, size):
+    employees = [
+        Employee(name=f"Employee {i}", role="Dev", email=f"e{i}@test.com", skills=["Python"], notes=["note"])
+        for i in range(size)
+    ]
+    # A chain of managers under the first employee, so org pages and manager moves touch
+    # every level; the last employee stays outside it to be the new manager in the edit
+    for manager, report in zip(employees, employees[1:-1]):
+        report.manager = manager
+    projects = [Project(name=f"Project {i}", status="Active", stakeholders=["CTO"]) for i in range(size)]
+    db_session.add_all(employees + projects)
+    await db_session.flush()
+    for i, employee in enumerate(employees):
+        for project in projects[:3]:
+            db_session.add(ProjectAssignment(employee_id=employee.id, project_id=project.id, role="Dev", capacity=30))
+        db_session.add(Goal(title=f"Goal {i}", description="d", employee_id=employee.id, project_id=projects[i].id))
+    await db_session.commit()
+    db_session.expunge_all()
+    return employees[0].id, projects[0].id, employees[-1].id
+
+HX = {"HX-Request": "true"}
+
+def route_requests(employee_id, project_id, outsider_id):
+    """(method, route template, url, form data[, headers]) for every DB-backed route; writes last."""
+    return [
+        ("GET", "/", "/", None),
+        ("GET", "/employees/", "/employees/", None),
+        ("GET", "/employees/{employee_id}", f"/employees/{employee_id}", None),
+        ("GET", "/employees/{employee_id}/edit", f"/employees/{employee_id}/edit", None),
+        ("GET", "/employees/{employee_id}/org", f"/employees/{employee_id}/org", None),
+        ("GET", "/employees/new", "/employees/new", None),
+        ("GET", "/projects/", "/projects/", None),
+        ("GET", "/projects/{project_id}", f"/projects/{project_id}", None),
+        ("GET", "/goals/", "/goals/", None),
+        ("GET", "/goals/{goal_id}", "/goals/1", None),
+        ("GET", "/goals/trends", "/goals/trends", None),
+        ("GET", "/goals/duplicates", "/goals/duplicates", None),
+        ("GET", "/goals/trends", f"/goals/trends?employee_id={employee_id}", None),
+        ("GET", "/feedback/admin", "/feedback/admin", None),
+        ("GET", "/capacity", "/capacity", None),
+        ("GET", "/audit/{entity}/{entity_id}", f"/audit/employees/{employee_id}", None),
+        ("GET", "/skills", "/skills", None),
+        ("GET", "/skills", "/skills?name=PYTHON", None),
+        ("GET", "/skills", "/skills?name=Cobol", None),
+        ("GET", "/skills/{skill_id}", "/skills/1", None),
+        ("GET", "/health", "/health", None),
+        ("GET", "/api/v1/employees", "/api/v1/employees?fields=name,skills&limit=10", None),
+        ("GET", "/api/v1/employees/{employee_id}", f"/api/v1/employees/{employee_id}", None),
+        ("GET", "/api/v1/projects", "/api/v1/projects?status=Active", None),
+        ("GET", "/api/v1/projects/{project_id}", f"/api/v1/projects/{project_id}", None),
+        ("GET", "/api/v1/assignments", f"/api/v1/assignments?employee_id={employee_id}", None),
+        ("GET", "/api/v1/assignments/{assignment_id}", "/api/v1/assignments/1", None),
+        ("GET", "/api/v1/goals", "/api/v1/goals?after=5", None),
+        ("GET", "/api/v1/goals/{goal_id}", "/api/v1/goals/1", None),
+        ("POST", "/employees/", "/employees/", {"name": "New", "role": "Dev", "email": "new@test.com",
+                                              "skills": "Python, Brand New"}),
+        ("POST", "/employees/{employee_id}/edit", f"/employees/{employee_id}/edit",
+         {"name": "Renamed", "role": "Lead", "email": "e0@test.com", "new_note": "promoted",
+          "manager_id": outsider_id, "skills": "k8s, python"}),
+        ("POST", "/projects/", "/projects/", {"name": "New Project", "status": "Active"}),
+        ("POST", "/projects/{project_id}/update", f"/projects/{project_id}/update",
+         {"name": "Renamed Project", "status": "Active"}),
+        ("POST", "/projects/{project_id}/update", f"/projects/{project_id}/update",
+         {"name": "Renamed Again", "status": "On Hold"}, HX),
+        ("POST", "/projects/{project_id}/assign", f"/projects/{project_id}/assign",
+         {"employee_id": employee_id, "role": "Lead", "capacity": 10}),
+        ("POST", "/projects/{project_id}/assign", f"/projects/{project_id}/assign",
+         {"employee_id": outsider_id, "role": "Lead", "capacity": 10}, HX),
+        ("POST", "/projects/{project_id}/assign/bulk", f"/projects/{project_id}/assign/bulk",
+         {"employee_id": [employee_id, outsider_id], "role": "Dev", "capacity": 10}),
+        ("POST", "/projects/{project_id}/assignments/{assignment_id}/update",
+         f"/projects/{project_id}/assignments/1/update", {"role": "Lead", "capacity": 20}),
+        ("POST", "/projects/{project_id}/assignments/{assignment_id}/update",
+         f"/projects/{project_id}/assignments/2/update", {"role": "Lead", "capacity": 20}, HX),
+        ("POST", "/projects/{project_id}/assignments/{assignment_id}/delete",
+         f"/projects/{project_id}/assignments/1/delete", {}),
+        ("POST", "/projects/{project_id}/assignments/{assignment_id}/delete",
+         f"/projects/{project_id}/assignments/2/delete", {}, HX),
+        ("POST", "/goals/", "/goals/", {"title": "Goal 0", "description": "d", "employee_id": employee_id}),
+        ("POST", "/goals/", "/goals/", {"title": "Goal 0", "description": "d", "employee_id": employee_id}, HX),
+        ("POST", "/goals/", "/goals/", {"title": "Mentor a new hire", "description": "d", "employee_id": employee_id},
+         HX),
+        ("POST", "/goals/bulk", "/goals/bulk",
+         {"employee_id": [employee_id, outsider_id], "title": "Team goal", "description": "d"}),
+        ("POST", "/goals/{goal_id}/status", "/goals/1/status", {"status": "Achieved"}),
+        ("POST", "/goals/generate_suggestions", "/goals/generate_suggestions",
+         {"employee_id": employee_id, "project_id": project_id}),
+        ("POST", "/goals/generate_suggestions", "/goals/generate_suggestions", {"employee_id": employee_id}),
+        ("POST", "/feedback", "/feedback", {"feedback": "Fast pages"}),
+        ("POST", "/projects/{project_id}/delete", f"/projects/{project_id}/delete", {}),
+        ("POST", "/employees/{employee_id}/delete", f"/employees/{employee_id}/delete", {}),
+    ]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [3, 40])
+async def test_every_route_stays_within_its_query_budget(db_session, override_get_db, monkeypatch, size):
+    monkeypatch.setattr(feedback_writer, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr("app.routers.goals.process_ai_request", lambda *args: None)
+
+    employee_id, project_id, outsider_id = await seed(db_session, size)
+    login(client)
+
+    counts = {}
+    for method, route, url, data, *headers in route_requests(employee_id, project_id, outsider_id):
+        log = QueryLog()
+        token = _current.set(log)
+        try:
+            # Raises QueryBudgetExceeded (QUERY_BUDGET_MODE=raise) if over budget
+            response = client.request(method, url, data=data, headers=dict(*headers), follow_redirects=False)
+        finally:
+            _current.reset(token)
+        assert response.status_code < 400, (route, response.status_code)
+        key = f"{method} {route}"
+        if log.statements:
+            assert key in route_budgets, f"{key} queries the database but declares no query_budget"
+        counts[key] = len(log.statements)
+
+    # Eager loading keeps the number of queries independent of the number of rows
+    assert counts["GET /employees/"] == counts["GET /employees/{employee_id}"] == 4
+    assert counts["GET /projects/{project_id}"] == 4
+
+def test_exceeding_budget_raises_or_warns(monkeypatch, caplog):
+    demo = FastAPI()
+
+    @demo.get("/chatty", dependencies=[query_budget(1)])
+    async def chatty():
+        async with engine.connect() as conn:
+            for _ in range(3):
+                await conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    # conftest runs the suite with QUERY_BUDGET_MODE=raise
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        TestClient(demo).get("/chatty")
+    assert excinfo.value.budget == 1
+    assert excinfo.value.statements == ["SELECT 1"] * 3
+    assert "GET /chatty ran 3 SQL statements, budget is 1" in str(excinfo.value)
+
+    assert TestClient(demo, raise_server_exceptions=False).get("/chatty").status_code == 500
+
+    monkeypatch.setattr(settings, "QUERY_BUDGET_MODE", "warn")
+    with caplog.at_level(logging.WARNING, logger="app.query_budget"):
+        assert TestClient(demo).get("/chatty").status_code == 200
+    assert "budget is 1" in caplog.text
@@ -0,0 +1,142 @@
+import json
+import sqlite3
+
+import pytest
+from alembic import command
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+
+from app.config import settings
+from app.database import Base
+from app.main import app
+from app.models import Employee, EmployeeSkill
+from app.services import skills
+from app.startup import alembic_config
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+async def links(db_session):
+    return set((await db_session.execute(select(EmployeeSkill.employee_id, EmployeeSkill.skill_id))).all())
+
+def test_skill_key_folds_case_whitespace_and_aliases():
+    assert skills.skill_key("  Machine   LEARNING ") == skills.skill_key("ML") == "machine learning"
+    assert skills.canonical_name("k8s") == "Kubernetes"
+    assert skills.canonical_name(" Rust ") == "Rust"
+
+@pytest.mark.asyncio
+async def test_spelling_variants_share_one_skill(db_session, override_get_db):
+    db_session.add_all([
+        Employee(name="Ann", role="Dev", email="ann@test.com", skills=["Kubernetes", "Python"]),
+        Employee(name="Bob", role="Dev", email="bob@test.com", skills=["k8s", "python ", "PYTHON"]),
+        Employee(name="Cat", role="Dev", email="cat@test.com", skills=["Go"]),
+    ])
+    await db_session.commit()
+
+    kubernetes = await skills.lookup(db_session, "K8S")
+    assert kubernetes.name == "Kubernetes"
+    holders = (await db_session.execute(skills.holders(kubernetes.id))).scalars().all()
+    assert [e.name for e in holders] == ["Ann", "Bob"]
+    assert [(row.name, row.people) for row in (await db_session.execute(skills.frequencies())).all()] == [
+        ("Kubernetes", 2), ("Python", 2), ("Go", 1),
+    ]
+    assert await skills.lookup(db_session, "Cobol") is None
+
+@pytest.mark.asyncio
+async def test_links_follow_edits_and_deletes(db_session, override_get_db):
+    ann = Employee(name="Ann", role="Dev", email="ann@test.com", skills=["Python"])
+    bob = Employee(name="Bob", role="Dev", email="bob@test.com", skills=["Python"])
+    db_session.add_all([ann, bob])
+    await db_session.commit()
+    ann_id, bob_id = ann.id, bob.id
+
+    ann.skills = ["Rust", "Go"]
+    await db_session.commit()
+    python, rust = await skills.lookup(db_session, "python"), await skills.lookup(db_session, "rust")
+    go = await skills.lookup(db_session, "go")
+    assert await links(db_session) == {(ann_id, rust.id), (ann_id, go.id), (bob_id, python.id)}
+
+    # The route's bulk delete
+    login(client)
+    client.post(f"/employees/{bob_id}/delete")
+    assert await links(db_session) == {(ann_id, rust.id), (ann_id, go.id)}
+
+    await db_session.delete(ann)
+    await db_session.commit()
+    assert await links(db_session) == set()
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_event_maintained_links(db_session, override_get_db):
+    db_session.add_all([
+        Employee(name="Ann", role="Dev", email="ann@test.com", skills=["Python", "JS"]),
+        Employee(name="Bob", role="Dev", email="bob@test.com", skills=[]),
+        Employee(name="Cat", role="Dev", email="cat@test.com", skills=["javascript"]),
+    ])
+    await db_session.commit()
+    maintained = await links(db_session)
+
+    rebuilt = await db_session.run_sync(lambda session: skills.rebuild(session.connection(), batch_size=2))
+    await db_session.commit()
+    assert rebuilt == 3
+    assert await links(db_session) == maintained
+
+@pytest.mark.asyncio
+async def test_skill_pages(db_session, override_get_db):
+    db_session.add_all([
+        Employee(name="Ann", role="Dev", email="ann@test.com", skills=["Kubernetes"]),
+        Employee(name="Bob", role="Dev", email="bob@test.com", skills=["k8s", "Go"]),
+    ])
+    await db_session.commit()
+    kubernetes = await skills.lookup(db_session, "kubernetes")
+    login(client)
+
+    overview = client.get("/skills")
+    assert overview.status_code == 200
+    assert f'href="/skills/{kubernetes.id}"' in overview.text
+
+    found = client.get("/skills?name=K8s", follow_redirects=False)
+    assert found.status_code == 303
+    assert found.headers["location"] == f"/skills/{kubernetes.id}"
+
+    holders = client.get(f"/skills/{kubernetes.id}")
+    assert "Who knows Kubernetes" in holders.text
+    assert "Ann" in holders.text and "Bob" in holders.text
+
+    missing = client.get("/skills?name=Cobol")
+    assert missing.status_code == 200
+    assert "Nobody on the team has" in missing.text
+    assert client.get("/skills/999").status_code == 404
+
+def test_migration_backfills_the_index_on_its_own(tmp_path):
+    path = tmp_path / "before_skills.db"
+    config = alembic_config()
+    config.attributes["database_url"] = f"sqlite+aiosqlite:///{path}"
+    config.attributes["configure_logger"] = False
+    # The tables as they were just before the skills index (the revision chain starts from an existing schema)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[
+        table for table in Base.metadata.sorted_tables if table.name not in ("skills", "employee_skills")
+    ])
+    engine.dispose()
+    command.stamp(config, "c3e5a7f9b2d4")
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO employees (name, role, email, notes, skills) VALUES (?, 'Dev', ?, '[]', ?)", [
+            ("Ann", "ann@test.com", json.dumps(["Kubernetes", "Python"])),
+            ("Bob", "bob@test.com", json.dumps(["k8s", "python ", "PYTHON"])),
+            ("Cy", "cy@test.com", "[]"),
+        ])
+
+    command.upgrade(config, "d4f6b8a0c2e5")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT key, name FROM skills ORDER BY key").fetchall() == [
+            ("kubernetes", "Kubernetes"), ("python", "Python"),
+        ]
+        assert conn.execute(
+            "SELECT e.name, s.name FROM employee_skills l JOIN employees e ON e.id = l.employee_id "
+            "JOIN skills s ON s.id = l.skill_id ORDER BY e.name, s.name"
+        ).fetchall() == [("Ann", "Kubernetes"), ("Ann", "Python"), ("Bob", "Kubernetes"), ("Bob", "Python")]
@@ -0,0 +1,59 @@
+import logging
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import text
+
+from app.startup import StartupProfile, alembic_head, configure_logging, schema_is_current
+from tests.conftest import engine
+
+
+def test_openai_sdk_is_not_imported_at_startup():
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; print('openai' in sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_startup_profile_reports_each_phase():
+    profile = StartupProfile()
+    with profile.phase("schema"):
+        pass
+    with profile.phase("seed"):
+        pass
+
+    assert [name for name, _ in profile.phases] == ["imports", "schema", "seed"]
+    report = profile.report()
+    assert "Startup finished in" in report
+    assert "schema" in report and "seed" in report
+
+
+def test_startup_profile_is_logged_at_info(caplog, monkeypatch):
+    # As under uvicorn's default config: nothing sets the app's level, so INFO falls through to WARNING
+    monkeypatch.setattr(logging.getLogger("app"), "level", logging.NOTSET)
+    logging.getLogger("app.main").info("hidden")
+    configure_logging("INFO")
+    logging.getLogger("app.main").info(StartupProfile().report())
+
+    assert "hidden" not in caplog.text
+    assert "Startup finished in" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_schema_check_against_alembic_head(db_session):
+    async with engine.begin() as conn:
+        # Tables from create_all alone are not considered migrated
+        assert not await schema_is_current(conn)
+
+        await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        await conn.execute(text("INSERT INTO alembic_version VALUES ('0000_outdated')"))
+        assert not await schema_is_current(conn)
+
+        await conn.execute(text("UPDATE alembic_version SET version_num = :head"), {"head": alembic_head()})
+        assert await schema_is_current(conn)
+
+        await conn.execute(text("DROP TABLE alembic_version"))
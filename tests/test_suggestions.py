@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.config import settings
+from app.main import app
+from app.models import Employee, GoalSuggestion, Project, ProjectAssignment
+from app.services import suggestions
+from tests.conftest import TestingSessionLocal
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+class CountingLLM:
+    """Answers after a short wait, recording calls and how many overlapped."""
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+
+    async def generate_goals(self, employee_context, project_context, potential=None, criteria=None):
+        self.calls.append(employee_context)
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {"title": f"Grow {employee_context.split(',')[0]}", "objective": "o", "due_date": "Q1",
+                "success_metrics": "- m", "manager_support": "- s"}
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = CountingLLM()
+    monkeypatch.setattr(suggestions, "get_llm_service", lambda: fake)
+    return fake
+
+async def the_test_database():
+    yield TestingSessionLocal
+
+def warmer(hour=23):
+    return suggestions.Warmer(
+        the_test_database, 60, concurrency=2, off_hours=(22, 6), clock=lambda: datetime(2026, 1, 1, hour)
+    )
+
+def test_off_hours_window_wraps_past_midnight():
+    assert [hour for hour in range(24) if suggestions.in_off_hours(hour, 22, 6)] == [0, 1, 2, 3, 4, 5, 22, 23]
+    assert [hour for hour in range(24) if suggestions.in_off_hours(hour, 1, 3)] == [1, 2]
+    assert all(suggestions.in_off_hours(hour, 0, 0) for hour in range(24))
+    assert warmer(hour=2).due() and not warmer(hour=14).due()
+
+@pytest.mark.asyncio
+async def test_warmup_regenerates_only_changed_employees(db_session, override_get_db, llm):
+    team = [Employee(name=f"E{i}", role="Dev", email=f"e{i}@test.com", skills=["Python"], notes=[]) for i in range(5)]
+    project = Project(name="Apollo")
+    db_session.add_all(team + [project])
+    await db_session.commit()
+
+    warm = warmer()
+    assert await warm.run_once() == 5
+    assert llm.most_in_flight == 2
+    assert await warm.run_once() == 0
+
+    # Skills, potential and a new assignment each invalidate one suggestion; the development plan does not
+    team[0].skills = ["Python", "Rust"]
+    team[1].potential = "P1"
+    team[3].development_plan = "Lead a team"
+    db_session.add(ProjectAssignment(employee_id=team[2].id, project_id=project.id, role="Dev", capacity=50))
+    await db_session.delete(team[4])
+    await db_session.commit()
+    llm.calls.clear()
+    assert await warm.run_once() == 3
+    assert sorted(call.split(",")[0] for call in llm.calls) == ["Name: E0", "Name: E1", "Name: E2"]
+    assert "Apollo as Dev (50%)" in llm.calls[2]
+    stored = (await db_session.execute(select(GoalSuggestion.employee_id))).scalars().all()
+    assert sorted(stored) == sorted(employee.id for employee in team[:4])
+
+@pytest.mark.asyncio
+async def test_goal_form_uses_fresh_prepared_suggestion(db_session, override_get_db, llm, monkeypatch):
+    employee = Employee(name="Ann", role="Dev", email="ann@test.com", skills=["Go"], notes=[])
+    db_session.add(employee)
+    await db_session.commit()
+    await warmer().run_once()
+    login(client)
+    started = []
+    monkeypatch.setattr("app.routers.goals.process_ai_request", lambda *args: started.append(args))
+
+    instant = client.post("/goals/generate_suggestions", data={"employee_id": employee.id})
+    assert "Suggestions filled below" in instant.text
+    assert 'value="Grow Name: Ann"' in instant.text
+    assert started == []
+
+    # A title asks the LLM about that goal, not the generic one
+    assert "AI is thinking" in client.post(
+        "/goals/generate_suggestions", data={"employee_id": employee.id, "title": "Ship it"}
+    ).text
+
+    # Stale once the notes change
+    employee.notes = ["Wants to mentor"]
+    await db_session.commit()
+    assert "AI is thinking" in client.post("/goals/generate_suggestions", data={"employee_id": employee.id}).text
+    assert len(started) == 2
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+
+from app import auth
+from app.config import settings
+from app.main import app
+from app.routers import employees, goals, projects
+from app.templating import TEMPLATES_DIR, create_environment, precompile_templates, render_stats, templates
+
+client = TestClient(app)
+
+
+def test_single_shared_environment():
+    for module in (auth, employees, projects, goals):
+        assert module.templates is templates
+
+
+def test_precompile_loads_every_template():
+    assert precompile_templates() == len(list(TEMPLATES_DIR.rglob("*.html")))
+
+
+def test_auto_reload_disabled_in_production(monkeypatch):
+    assert create_environment().auto_reload
+
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    assert not create_environment().auto_reload
+
+
+def test_render_time_recorded_per_template():
+    before = render_stats["login.html"].count if "login.html" in render_stats else 0
+
+    response = client.get("/login")
+    assert response.status_code == 200
+
+    stats = render_stats["login.html"]
+    assert stats.count == before + 1
+    assert stats.total >= stats.max > 0
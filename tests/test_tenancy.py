@@ -0,0 +1,167 @@
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+from alembic import command
+from pydantic import ValidationError
+from sqlalchemy import select
+from app import database
+from app.main import app
+from app.metrics import registry
+from app.config import Settings, settings
+from app.database import Base
+from app.models import Employee
+from app.services import counters, suggestions
+from app.startup import alembic_config, alembic_head
+from app.tenancy import EngineCache, current_revision, migrate_tenants, tenant_files
+from tests.conftest import TestingSessionLocal
+
+@pytest.fixture
+def tenant_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_DATABASE_DIR", str(tmp_path))
+    return tmp_path
+
+@pytest.mark.asyncio
+async def test_engine_cache_evicts_least_recently_used_and_idle(tenant_dir):
+    cache = EngineCache(Base.metadata, max_engines=2, idle_seconds=60)
+    try:
+        for i, tenant in enumerate(["alice", "bob", "alice", "carol"]):
+            async with (await cache.sessionmaker(tenant))() as session:
+                session.add(Employee(name=tenant, role="Lead", email=f"{i}@test.com"))
+                await session.commit()
+
+        # bob was used least recently once carol pushed the cache over its size
+        assert "bob" not in cache and len(cache) == 2
+        assert (cache.opened, cache.evicted) == (3, 1)
+        assert [path.name for path in tenant_files()] == ["alice.db", "bob.db", "carol.db"]
+        assert current_revision(tenant_dir / "bob.db") == alembic_head()
+        # Open tenant pools are reported together under database="tenant"
+        assert 'leaderai_db_pool_connections{database="tenant",state="size"} 10' in registry.render()
+
+        # Reopening bob finds the existing file and its data
+        async with (await cache.sessionmaker("bob"))() as session:
+            names = (await session.execute(select(Employee.name))).scalars().all()
+        assert names == ["bob"]
+
+        cache.idle_seconds = 0
+        await cache.evict()
+        assert len(cache) == 0
+        assert 'leaderai_db_pool_connections{database="tenant"' not in registry.render()
+    finally:
+        await cache.close()
+
+@pytest.mark.asyncio
+async def test_invalid_tenant_names_are_rejected(tenant_dir):
+    cache = EngineCache(Base.metadata, max_engines=2, idle_seconds=60)
+    with pytest.raises(ValueError):
+        await cache.sessionmaker("../shared")
+
+def test_each_lead_sees_only_their_own_database(tenant_dir, monkeypatch):
+    cache = EngineCache(Base.metadata, max_engines=8, idle_seconds=60)
+    monkeypatch.setattr(database, "tenant_engines", cache)
+    monkeypatch.setattr(settings, "MULTI_TENANT", True)
+    monkeypatch.setattr(settings, "TENANT_USERS", {"alice": "wonderland", "bob": "builder"})
+
+    clients = {}
+    for name, password in settings.TENANT_USERS.items():
+        clients[name] = TestClient(app)
+        clients[name].post("/login", data={"username": name, "password": password})
+        response = clients[name].post(
+            "/employees/", data={"name": f"{name.title()}'s Report", "role": "Dev", "email": f"r@{name}.com"}
+        )
+        assert response.status_code == 200
+
+    # Both reports have id 1 in their own files; cached cards must not cross over
+    for _ in range(2):
+        for name, client in clients.items():
+            page = client.get("/employees/").text
+            other = "Bob" if name == "alice" else "Alice"
+            assert f"{name.title()}&#39;s Report" in page
+            assert f"{other}&#39;s Report" not in page
+
+    assert sorted(path.name for path in tenant_files()) == ["alice.db", "bob.db"]
+    asyncio.run(cache.close())
+
+def test_only_the_admin_reads_everyones_feedback(tenant_dir, monkeypatch, override_get_db):
+    cache = EngineCache(Base.metadata, max_engines=8, idle_seconds=60)
+    monkeypatch.setattr(database, "tenant_engines", cache)
+    monkeypatch.setattr(settings, "MULTI_TENANT", True)
+    monkeypatch.setattr(settings, "TENANT_USERS", {"alice": "wonderland"})
+
+    lead = TestClient(app)
+    lead.post("/login", data={"username": "alice", "password": "wonderland"})
+    assert lead.get("/feedback").status_code == 200
+    assert lead.get("/feedback/admin").status_code == 403
+
+    admin = TestClient(app)
+    admin.post("/login", data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD})
+    assert admin.get("/feedback/admin").status_code == 200
+    asyncio.run(cache.close())
+
+def test_logins_must_name_valid_tenant_files():
+    with pytest.raises(ValidationError, match="'jane.doe'"):
+        Settings(_env_file=None, TENANT_USERS={"jane.doe": "pw", "bob": "pw"})
+    with pytest.raises(ValidationError, match="'admin@corp'"):
+        Settings(_env_file=None, MULTI_TENANT=True, ADMIN_USERNAME="admin@corp")
+    # Without MULTI_TENANT the admin login never names a file
+    assert Settings(_env_file=None, ADMIN_USERNAME="admin@corp").ADMIN_USERNAME == "admin@corp"
+
+class NamingLLM:
+    async def generate_goals(self, employee_context, project_context, potential=None, criteria=None):
+        return {"title": f"Grow {employee_context.split(',')[0]}", "objective": "o", "due_date": "Q1",
+                "success_metrics": "- m", "manager_support": "- s"}
+
+@pytest.mark.asyncio
+async def test_background_passes_visit_idle_tenants(tenant_dir, monkeypatch, db_session):
+    cache = EngineCache(Base.metadata, max_engines=8, idle_seconds=60)
+    monkeypatch.setattr(database, "tenant_engines", cache)
+    monkeypatch.setattr(database, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "MULTI_TENANT", True)
+    monkeypatch.setattr(suggestions, "get_llm_service", lambda: NamingLLM())
+    for tenant in ["alice", "bob"]:
+        async with (await cache.sessionmaker(tenant))() as session:
+            session.add(Employee(name=tenant, role="Lead", email=f"{tenant}@test.com", notes=[]))
+            await session.commit()
+    # Off-hours nobody is logged in, so the tenants' engines have been closed as idle
+    cache.idle_seconds = 0
+    await cache.evict()
+    with sqlite3.connect(tenant_dir / "bob.db") as conn:
+        conn.execute("UPDATE team_counters SET employees = 7")
+
+    try:
+        warmer = suggestions.Warmer(database.every_database, 60, concurrency=2, off_hours=(0, 0))
+        assert await warmer.run_once() == 2
+        await counters.Reconciler(database.every_database, 60).run_once()
+        # The passes borrowed short-lived engines rather than reopening the tenants in the cache
+        assert len(cache) == 0
+
+        for tenant in ["alice", "bob"]:
+            with sqlite3.connect(tenant_dir / f"{tenant}.db") as conn:
+                assert conn.execute("SELECT count(*) FROM goal_suggestions").fetchone() == (1,)
+                assert conn.execute("SELECT employees FROM team_counters").fetchone() == (1,)
+    finally:
+        await cache.close()
+
+def test_migrations_run_across_tenant_files(tenant_dir):
+    async def create(tenants):
+        cache = EngineCache(Base.metadata, max_engines=8, idle_seconds=60)
+        for tenant in tenants:
+            await cache.sessionmaker(tenant)
+        await cache.close()
+
+    asyncio.run(create(["alice", "bob", "carol"]))
+    # Put every file one revision behind
+    for path in tenant_files():
+        config = alembic_config()
+        config.attributes["database_url"] = f"sqlite+aiosqlite:///{path}"
+        command.downgrade(config, "-1")
+    previous = current_revision(tenant_dir / "alice.db")
+    assert previous != alembic_head()
+
+    results = migrate_tenants(tenant_files(), jobs=3)
+
+    assert sorted(result["tenant"] for result in results) == ["alice", "bob", "carol"]
+    assert all(result["from"] == previous and result["to"] == alembic_head() for result in results)
+    for path in tenant_files():
+        assert current_revision(path) == alembic_head()
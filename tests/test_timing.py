@@ -0,0 +1,62 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.services.llm import OpenAIProvider
+from app.templating import templates
+from app.timing import collect_timings
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+def parse_server_timing(header):
+    metrics = {}
+    for entry in header.split(", "):
+        name, *params = entry.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+@pytest.mark.asyncio
+async def test_server_timing_header_breaks_down_request(db_session, override_get_db):
+    login(client)
+    client.post("/employees/", data={"name": "Timed", "role": "Dev", "email": "timed@test.com"})
+
+    response = client.get("/employees/")
+    metrics = parse_server_timing(response.headers["server-timing"])
+
+    assert set(metrics) == {"db", "tpl", "llm", "total"}
+    queries = int(re.search(r"\((\d+) queries\)", metrics["db"]["desc"]).group(1))
+    assert queries >= 1
+    assert float(metrics["tpl"]["dur"]) > 0
+    assert float(metrics["llm"]["dur"]) == 0
+    assert float(metrics["total"]["dur"]) >= float(metrics["db"]["dur"]) + float(metrics["tpl"]["dur"])
+
+@pytest.mark.asyncio
+async def test_llm_calls_are_timed(monkeypatch):
+    async def create(**kwargs):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="No gaps."))])
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    provider = OpenAIProvider()
+    provider._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    with collect_timings() as timings:
+        assert await provider.analyze_skill_gap(["Python"], "Rust") == "No gaps."
+    assert timings.durations["llm"] > 0
+    assert timings.queries == 0
+
+@pytest.mark.asyncio
+async def test_debug_toolbar(db_session, override_get_db, monkeypatch):
+    login(client)
+    assert "queries" not in client.get("/projects/").text
+
+    monkeypatch.setitem(templates.env.globals, "debug_toolbar", True)
+    assert re.search(r"\d+ queries", client.get("/projects/").text)
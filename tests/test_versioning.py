@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from sqlalchemy import select
+from app.main import app
+from app.config import Settings, settings
+from app.models import Employee, Project
+
+client = TestClient(app)
+
+def login(client):
+    client.post(
+        "/login",
+        data={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD},
+    )
+
+@pytest.mark.asyncio
+async def test_unchanged_list_returns_304(db_session, override_get_db):
+    login(client)
+    first = client.get("/employees/")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+
+    repeat = client.get("/employees/", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.headers["etag"] == etag
+    assert repeat.content == b""
+
+    client.post("/employees/", data={"name": "Fresh Face", "role": "Dev", "email": "fresh@test.com"})
+
+    changed = client.get("/employees/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert "Fresh Face" in changed.text
+
+@pytest.mark.asyncio
+async def test_detail_etag_follows_related_writes(db_session, override_get_db):
+    login(client)
+    client.post("/employees/", data={"name": "Watched", "role": "Dev", "email": "watched@test.com"})
+    client.post("/employees/", data={"name": "Bystander", "role": "Dev", "email": "bystander@test.com"})
+    client.post("/projects/", data={"name": "Versioned Project", "status": "Active"})
+
+    watched = (await db_session.execute(select(Employee).filter_by(email="watched@test.com"))).scalar_one()
+    bystander = (await db_session.execute(select(Employee).filter_by(email="bystander@test.com"))).scalar_one()
+    project = (await db_session.execute(select(Project).filter_by(name="Versioned Project"))).scalar_one()
+
+    etag = client.get(f"/employees/{watched.id}").headers["etag"]
+
+    # Editing someone else leaves this page untouched
+    client.post(
+        f"/employees/{bystander.id}/edit",
+        data={"name": "Bystander", "role": "Lead", "email": "bystander@test.com"},
+    )
+    assert client.get(f"/employees/{watched.id}", headers={"If-None-Match": etag}).status_code == 304
+
+    # A new assignment references the employee and invalidates the page
+    client.post(f"/projects/{project.id}/assign", data={"employee_id": watched.id, "role": "Lead", "capacity": 50})
+    db_session.expunge_all()
+    response = client.get(f"/employees/{watched.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Versioned Project" in response.text
+
+@pytest.mark.asyncio
+async def test_bulk_delete_invalidates_rows(db_session, override_get_db):
+    login(client)
+    client.post("/employees/", data={"name": "Short Stay", "role": "Temp", "email": "short@test.com"})
+    emp = (await db_session.execute(select(Employee).filter_by(email="short@test.com"))).scalar_one()
+
+    etag = client.get(f"/employees/{emp.id}/edit").headers["etag"]
+    client.post(f"/employees/{emp.id}/delete")
+
+    response = client.get(f"/employees/{emp.id}/edit", headers={"If-None-Match": etag})
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_etags_can_be_disabled(db_session, override_get_db, monkeypatch):
+    login(client)
+    etag = client.get("/projects/").headers["etag"]
+
+    monkeypatch.setattr(settings, "ETAGS_ENABLED", False)
+    response = client.get("/projects/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+
+def test_version_caches_refuse_several_workers():
+    defaults = Settings(_env_file=None)
+    assert not (defaults.ETAGS_ENABLED or defaults.FRAGMENT_CACHE_ENABLED or defaults.CAPACITY_CACHE_ENABLED)
+    assert Settings(_env_file=None, ETAGS_ENABLED=True, FRAGMENT_CACHE_ENABLED=True, WEB_CONCURRENCY=1).ETAGS_ENABLED
+    with pytest.raises(ValidationError, match="ETAGS_ENABLED only work with one worker process"):
+        Settings(_env_file=None, ETAGS_ENABLED=True, WEB_CONCURRENCY=4)
+    with pytest.raises(ValidationError, match="FRAGMENT_CACHE_ENABLED only work with one worker process"):
+        Settings(_env_file=None, FRAGMENT_CACHE_ENABLED=True, WEB_CONCURRENCY=4)
+    with pytest.raises(ValidationError, match="CAPACITY_CACHE_ENABLED only work with one worker process"):
+        Settings(_env_file=None, CAPACITY_CACHE_ENABLED=True, WEB_CONCURRENCY=4)